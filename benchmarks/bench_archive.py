@@ -0,0 +1,116 @@
+"""
+Benchmark del archivo de tareas: memoria del almacén y latencia de los listados antes y
+después de archivar las completadas antiguas, tamaño del segmento y coste de paginarlo
+
+1M tareas repartidas entre 1000 usuarios; el 90 % completadas hace 60 días.
+
+Uso:
+    python -m benchmarks.bench_archive [--size 1000000] [--completed 0.9]
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from models.task import TaskFilter, TaskSort, TaskStatus
+from services.archive import TaskArchive
+from services.change_feed import ChangeFeed
+from services.maintenance import archive_completed
+from services.metrics import MetricsRegistry
+from services.scheduler import Scheduler
+from services.task_record import TaskRecord
+from services.task_service import TaskService
+
+USERS = 1000
+REPEAT = 200
+
+
+def build_service(size: int, completed: float) -> TaskService:
+    now = datetime.now()
+    old = now - timedelta(days=60)
+    service = TaskService()
+    threshold = int(completed * 100)
+    service.store.load(
+        (
+            TaskRecord(i, 1 + i % USERS, f"Tarea {i}", "Descripción de la tarea", TaskStatus.COMPLETED, 1 + i % 5, old, old)
+            if i % 100 < threshold else
+            TaskRecord(i, 1 + i % USERS, f"Tarea {i}", "Descripción de la tarea", TaskStatus.PENDING, 1 + i % 5, now, now)
+            for i in range(1, size + 1)
+        ),
+        size + 1,
+    )
+    return service
+
+
+def traced_mib() -> float:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] / 2**20
+
+
+def latency_ms(fn) -> float:
+    samples = []
+    for i in range(REPEAT):
+        user_id = 1 + i * 7 % USERS
+        start = time.perf_counter()
+        fn(user_id)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def listings(service: TaskService) -> dict:
+    pending = TaskFilter(status=[TaskStatus.PENDING], sort=TaskSort.UPDATED_AT_DESC)
+    return {
+        "listado completo del usuario": lambda user_id: sum(1 for _ in service.iter_user_tasks(user_id)),
+        "pendientes por updated_at": lambda user_id: service.get_user_tasks_page(user_id, 100, task_filter=pending),
+        "estadísticas (recalculadas)": lambda user_id: (service.stats.discard(user_id), service.get_task_stats(user_id)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--completed", type=float, default=0.9, help="Fracción de tareas completadas antiguas")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        tracemalloc.start()
+        base = traced_mib()
+        service = build_service(args.size, args.completed)
+        service.archive = TaskArchive(os.path.join(directory, "archive.seg"), fsync=False)
+        before_mib = traced_mib() - base
+        before = {name: latency_ms(fn) for name, fn in listings(service).items()}
+
+        async def sweep():
+            scheduler = Scheduler(registry=MetricsRegistry())
+            return await scheduler.sweep(
+                "archive", archive_completed(service, datetime.now() - timedelta(days=30))
+            )
+
+        start = time.perf_counter()
+        archived = asyncio.run(sweep())
+        elapsed = time.perf_counter() - start
+        # El feed guarda los últimos CHANGE_FEED_SIZE eventos de cada usuario (también los de archivar): aparte
+        service.changes = ChangeFeed()
+        after_mib = traced_mib() - base
+        tracemalloc.stop()
+        after = {name: latency_ms(fn) for name, fn in listings(service).items()}
+
+        page = latency_ms(lambda user_id: service.get_archived_tasks_page(user_id, 100))
+        print(f"{args.size} tareas, {archived} archivadas en {elapsed:.1f} s; quedan {len(service.store)} en el almacén")
+        print(f"memoria del almacén: {before_mib:.0f} MiB -> {after_mib:.0f} MiB")
+        print(f"segmento en disco: {service.archive.size / 2**20:.1f} MiB ({service.archive.size / archived:.0f} B/tarea)")
+        print(f"\n{'mediana (ms)':<32}{'antes':>10}{'después':>10}")
+        for name in before:
+            print(f"{name:<32}{before[name]:>10.3f}{after[name]:>10.3f}")
+        print(f"{'página de 100 del archivo':<32}{'':>10}{page:>10.3f}")
+        service.archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Microbenchmark de get_current_user con muchos usuarios registrados
+
+Uso:
+    python -m benchmarks.bench_auth_lookup [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from middleware.auth import get_current_user
+from services.auth_service import AuthService, auth_service_instance
+
+REPEAT = 5000
+# Hash fijo: el benchmark mide la búsqueda, no bcrypt
+FAKE_HASH = "$2b$12$" + "x" * 53
+
+
+def fill(service: AuthService, size: int) -> None:
+    """Registrar `size` usuarios directamente en el directorio"""
+    now = datetime.now(timezone.utc)
+    for i in range(size):
+        service.users.add({
+            "id": service.users.allocate_id(),
+            "username": f"user{i}",
+            "email": f"user{i}@example.com",
+            "full_name": None,
+            "hashed_password": FAKE_HASH,
+            "is_active": True,
+            "created_at": now,
+        })
+
+
+async def measure(token: str, repeat: int, cached: bool) -> float:
+    """Tiempo medio por llamada en microsegundos"""
+    cache = auth_service_instance.token_cache
+    start = time.perf_counter()
+    for _ in range(repeat):
+        if not cached:
+            cache.clear()
+        await get_current_user(token)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def run(size: int) -> tuple:
+    # get_current_user usa la instancia global: se reinicia para cada tamaño
+    auth_service_instance.__init__()
+    fill(auth_service_instance, size)
+    token = auth_service_instance.create_access_token({"sub": f"user{size - 1}"})
+    return asyncio.run(measure(token, REPEAT, False)), asyncio.run(measure(token, REPEAT, True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'usuarios':>10} {'sin caché (us)':>15} {'con caché (us)':>15}")
+    for size in args.sizes:
+        cold, warm = run(size)
+        print(f"{size:>10} {cold:>15.2f} {warm:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
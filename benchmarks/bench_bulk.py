@@ -0,0 +1,56 @@
+"""
+Benchmark de ingesta: N peticiones POST /api/tasks/ frente a un único POST /api/tasks/bulk
+
+Uso:
+    python -m benchmarks.bench_bulk [--tasks 10000]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from main import app
+from models.user import UserCreate
+from services.auth_service import auth_service_instance
+from services.rate_limiter import rate_limiter_instance
+
+USER = {"username": "bulkbench", "email": "bulkbench@example.com", "password": "bulkpass123"}
+
+
+async def run(tasks: int) -> None:
+    # Se mide la ingesta, no el límite de peticiones por usuario (10k llamadas lo agotarían)
+    rate_limiter_instance.enabled = False
+    if auth_service_instance.get_user_by_username(USER["username"]) is None:
+        auth_service_instance.create_user(UserCreate(**USER))
+    headers = {"Authorization": f"Bearer {auth_service_instance.create_access_token({'sub': USER['username']})}"}
+    payload = [{"title": f"Importada {i}", "description": "Tarea importada", "priority": 1 + i % 5} for i in range(tasks)]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        for item in payload:
+            response = await client.post("/api/tasks/", json=item, headers=headers)
+            assert response.status_code == 201
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        response = await client.post("/api/tasks/bulk", json=payload, headers=headers)
+        assert response.status_code == 201
+        bulk = time.perf_counter() - start
+
+    print(f"{'modo':>12} {'tareas':>8} {'total (s)':>10} {'tareas/s':>10}")
+    print(f"{'individual':>12} {tasks:>8} {single:>10.3f} {tasks / single:>10.0f}")
+    print(f"{'lote':>12} {tasks:>8} {bulk:>10.3f} {tasks / bulk:>10.0f}")
+    print(f"aceleración: {single / bulk:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10_000)
+    asyncio.run(run(parser.parse_args().tasks))
+
+
+if __name__ == "__main__":
+    main()
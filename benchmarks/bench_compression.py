@@ -0,0 +1,106 @@
+"""
+Benchmark de la compresión de respuestas: bytes enviados y CPU por petición de GET /api/tasks/
+
+Cada modo envuelve el router con su propio CompressionMiddleware (sin presupuesto de
+CPU, para medir el nivel pedido): sin comprimir, gzip 1, gzip 6, br 4 (si está el
+paquete brotli) y gzip 6 con la caché de cuerpos comprimidos, donde los sondeos repetidos
+del mismo listado sin cambios solo calculan la huella del cuerpo. La CPU es
+time.process_time por petición, incluida la serialización; la columna "+CPU" es lo que
+añade cada modo respecto a enviar sin comprimir.
+
+Uso:
+    python -m benchmarks.bench_compression [--sizes 10 100 1000 10000] [--requests 50]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from main import app
+from middleware import compression
+from middleware.compression import CompressionMiddleware
+from models.task import TaskCreate, TaskStatus
+from models.user import UserCreate
+from services.auth_service import auth_service_instance
+from services.rate_limiter import rate_limiter_instance
+from services.task_service import task_service_instance
+
+USER = {"username": "compressbench", "email": "compressbench@example.com", "password": "compresspass123"}
+WORDS = ["revisar", "informe", "cliente", "reunión", "factura", "equipo", "migración", "servidor", "diseño", "entrega"]
+
+
+def modes() -> list:
+    """(nombre, Accept-Encoding, middleware)"""
+    result = [
+        ("identity", "identity", CompressionMiddleware(app.router, cpu_budget=0, cache_bytes=0)),
+        ("gzip 1", "gzip", CompressionMiddleware(app.router, gzip_level=1, cpu_budget=0, cache_bytes=0)),
+        ("gzip 6", "gzip", CompressionMiddleware(app.router, gzip_level=6, cpu_budget=0, cache_bytes=0)),
+    ]
+    if compression.brotli is not None:
+        result.append(("br 4", "br", CompressionMiddleware(app.router, brotli_quality=4, cpu_budget=0, cache_bytes=0)))
+    result.append(("gzip 6 + caché", "gzip", CompressionMiddleware(app.router, gzip_level=6, cpu_budget=0)))
+    return result
+
+
+async def measure(middleware, accept_encoding: str, headers: dict, size: int, requests: int) -> tuple:
+    """(bytes por respuesta, ms de CPU por petición)"""
+    headers = {**headers, "Accept-Encoding": accept_encoding}
+    transport = httpx.ASGITransport(app=middleware)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Una petición de calentamiento (y la que llena la caché en el modo con caché)
+        await client.get(f"/api/tasks/?limit={size}", headers=headers)
+        wire = 0
+        start = time.process_time()
+        for _ in range(requests):
+            response = await client.get(f"/api/tasks/?limit={size}", headers=headers)
+            assert response.status_code == 200
+            wire = response.num_bytes_downloaded
+        cpu = (time.process_time() - start) / requests
+    return wire, cpu * 1000
+
+
+async def run(sizes: list, requests: int) -> None:
+    # Se mide la compresión, no el límite de peticiones por usuario
+    rate_limiter_instance.enabled = False
+    if auth_service_instance.get_user_by_username(USER["username"]) is None:
+        auth_service_instance.create_user(UserCreate(**USER))
+    user_id = auth_service_instance.get_user_by_username(USER["username"])["id"]
+    statuses = list(TaskStatus)
+    task_service_instance.create_tasks(
+        [
+            TaskCreate(
+                title=f"{WORDS[i % len(WORDS)].capitalize()} {WORDS[i * 7 % len(WORDS)]} {i}",
+                description=" ".join(WORDS[(i + j) % len(WORDS)] for j in range(i % 12)) or None,
+                status=statuses[i % 3],
+                priority=1 + i % 5,
+            )
+            for i in range(max(sizes))
+        ],
+        user_id,
+    )
+    headers = {"Authorization": f"Bearer {auth_service_instance.create_access_token({'sub': USER['username']})}"}
+
+    print(f"{'tareas':>7} {'modo':<16} {'bytes':>11} {'ratio':>6} {'CPU (ms)':>9} {'+CPU (ms)':>10}")
+    for size in sizes:
+        baseline = None
+        for name, accept_encoding, middleware in modes():
+            wire, cpu = await measure(middleware, accept_encoding, headers, size, max(5, requests * 100 // size))
+            if baseline is None:
+                baseline = (wire, cpu)
+            print(
+                f"{size:>7} {name:<16} {wire:>11,} {baseline[0] / wire:>5.1f}x {cpu:>9.3f} {cpu - baseline[1]:>10.3f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1_000, 10_000])
+    parser.add_argument("--requests", type=int, default=50, help="Peticiones por modo con 100 tareas (escala con el tamaño)")
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Prueba de carga: latencia de GET /api/tasks/{id} durante una tormenta de logins
+
+Compara el p50/p99 del endpoint de tareas sin carga y con `--storm` clientes
+haciendo login en bucle. Con --executor inline se reproduce el comportamiento
+anterior (bcrypt en el event loop).
+
+Uso:
+    python -m benchmarks.bench_login_storm [--executor thread|process|inline] [--storm 16]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from main import app
+from models.task import TaskCreate
+from models.user import UserCreate
+from services.auth_service import auth_service_instance
+from services.password_hasher import PasswordHasher
+from services.task_service import task_service_instance
+
+PROBE_INTERVAL = 0.005
+USER = {"username": "stormuser", "email": "storm@example.com", "password": "stormpass123"}
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def probe_tasks(client: httpx.AsyncClient, headers: dict, task_id: int, requests: int) -> list:
+    """Latencias (ms) de `requests` lecturas de una tarea, una cada PROBE_INTERVAL"""
+    samples = []
+    for _ in range(requests):
+        # Se mide desde el instante en que la petición debía salir: si el event
+        # loop está bloqueado por bcrypt, el retraso cuenta como latencia
+        start = time.perf_counter() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        response = await client.get(f"/api/tasks/{task_id}", headers=headers)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200
+    return samples
+
+
+async def login_loop(client: httpx.AsyncClient, stop: asyncio.Event, counters: dict) -> None:
+    while not stop.is_set():
+        response = await client.post("/api/auth/login", data={"username": USER["username"], "password": USER["password"]})
+        counters[response.status_code] = counters.get(response.status_code, 0) + 1
+
+
+async def run(args) -> None:
+    auth_service_instance.hasher = PasswordHasher(args.workers, args.max_pending, args.executor)
+    if auth_service_instance.get_user_by_username(USER["username"]) is None:
+        auth_service_instance.create_user(UserCreate(**USER))
+    user_id = auth_service_instance.get_user_by_username(USER["username"])["id"]
+    task = task_service_instance.create_task(TaskCreate(title="Tarea de carga"), user_id)
+    headers = {"Authorization": f"Bearer {auth_service_instance.create_access_token({'sub': USER['username']})}"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        baseline = await probe_tasks(client, headers, task.id, args.requests)
+
+        stop = asyncio.Event()
+        counters: dict = {}
+        storm = [asyncio.create_task(login_loop(client, stop, counters)) for _ in range(args.storm)]
+        await asyncio.sleep(0.2)
+        loaded = await probe_tasks(client, headers, task.id, args.requests)
+        stop.set()
+        await asyncio.gather(*storm)
+
+    auth_service_instance.hasher.shutdown()
+    print(f"executor={args.executor} workers={args.workers} storm={args.storm} logins={counters}")
+    print(f"{'fase':>12} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for name, samples in (("sin carga", baseline), ("tormenta", loaded)):
+        print(f"{name:>12} {statistics.median(samples):>10.2f} {percentile(samples, 99):>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--executor", choices=["thread", "process", "inline"], default="thread")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--storm", type=int, default=16, help="clientes haciendo login en paralelo")
+    parser.add_argument("--requests", type=int, default=200, help="lecturas de tarea por fase")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
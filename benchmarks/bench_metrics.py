@@ -0,0 +1,84 @@
+"""
+Coste de las métricas: throughput de GET /api/tasks/{id} con METRICS_ENABLED=1 frente a METRICS_ENABLED=0
+
+Con METRICS_ENABLED=0 no se instala el middleware ni se envuelven las funciones, así
+que cada ronda se ejecuta en un proceso nuevo. Las rondas se alternan para repartir
+el ruido entre ambas configuraciones y se compara la mediana. Objetivo: menos de un 3 %.
+
+Uso:
+    python -m benchmarks.bench_metrics [--rounds 6] [--duration 3.0]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+USER = {"username": "metricsbench", "email": "metricsbench@example.com", "password": "metricspass123"}
+
+
+async def throughput(duration: float) -> float:
+    """Peticiones por segundo de GET /api/tasks/{id} en este proceso"""
+    from main import app
+    from models.task import TaskCreate
+    from models.user import UserCreate
+    from services.auth_service import auth_service_instance
+    from services.task_service import task_service_instance
+
+    auth_service_instance.create_user(UserCreate(**USER))
+    user_id = auth_service_instance.get_user_by_username(USER["username"])["id"]
+    task = task_service_instance.create_task(TaskCreate(title="Tarea medida"), user_id)
+    headers = {"Authorization": f"Bearer {auth_service_instance.create_access_token({'sub': USER['username']})}"}
+    path = f"/api/tasks/{task.id}"
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(500):  # calentamiento
+            await client.get(path, headers=headers)
+        requests = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            response = await client.get(path, headers=headers)
+            assert response.status_code == 200
+            requests += 1
+    return requests / (time.perf_counter() - start)
+
+
+def run_round(enabled: bool, duration: float) -> float:
+    env = dict(os.environ, METRICS_ENABLED="1" if enabled else "0")
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_metrics", "--measure", "--duration", str(duration)],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=6)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(asyncio.run(throughput(args.duration)))
+        return
+
+    results = {True: [], False: []}
+    for i in range(args.rounds * 2):
+        enabled = i % 2 == 1
+        results[enabled].append(run_round(enabled, args.duration))
+
+    on, off = statistics.median(results[True]), statistics.median(results[False])
+    print(f"sin métricas: {off:,.0f} req/s")
+    print(f"con métricas: {on:,.0f} req/s")
+    print(f"sobrecoste:   {(off - on) / off * 100:.2f} %  ({(1 / on - 1 / off) * 1e6:.1f} µs por petición)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark de paginación: offset frente a cursor en páginas profundas
+
+Uso:
+    python -m benchmarks.bench_pagination [--tasks 100000] [--limit 100]
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from models.task import Task, TaskStatus
+from services.sqlite_store import SQLitePool, SQLiteTaskStore
+from services.task_service import TaskService
+
+USER_ID = 1
+REPEAT = 200
+
+
+def fill(service: TaskService, size: int) -> None:
+    now = datetime.now()
+    for i in range(size):
+        service.store.add(Task.model_construct(
+            id=service.store.allocate_id(), user_id=USER_ID, title=f"Tarea {i}", description=None,
+            status=TaskStatus.PENDING, priority=1, created_at=now, updated_at=now,
+        ))
+
+
+def page_cursors(service: TaskService, limit: int, pages: list) -> dict:
+    """Cursor de inicio de cada página recorriendo la colección una vez"""
+    cursors, cursor = {}, None
+    for page in range(1, max(pages) + 1):
+        if page in pages:
+            cursors[page] = cursor
+        _, cursor = service.get_user_tasks_page(USER_ID, limit, cursor)
+    return cursors
+
+
+def measure(fn, repeat: int = REPEAT) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def run(name: str, service: TaskService, limit: int, pages: list) -> None:
+    cursors = page_cursors(service, limit, pages)
+    for page in pages:
+        offset_us = measure(lambda: service.get_user_tasks_page(USER_ID, limit, skip=(page - 1) * limit))
+        cursor_us = measure(lambda: service.get_user_tasks_page(USER_ID, limit, cursors[page]))
+        print(f"{name:>8} {page:>8} {offset_us:>12.1f} {cursor_us:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--sqlite", help="fichero SQLite para medir también ese backend")
+    args = parser.parse_args()
+    pages = [p for p in (1, 10, 100, 1000) if (p - 1) * args.limit < args.tasks]
+
+    print(f"{'backend':>8} {'página':>8} {'offset (us)':>12} {'cursor (us)':>12}")
+    memory = TaskService()
+    fill(memory, args.tasks)
+    run("memory", memory, args.limit, pages)
+
+    if args.sqlite:
+        sqlite = TaskService()
+        sqlite.store = SQLiteTaskStore(SQLitePool(args.sqlite))
+        if len(sqlite.store) == 0:
+            fill(sqlite, args.tasks)
+        run("sqlite", sqlite, args.limit, pages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark del límite de peticiones: latencia de los demás clientes con un cliente abusivo
+
+Varios clientes normales piden su listado a un ritmo moderado (por debajo de su límite)
+mientras un cliente abusivo lanza listados grandes a ritmo fijo (`--abuse-rate` por
+segundo, sin esperar respuestas), como haría un script contra el servidor.
+Se mide el p50/p99 de los clientes normales en tres escenarios: sin cliente abusivo,
+con el abusivo y el límite desactivado, y con el abusivo y el límite activo. Con el
+límite, la mayoría de las peticiones del abusivo se rechazan con 429 antes de leer o
+serializar nada, así que el p99 de los demás debe quedar cerca del de referencia.
+
+Uso:
+    python -m benchmarks.bench_rate_limit [--clients 10] [--duration 5] [--abuse-rate 200]
+
+El cliente HTTP corre en el mismo proceso y event loop que la API, así que su propio
+coste por petición también cuenta: los números sirven para comparar escenarios, no
+como latencias absolutas.
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.suite import percentile
+from main import app
+from models.task import TaskCreate
+from models.user import UserCreate
+from services.auth_service import auth_service_instance
+from services.rate_limiter import rate_limiter_instance
+from services.task_service import task_service_instance
+
+PASSWORD = "ratebench123"
+TASKS_PER_USER = 1000
+# Ritmo de cada cliente normal: 10 peticiones/s, muy por debajo de su límite
+CLIENT_INTERVAL = 0.1
+
+
+def seed_user(username: str) -> dict:
+    """Crear (si no existe) un usuario con TASKS_PER_USER tareas y devolver su cabecera de autenticación"""
+    if auth_service_instance.get_user_by_username(username) is None:
+        user = auth_service_instance.create_user(
+            UserCreate(username=username, email=f"{username}@example.com", password=PASSWORD)
+        )
+        task_service_instance.create_tasks(
+            [TaskCreate(title=f"Tarea {i}", priority=1 + i % 5) for i in range(TASKS_PER_USER)], user.id
+        )
+    return {"Authorization": f"Bearer {auth_service_instance.create_access_token({'sub': username})}"}
+
+
+async def scenario(client: httpx.AsyncClient, clients: list, abuser: dict, abuse_rate: float, duration: float) -> tuple:
+    """(latencias de los clientes normales, peticiones del abusivo atendidas, rechazadas)"""
+    latencies, served, rejected = [], 0, 0
+    deadline = time.perf_counter() + duration
+
+    async def normal(headers):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get("/api/tasks/?limit=20", headers=headers)
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200
+            await asyncio.sleep(CLIENT_INTERVAL)
+
+    async def abusive_request():
+        nonlocal served, rejected
+        response = await client.get("/api/tasks/?limit=1000", headers=abuser)
+        if response.status_code == 429:
+            rejected += 1
+        else:
+            served += 1
+
+    async def abusive():
+        # Ritmo fijo: cada petición sale a su hora aunque las anteriores no hayan terminado
+        sent, start = [], time.perf_counter()
+        while abuse_rate and time.perf_counter() < deadline:
+            sent.append(asyncio.create_task(abusive_request()))
+            await asyncio.sleep(max(0.0, start + len(sent) / abuse_rate - time.perf_counter()))
+        await asyncio.gather(*sent)
+
+    await asyncio.gather(*(normal(headers) for headers in clients), abusive())
+    return latencies, served, rejected
+
+
+async def run(clients: int, duration: float, abuse_rate: float) -> None:
+    normal_headers = [seed_user(f"ratebench_{i}") for i in range(clients)]
+    abuser = seed_user("ratebench_abuser")
+
+    print(f"{'escenario':<24} {'p50 (ms)':>9} {'p99 (ms)':>9} {'abusivo 2xx':>12} {'abusivo 429':>12}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # El último escenario es el único que agota fichas: los anteriores no dejan buckets vacíos
+        for name, rate, limited in (
+            ("sin abusivo", 0, True), ("abusivo, sin límite", abuse_rate, False), ("abusivo, con límite", abuse_rate, True)
+        ):
+            rate_limiter_instance.enabled = limited
+            latencies, served, rejected = await scenario(client, normal_headers, abuser, rate, duration)
+            print(
+                f"{name:<24} {percentile(latencies, 50) * 1000:>9.2f} {percentile(latencies, 99) * 1000:>9.2f}"
+                f" {served:>12} {rejected:>12}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=5.0, help="Segundos por escenario")
+    parser.add_argument("--abuse-rate", type=float, default=200, help="Peticiones por segundo del cliente abusivo")
+    args = parser.parse_args()
+    asyncio.run(run(args.clients, args.duration, args.abuse_rate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark de los barridos del planificador: cuánto esperan las peticiones mientras se borran
+las tareas de los usuarios desactivados en un almacén grande
+
+Mientras el barrido corre, un "latido" duerme 1 ms en bucle y mide con qué retraso despierta:
+es lo que esperaría una petición que llega a mitad del barrido.
+
+Uso:
+    python -m benchmarks.bench_scheduler [--size 1000000] [--slice-ms 2] [--pause-ms 1] [--batch 200]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+from models.task import TaskStatus
+from services.maintenance import purge_inactive_users
+from services.metrics import MetricsRegistry
+from services.scheduler import Scheduler
+from services.task_record import TaskRecord
+from services.task_service import TaskService
+
+USERS = 1000
+STATUSES = list(TaskStatus)
+
+
+def build_service(size: int) -> TaskService:
+    now = datetime.now()
+    service = TaskService()
+    service.store.load(
+        (TaskRecord(i, 1 + i % USERS, f"Tarea {i}", None, STATUSES[i % len(STATUSES)], 1 + i % 5, now, now)
+         for i in range(1, size + 1)),
+        size + 1,
+    )
+    return service
+
+
+async def run(service: TaskService, users: list, slice_seconds: float, pause: float, batch: int) -> dict:
+    registry = MetricsRegistry()
+    scheduler = Scheduler(slice_seconds=slice_seconds, slice_pause=pause, registry=registry)
+    finished = asyncio.Event()
+
+    async def purge():
+        try:
+            return await scheduler.sweep("purge", purge_inactive_users(service, users, batch))
+        finally:
+            finished.set()
+
+    lags = []
+    scheduler.once("purge", purge)
+    start = time.perf_counter()
+    scheduler.start()
+    while not finished.is_set():
+        before = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - before - 0.001)
+    elapsed = time.perf_counter() - start
+    await scheduler.shutdown()
+    slices = registry.job_slice.labels("purge")
+    return {
+        "deleted": registry.job_items.values.get(("purge",), 0),
+        "elapsed": elapsed,
+        "slices": slices.count,
+        "lags": sorted(lags),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--slice-ms", type=float, default=2.0)
+    parser.add_argument("--pause-ms", type=float, default=1.0)
+    parser.add_argument("--batch", type=int, default=200)
+    args = parser.parse_args()
+
+    service = build_service(args.size)
+    # La mitad de los usuarios, desactivados: el barrido borra la mitad de las tareas
+    users = [{"id": user_id, "is_active": user_id % 2 == 0} for user_id in range(1, USERS + 1)]
+    result = asyncio.run(run(service, users, args.slice_ms / 1000, args.pause_ms / 1000, args.batch))
+
+    lags = result["lags"]
+    print(f"{args.size} tareas, {USERS} usuarios (la mitad desactivados), "
+          f"tramo {args.slice_ms} ms, pausa {args.pause_ms} ms, lote {args.batch}")
+    print(f"borradas: {result['deleted']} en {result['elapsed']:.1f} s "
+          f"({result['deleted'] / result['elapsed']:,.0f} tareas/s, {result['slices']} tramos)")
+    print(f"retraso del latido (ms): p50 {statistics.median(lags) * 1000:.2f}  "
+          f"p99 {lags[int(len(lags) * 0.99)] * 1000:.2f}  máx {lags[-1] * 1000:.2f}")
+    print(f"tareas que quedan: {len(service.store)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark de la búsqueda por texto: latencia de TaskStore.search con 1M de tareas
+
+Los títulos y descripciones se generan con un vocabulario de palabras en español con
+frecuencias tipo Zipf (unas pocas palabras muy comunes y una cola larga de raras). Se
+mide con las tareas repartidas entre muchos usuarios y con todas en un único usuario
+(peor caso: el índice de un usuario tiene el millón de tareas). La primera búsqueda de
+cada usuario construye su índice; se mide aparte.
+
+Uso:
+    python -m benchmarks.bench_search [--size 1000000] [--users 1000] [--queries 500]
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime
+from itertools import accumulate
+
+from models.task import TaskStatus
+from services.task_record import TaskRecord
+from services.task_store import TaskStore
+
+STEMS = [
+    "revis", "inform", "reuni", "client", "factur", "diseñ", "equip", "presupuest", "migraci", "document",
+    "prueb", "despliegu", "servid", "contrat", "llamad", "correo", "proyect", "entreg", "calend", "nómin",
+    "campañ", "pedid", "almac", "inventari", "auditorí", "formaci", "incidenci", "soport", "tarif", "proveedor",
+]
+ENDINGS = ["", "a", "o", "es", "ión", "ar", "ado", "ación", "ero", "ía", "illo", "encia"]
+QUERIES = ["informe", "reunión cliente", "factur", "migracion servidor", "nomina", "revisar presupuesto", "desplieg"]
+
+
+def vocabulary(size: int, rng: random.Random) -> list:
+    words = sorted({stem + ending for stem in STEMS for ending in ENDINGS})
+    extra = [f"{rng.choice(STEMS)}{i}" for i in range(max(0, size - len(words)))]
+    words += extra
+    rng.shuffle(words)
+    return words
+
+
+def build_store(size: int, users: int, rng: random.Random) -> TaskStore:
+    words = vocabulary(5000, rng)
+    weights = list(accumulate(1 / (rank + 1) for rank in range(len(words))))
+    now = datetime.now()
+    statuses = list(TaskStatus)
+    records = []
+    for i in range(size):
+        title = " ".join(rng.choices(words, cum_weights=weights, k=rng.randint(2, 6)))
+        description = " ".join(rng.choices(words, cum_weights=weights, k=rng.randint(0, 15))) or None
+        records.append(TaskRecord(i + 1, 1 + i % users, title, description, statuses[i % 3], 1 + i % 5, now, now))
+    store = TaskStore()
+    store.load(records, size + 1)
+    return store
+
+
+def postings_size(store: TaskStore, user_ids: list) -> int:
+    """Bytes de los arrays de postings (incluidos los grupos por impacto) de los índices construidos"""
+    total = 0
+    for user_id in user_ids:
+        index = store._search[user_id]
+        total += sum(ids.itemsize * len(ids) for ids in index.postings.values())
+        total += sum(ids.itemsize * len(ids) for groups in index.impacts.values() for ids in groups.values())
+    return total
+
+
+def measure(store: TaskStore, users: int, queries: int, rng: random.Random) -> None:
+    user_ids = [rng.randint(1, users) for _ in range(queries)]
+    # Primera búsqueda de cada usuario: construye su índice
+    built = sorted(set(user_ids))
+    start = time.perf_counter()
+    for user_id in built:
+        store.search(user_id, "x")
+    build = time.perf_counter() - start
+    tasks = sum(store.count_by_user(user_id) for user_id in built)
+    print(
+        f"  construir {len(built)} índices ({tasks:,} tareas): {build:.2f} s, "
+        f"{postings_size(store, built) / 2**20:.0f} MiB de postings"
+    )
+
+    latencies, results = [], []
+    for user_id in user_ids:
+        query = rng.choice(QUERIES)
+        start = time.perf_counter()
+        found = store.search(user_id, query, 20)
+        latencies.append(time.perf_counter() - start)
+        results.append(len(found))
+    latencies.sort()
+    print(
+        f"  {queries} búsquedas: p50 {statistics.median(latencies) * 1000:.2f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms, "
+        f"máx {latencies[-1] * 1000:.2f} ms, media de resultados {statistics.fmean(results):.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    for users in (args.users, 1):
+        rng = random.Random(args.seed)
+        start = time.perf_counter()
+        store = build_store(args.size, users, rng)
+        print(f"{args.size:,} tareas en {users} usuario(s) (generadas en {time.perf_counter() - start:.1f} s)")
+        measure(store, users, args.queries if users > 1 else args.queries // 5, rng)
+        del store
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark de serialización del listado: response_model de FastAPI frente a FAST_SERIALIZATION
+
+Uso:
+    python -m benchmarks.bench_serialization [--sizes 100 1000 10000]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from main import app
+from models import serializers
+from models.task import TaskCreate
+from models.user import UserCreate
+from services.auth_service import auth_service_instance
+from services.task_service import task_service_instance
+
+USER = {"username": "serialbench", "email": "serialbench@example.com", "password": "serialpass123"}
+DURATION = 2.0
+
+
+async def throughput(client: httpx.AsyncClient, headers: dict, size: int) -> float:
+    """Peticiones por segundo de GET /api/tasks/?limit=size durante DURATION segundos"""
+    requests = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        response = await client.get(f"/api/tasks/?limit={size}", headers=headers)
+        assert response.status_code == 200
+        requests += 1
+    return requests / (time.perf_counter() - start)
+
+
+async def run(sizes: list) -> None:
+    if auth_service_instance.get_user_by_username(USER["username"]) is None:
+        auth_service_instance.create_user(UserCreate(**USER))
+    user_id = auth_service_instance.get_user_by_username(USER["username"])["id"]
+    task_service_instance.create_tasks(
+        [TaskCreate(title=f"Tarea {i}", description="Descripción de prueba", priority=1 + i % 5) for i in range(max(sizes))],
+        user_id,
+    )
+    headers = {"Authorization": f"Bearer {auth_service_instance.create_access_token({'sub': USER['username']})}"}
+
+    print(f"{'tareas':>8} {'modelo (req/s)':>15} {'rápido (req/s)':>15} {'mejora':>8}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size in sizes:
+            serializers.FAST_SERIALIZATION = False
+            default = await throughput(client, headers, size)
+            serializers.FAST_SERIALIZATION = True
+            fast = await throughput(client, headers, size)
+            print(f"{size:>8} {default:>15.1f} {fast:>15.1f} {fast / default:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    asyncio.run(run(parser.parse_args().sizes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark del arranque en frío: informe de tiempos de importación y tiempo hasta atender
+
+1. Informe por módulo al estilo de `python -X importtime -c "import main"`: los módulos
+   con más tiempo propio y acumulado, y el tiempo propio sumado por paquete.
+2. Con STARTUP_MODE=eager y lazy, cada uno en un proceso nuevo: importar main,
+   lifespan (hasta poder atender) y la primera petición que necesita JWT
+   (GET /api/auth/me), la primera contraseña (hash con bcrypt) y el primer /openapi.json.
+   Con --openapi se mide también el esquema pregenerado (OPENAPI_SCHEMA_PATH).
+
+Uso:
+    python -m benchmarks.bench_startup [--top 20] [--runs 3] [--openapi /tmp/openapi.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+
+def import_times() -> List[Tuple[str, int, int]]:
+    """(módulo, µs propios, µs acumulados) de importar main en un proceso nuevo"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def report(top: int) -> None:
+    modules = import_times()
+    total = sum(self_us for _, self_us, _ in modules)
+    print(f"Importar main: {total / 1000:.0f} ms en {len(modules)} módulos\n")
+    print(f"{'módulo':<50} {'propio (ms)':>12} {'acumulado (ms)':>15}")
+    for name, self_us, cumulative_us in sorted(modules, key=lambda m: m[2], reverse=True)[:top]:
+        print(f"{name:<50} {self_us / 1000:>12.1f} {cumulative_us / 1000:>15.1f}")
+
+    packages: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in modules:
+        packages[name.split(".")[0]] += self_us
+    print(f"\n{'paquete':<50} {'propio (ms)':>12} {'%':>6}")
+    for package, self_us in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:top]:
+        print(f"{package:<50} {self_us / 1000:>12.1f} {100 * self_us / total:>5.1f}%")
+
+
+def child() -> None:
+    """Medir el arranque en este proceso (lo lanza measure con el entorno de cada modo)"""
+    start = time.perf_counter()
+    from main import app
+    from fastapi.testclient import TestClient
+    from services.password_hasher import hash_password
+    timings = {"import": time.perf_counter() - start}
+
+    client = TestClient(app)
+    start = time.perf_counter()
+    client.__enter__()
+    timings["lifespan"] = time.perf_counter() - start
+    for name, request in (
+        ("primer JWT", lambda: client.get("/api/auth/me", headers={"Authorization": "Bearer x.y.z"})),
+        ("primer bcrypt", lambda: hash_password("contraseña")),
+        ("segundo bcrypt", lambda: hash_password("contraseña")),
+        ("primer /openapi.json", lambda: client.get("/openapi.json")),
+    ):
+        start = time.perf_counter()
+        request()
+        timings[name] = time.perf_counter() - start
+    client.__exit__(None, None, None)
+    print(json.dumps(timings))
+
+
+def measure(env: dict, runs: int) -> Dict[str, float]:
+    samples: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+            capture_output=True, text=True, check=True, env={**os.environ, **env},
+        )
+        for name, value in json.loads(result.stdout.strip().splitlines()[-1]).items():
+            samples[name].append(value)
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3, help="Procesos por modo (se muestra la mediana)")
+    parser.add_argument("--openapi", help="Generar el esquema en esta ruta y medir también el modo con esquema pregenerado")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    report(args.top)
+    modes = [("eager", {"STARTUP_MODE": "eager"}), ("lazy", {"STARTUP_MODE": "lazy"})]
+    if args.openapi:
+        subprocess.run([sys.executable, "build_openapi.py", args.openapi], check=True, capture_output=True)
+        modes.append(("lazy + OpenAPI", {"STARTUP_MODE": "lazy", "OPENAPI_SCHEMA_PATH": args.openapi}))
+
+    results = [(name, measure({"METRICS_ENABLED": "1", **env}, args.runs)) for name, env in modes]
+    steps = list(results[0][1])
+    print(f"\n{'ms (mediana)':<22}" + "".join(f"{name:>16}" for name, _ in results))
+    for step in steps:
+        print(f"{step:<22}" + "".join(f"{timings[step] * 1000:>16.1f}" for _, timings in results))
+    ready = [timings["import"] + timings["lifespan"] for _, timings in results]
+    print(f"{'listo para atender':<22}" + "".join(f"{value * 1000:>16.1f}" for value in ready))
+
+
+if __name__ == "__main__":
+    main()
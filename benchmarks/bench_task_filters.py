@@ -0,0 +1,87 @@
+"""
+Benchmark de filtros selectivos: índices secundarios frente a recorrer todas las tareas
+
+Uso:
+    python -m benchmarks.bench_task_filters [--tasks 50000] [--limit 100] [--sqlite /tmp/bench.db]
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from models.task import Task, TaskFilter, TaskSort, TaskStatus
+from services.sqlite_store import SQLitePool, SQLiteTaskStore
+from services.task_service import TaskService
+from services.task_store import task_matches
+
+USER_ID = 1
+REPEAT = 50
+
+FILTERS = {
+    "completadas": TaskFilter(status=[TaskStatus.COMPLETED]),
+    "completadas p5": TaskFilter(status=[TaskStatus.COMPLETED], priority_min=5),
+    "prioridad desc": TaskFilter(sort=TaskSort.PRIORITY_DESC),
+    "actualizadas 1 día": TaskFilter(
+        sort=TaskSort.UPDATED_AT_DESC, updated_from=datetime(2024, 6, 1), updated_to=datetime(2024, 6, 2)
+    ),
+}
+
+
+def fill(service: TaskService, size: int) -> None:
+    rng = random.Random(1)
+    base = datetime(2024, 1, 1)
+    # La mayoría de tareas están pendientes: los filtros sobre completadas son selectivos
+    statuses = [TaskStatus.PENDING] * 8 + [TaskStatus.IN_PROGRESS] + [TaskStatus.COMPLETED]
+    for i in range(size):
+        stamp = base + timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+        service.store.add(Task.model_construct(
+            id=service.store.allocate_id(), user_id=USER_ID, title=f"Tarea {i}", description=None,
+            status=rng.choice(statuses), priority=rng.randint(1, 5), created_at=stamp, updated_at=stamp,
+        ))
+
+
+def brute_force(service: TaskService, task_filter: TaskFilter, limit: int) -> list:
+    """Lo que hacía el cliente: descargar todo y filtrar/ordenar"""
+    tasks = [t for t in service.get_user_tasks(USER_ID, 0, 10**9) if task_matches(t, task_filter)]
+    field = task_filter.sort.value.lstrip("-")
+    tasks.sort(key=lambda t: (getattr(t, field), t.id), reverse=task_filter.sort.value.startswith("-"))
+    return tasks[:limit]
+
+
+def measure(fn, repeat: int = REPEAT) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(name: str, service: TaskService, limit: int) -> None:
+    for label, task_filter in FILTERS.items():
+        indexed = measure(lambda: service.get_user_tasks_page(USER_ID, limit, task_filter=task_filter))
+        scan = measure(lambda: brute_force(service, task_filter, limit), repeat=5)
+        print(f"{name:>8} {label:>20} {indexed:>12.3f} {scan:>12.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=50_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--sqlite", help="fichero SQLite para medir también ese backend")
+    args = parser.parse_args()
+
+    print(f"{'backend':>8} {'filtro':>20} {'índice (ms)':>12} {'recorrido (ms)':>12}")
+    memory = TaskService()
+    fill(memory, args.tasks)
+    run("memory", memory, args.limit)
+
+    if args.sqlite:
+        sqlite = TaskService()
+        sqlite.store = SQLiteTaskStore(SQLitePool(args.sqlite))
+        if len(sqlite.store) == 0:
+            fill(sqlite, args.tasks)
+        run("sqlite", sqlite, args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark de memoria del almacén de tareas (tracemalloc): TaskRecord compacto frente a un Task de pydantic por tarea
+
+Uso:
+    python -m benchmarks.bench_task_memory [--size 1000000]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from models.task import Task, TaskStatus
+from services.task_record import TaskRecord
+from services.task_store import TaskStore
+
+USERS = 1000
+STATUSES = list(TaskStatus)
+
+
+def task_fields(i: int, now: datetime) -> dict:
+    return dict(
+        id=i + 1, user_id=1 + i % USERS, title=f"Tarea {i}", description=None,
+        status=STATUSES[i % len(STATUSES)], priority=1 + i % 5,
+        created_at=now, updated_at=now + timedelta(microseconds=i),
+    )
+
+
+def measure(build) -> tuple:
+    """Memoria retenida (MiB) y segundos que tarda `build`"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained / 2**20, elapsed
+
+
+def build_models(size: int, now: datetime) -> dict:
+    return {i + 1: Task.model_construct(**task_fields(i, now)) for i in range(size)}
+
+
+def build_records(size: int, now: datetime) -> dict:
+    return {i + 1: TaskRecord(**task_fields(i, now)) for i in range(size)}
+
+
+def build_store(size: int, now: datetime) -> TaskStore:
+    store = TaskStore()
+    for i in range(size):
+        store.add(TaskRecord(**task_fields(i, now)))
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args()
+    now = datetime.now()
+
+    print(f"{args.size} tareas")
+    print(f"{'':<32} {'MiB':>10} {'B/tarea':>10} {'s':>8}")
+    for label, build in (
+        ("dict de Task (pydantic)", build_models),
+        ("dict de TaskRecord", build_records),
+        ("TaskStore completo (+ índices)", build_store),
+    ):
+        mib, elapsed = measure(lambda: build(args.size, now))
+        print(f"{label:<32} {mib:>10.1f} {mib * 2**20 / args.size:>10.0f} {elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
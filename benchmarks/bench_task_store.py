@@ -0,0 +1,71 @@
+"""
+Benchmark del almacén de tareas: latencia de get/list/delete según el tamaño del store
+
+Uso:
+    python -m benchmarks.bench_task_store [--sizes 1000 10000 100000 1000000]
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from models.task import Task, TaskStatus
+from services.task_service import TaskService
+
+USERS = 1000
+PROBE_USER = 0
+PROBE_TASKS = 200
+REPEAT = 2000
+
+
+def fill(service: TaskService, size: int) -> None:
+    """Poblar el servicio con `size` tareas repartidas entre USERS usuarios"""
+    now = datetime.now()
+    for i in range(size):
+        user_id = PROBE_USER if i < PROBE_TASKS else 1 + i % USERS
+        task = Task.model_construct(
+            id=service.store.allocate_id(), user_id=user_id, title=f"Tarea {i}", description=None,
+            status=TaskStatus.PENDING, priority=1 + i % 5, created_at=now, updated_at=now,
+        )
+        service.store.add(task)
+
+
+def measure(fn, repeat: int = REPEAT) -> float:
+    """Tiempo medio por llamada en microsegundos"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def run(size: int) -> dict:
+    service = TaskService()
+    fill(service, size)
+    probe_ids = [t.id for t in service.get_user_tasks(PROBE_USER, 0, PROBE_TASKS)]
+    middle_id = probe_ids[len(probe_ids) // 2]
+
+    def delete_and_restore():
+        task = service.store.remove(middle_id)
+        service.store.add(task)
+
+    return {
+        "size": size,
+        "get_us": measure(lambda: service.get_task_by_id(middle_id)),
+        "list_us": measure(lambda: service.get_user_tasks(PROBE_USER, 50, 100)),
+        "delete_us": measure(delete_and_restore),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'tareas':>10} {'get (us)':>10} {'list (us)':>10} {'delete (us)':>12}")
+    for size in args.sizes:
+        r = run(size)
+        print(f"{r['size']:>10} {r['get_us']:>10.2f} {r['list_us']:>10.2f} {r['delete_us']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
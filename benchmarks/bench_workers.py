@@ -0,0 +1,132 @@
+"""
+Escalado de GET /api/tasks/{id} con 1 a N workers (serve.py + SQLite compartido)
+
+Arranca `python serve.py` con cada número de workers sobre un fichero SQLite
+temporal y lo carga con `--clients` procesos, cada uno con `--connections`
+conexiones keep-alive. El generador de carga comparte CPU con el servidor: para
+medir escalado real con 8 núcleos conviene dejar al servidor al menos 8 núcleos
+libres (p. ej. `taskset`) o lanzar la carga desde otra máquina con --url.
+
+Uso:
+    python -m benchmarks.bench_workers [--workers 1 2 4 8] [--duration 10] [--clients 4] [--connections 32]
+    python -m benchmarks.bench_workers --url http://servidor:8000   # servidor ya en marcha
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USER = {"username": "benchworkers", "email": "benchworkers@example.com", "password": "benchpass123"}
+
+
+def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"el servidor no respondió en {timeout} s")
+
+
+def prepare(url: str) -> tuple:
+    """Registrar el usuario de prueba y crear la tarea que se lee; devuelve (cabeceras, id)"""
+    with httpx.Client(base_url=url) as client:
+        client.post("/api/auth/register", json=USER)
+        token = client.post(
+            "/api/auth/login", data={"username": USER["username"], "password": USER["password"]}
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        task_id = client.post("/api/tasks/", json={"title": "Tarea de carga"}, headers=headers).json()["id"]
+    return headers, task_id
+
+
+async def _load(url: str, headers: dict, task_id: int, connections: int, duration: float) -> list:
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits) as client:
+        async def loop():
+            samples = []
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.get(f"/api/tasks/{task_id}")
+                if response.status_code == 200:
+                    samples.append(time.perf_counter() - start)
+            return samples
+
+        results = await asyncio.gather(*(loop() for _ in range(connections)))
+    return [sample for samples in results for sample in samples]
+
+
+def load_client(args: tuple) -> list:
+    """Proceso generador de carga: latencias (s) de las peticiones completadas"""
+    return asyncio.run(_load(*args))
+
+
+def measure(url: str, clients: int, connections: int, duration: float) -> dict:
+    headers, task_id = prepare(url)
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.map(load_client, [(url, headers, task_id, connections, duration)] * clients)
+    samples = sorted(sample for result in results for sample in result)
+    return {
+        "rps": len(samples) / duration,
+        "p50_ms": statistics.median(samples) * 1000,
+        "p99_ms": samples[int(len(samples) * 0.99)] * 1000,
+    }
+
+
+def run_server(workers: int, port: int, db_path: str) -> subprocess.Popen:
+    env = dict(os.environ, WORKERS=str(workers), PORT=str(port), STORAGE_BACKEND="sqlite", SQLITE_PATH=db_path)
+    return subprocess.Popen(
+        [sys.executable, "serve.py"], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", help="medir un servidor ya arrancado en lugar de lanzar serve.py")
+    args = parser.parse_args()
+
+    if args.url:
+        r = measure(args.url, args.clients, args.connections, args.duration)
+        print(f"{r['rps']:,.0f} req/s  p50 {r['p50_ms']:.2f} ms  p99 {r['p99_ms']:.2f} ms")
+        return
+
+    print(f"núcleos disponibles: {os.cpu_count()}")
+    print(f"{'workers':>8} {'req/s':>10} {'escalado':>9} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    baseline = None
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"http://127.0.0.1:{args.port}"
+            server = run_server(workers, args.port, os.path.join(tmp, "bench.db"))
+            try:
+                wait_ready(url)
+                r = measure(url, args.clients, args.connections, args.duration)
+            finally:
+                server.terminate()
+                server.wait()
+        baseline = baseline or r["rps"]
+        print(
+            f"{workers:>8} {r['rps']:>10,.0f} {r['rps'] / baseline:>8.2f}x "
+            f"{r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Suite de benchmarks de los caminos críticos de la API
+
+Siembra `--users` usuarios y `--tasks` tareas directamente en los servicios y mide,
+con un cliente ASGI en proceso (sin red), throughput y latencias p50/p95/p99 de
+register, login, create, get, list, update y delete. Con --url mide un servidor ya
+arrancado (los datos se siembran entonces por HTTP, más despacio).
+
+Los resultados se guardan en JSON para comparar dos ejecuciones.
+
+Uso:
+    python -m benchmarks.suite [--users 100] [--tasks 10000] [--requests 2000] [--output results.json]
+    python -m benchmarks.suite --compare antes.json despues.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+OPERATIONS = ("register", "login", "create", "get", "list", "update", "delete")
+PASSWORD = "suitepass123"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    """Resumen de una operación; latencias en segundos, resultado en ms"""
+    if not latencies:
+        return {"requests": 0, "errors": errors, "throughput_rps": 0.0}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def run_requests(client: httpx.AsyncClient, requests: List[tuple], concurrency: int) -> dict:
+    """Lanzar `requests` (método, ruta, kwargs) con `concurrency` clientes y resumir"""
+    latencies, errors = [], 0
+    pending = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        for method, path, kwargs in pending:
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            elapsed = time.perf_counter() - start
+            if response.status_code < 400:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def seed_local(users: int, tasks: int, run_id: str) -> Dict[str, List[int]]:
+    """Sembrar usuarios y tareas en los servicios del proceso; devuelve username -> ids de sus tareas"""
+    from models.task import TaskCreate
+    from models.user import UserCreate
+    from services.auth_service import auth_service_instance
+    from services.password_hasher import hash_password
+    from services.task_service import task_service_instance
+
+    hashed = hash_password(PASSWORD)  # un único bcrypt para todos los usuarios sembrados
+    owned = {}
+    per_user = max(1, tasks // max(1, users))
+    for i in range(users):
+        username = f"suite_{run_id}_{i}"
+        user = auth_service_instance.create_user(
+            UserCreate(username=username, email=f"{username}@example.com", password=PASSWORD), hashed
+        )
+        created = task_service_instance.create_tasks(
+            [TaskCreate(title=f"Tarea {j}", priority=1 + j % 5) for j in range(per_user)], user.id
+        )
+        owned[username] = [task.id for task in created]
+    return owned
+
+
+async def seed_http(client: httpx.AsyncClient, users: int, tasks: int, run_id: str) -> Dict[str, List[int]]:
+    """Sembrar por HTTP (modo --url): registro de cada usuario y creación de tareas por lotes"""
+    owned = {}
+    per_user = max(1, tasks // max(1, users))
+    for i in range(users):
+        username = f"suite_{run_id}_{i}"
+        await client.post(
+            "/api/auth/register", json={"username": username, "email": f"{username}@example.com", "password": PASSWORD}
+        )
+        headers = await auth_headers(client, username)
+        response = await client.post(
+            "/api/tasks/bulk",
+            json=[{"title": f"Tarea {j}", "priority": 1 + j % 5} for j in range(per_user)],
+            headers=headers,
+        )
+        owned[username] = [item["id"] for item in response.json()]
+    return owned
+
+
+async def auth_headers(client: httpx.AsyncClient, username: str) -> dict:
+    response = await client.post("/api/auth/login", data={"username": username, "password": PASSWORD})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run(args) -> dict:
+    run_id = f"{int(time.time())}{random.randrange(1000):03d}"
+    rng = random.Random(args.seed)
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+        owned = await seed_http(client, args.users, args.tasks, run_id)
+    else:
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://suite", timeout=60)
+        owned = seed_local(args.users, args.tasks, run_id)
+
+    results = {}
+    async with client:
+        usernames = list(owned)
+        headers = {username: await auth_headers(client, username) for username in usernames}
+
+        def task_requests(count: int, build) -> List[tuple]:
+            requests = []
+            for _ in range(count):
+                username = rng.choice(usernames)
+                requests.append(build(username, headers[username]))
+            return requests
+
+        def pick_task(username: str) -> int:
+            return rng.choice(owned[username])
+
+        auth_count = args.auth_requests
+        count = args.requests
+        plans = {
+            "register": lambda: [
+                ("POST", "/api/auth/register", {"json": {
+                    "username": f"suite_{run_id}_new_{i}", "email": f"suite_{run_id}_new_{i}@example.com",
+                    "password": PASSWORD,
+                }})
+                for i in range(auth_count)
+            ],
+            "login": lambda: [
+                ("POST", "/api/auth/login", {"data": {"username": rng.choice(usernames), "password": PASSWORD}})
+                for _ in range(auth_count)
+            ],
+            "create": lambda: task_requests(count, lambda u, h: (
+                "POST", "/api/tasks/", {"json": {"title": "Creada", "priority": 3}, "headers": h}
+            )),
+            "get": lambda: task_requests(count, lambda u, h: (
+                "GET", f"/api/tasks/{pick_task(u)}", {"headers": h}
+            )),
+            "list": lambda: task_requests(count, lambda u, h: (
+                "GET", f"/api/tasks/?limit={args.page_size}", {"headers": h}
+            )),
+            "update": lambda: task_requests(count, lambda u, h: (
+                "PUT", f"/api/tasks/{pick_task(u)}", {"json": {"status": "in_progress"}, "headers": h}
+            )),
+        }
+
+        for operation in args.operations:
+            if operation == "delete":
+                # Cada tarea se borra una sola vez
+                victims = [(u, owned[u].pop()) for u in rng.choices(usernames, k=count) if owned[u]]
+                requests = [("DELETE", f"/api/tasks/{task_id}", {"headers": headers[u]}) for u, task_id in victims]
+            else:
+                requests = plans[operation]()
+            concurrency = min(args.concurrency, max(1, len(requests)))
+            results[operation] = await run_requests(client, requests, concurrency)
+            print(format_row(operation, results[operation]), flush=True)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "mode": "http" if args.url else "asgi",
+            "url": args.url,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "commit": git_commit(),
+            "params": {
+                "users": args.users, "tasks": args.tasks, "requests": args.requests,
+                "auth_requests": args.auth_requests, "concurrency": args.concurrency,
+                "page_size": args.page_size, "seed": args.seed,
+            },
+        },
+        "results": results,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+HEADER = f"{'operación':<10} {'req':>6} {'err':>5} {'req/s':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10}"
+
+
+def format_row(operation: str, r: dict) -> str:
+    if not r["requests"]:
+        return f"{operation:<10} {0:>6} {r['errors']:>5}"
+    return (
+        f"{operation:<10} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps']:>10,.1f} "
+        f"{r['p50_ms']:>10.2f} {r['p95_ms']:>10.2f} {r['p99_ms']:>10.2f}"
+    )
+
+
+def compare(before_path: str, after_path: str) -> None:
+    """Comparar dos ficheros de resultados: variación de throughput y de p50/p99"""
+    with open(before_path) as f:
+        before = json.load(f)["results"]
+    with open(after_path) as f:
+        after = json.load(f)["results"]
+
+    def change(old: float, new: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"{'operación':<10} {'req/s':>22} {'p50 (ms)':>22} {'p99 (ms)':>22}")
+    for operation in OPERATIONS:
+        old, new = before.get(operation), after.get(operation)
+        if not old or not new or not old["requests"] or not new["requests"]:
+            continue
+        cells = []
+        for key, digits in (("throughput_rps", 1), ("p50_ms", 2), ("p99_ms", 2)):
+            cells.append(f"{old[key]:>8.{digits}f}→{new[key]:<8.{digits}f}{change(old[key], new[key]):>5}")
+        print(f"{operation:<10} " + " ".join(f"{cell:>22}" for cell in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=2_000, help="peticiones por operación de tareas")
+    # register y login pasan por bcrypt (cientos de ms por petición): se hacen menos
+    parser.add_argument("--auth-requests", type=int, default=50, help="peticiones de register y de login")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument("--url", help="medir un servidor ya arrancado en lugar de la app en proceso")
+    parser.add_argument("--output", help="fichero JSON de resultados")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DESPUES"), help="comparar dos ficheros de resultados")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    print(HEADER)
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"resultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
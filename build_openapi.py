@@ -0,0 +1,25 @@
+"""
+Generar el esquema OpenAPI al construir la imagen
+
+Con OPENAPI_SCHEMA_PATH apuntando al fichero generado, /openapi.json y /docs lo
+sirven sin generarlo en la primera petición. Hay que regenerarlo con cada cambio de
+rutas o modelos (el Dockerfile lo hace en cada build).
+
+Uso:
+    python build_openapi.py [openapi.json]
+"""
+
+import sys
+
+from main import app
+from services.startup import write_openapi
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "openapi.json"
+    write_openapi(app, path)
+    print(f"Esquema OpenAPI guardado en {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from models.user import User, UserCreate, UserLogin, Token
+from models import serializers
+from models.serializers import FastJSONResponse, user_to_dict
 from services.auth_service import AuthService
+from services.password_hasher import HasherBusyError
 from middleware.auth import get_current_active_user
+from middleware.rate_limit import limit_auth
 
 router = APIRouter()
 from services.auth_service import auth_service_instance as auth_service
 
-@router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
+# Segundos sugeridos al cliente cuando el pool de bcrypt está saturado
+HASHER_RETRY_AFTER = 1
+
+def hasher_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servidor ocupado, inténtalo de nuevo más tarde",
+        headers={"Retry-After": str(HASHER_RETRY_AFTER)},
+    )
+
+@router.post(
+    "/register", response_model=User, status_code=status.HTTP_201_CREATED, dependencies=[Depends(limit_auth)]
+)
 async def register(user: UserCreate):
     """Registrar un nuevo usuario"""
     if auth_service.get_user_by_username(user.username):
@@ -22,12 +38,28 @@ async def register(user: UserCreate):
             detail="El email ya está registrado"
         )
     
-    return auth_service.create_user(user)
+    try:
+        created = await auth_service.create_user_async(user)
+    except HasherBusyError:
+        raise hasher_busy_exception()
+    except ValueError:
+        # Otro registro concurrente tomó el username o el email mientras se hasheaba
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El nombre de usuario o el email ya están en uso"
+        )
+    
+    if serializers.FAST_SERIALIZATION:
+        return FastJSONResponse(user_to_dict(created), status_code=status.HTTP_201_CREATED)
+    return created
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(limit_auth)])
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """Iniciar sesión con form data"""
-    user = auth_service.authenticate_user(form_data.username, form_data.password)
+    try:
+        user = await auth_service.authenticate_user_async(form_data.username, form_data.password)
+    except HasherBusyError:
+        raise hasher_busy_exception()
     
     if not user:
         raise HTTPException(
@@ -39,10 +71,13 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     access_token = auth_service.create_access_token(data={"sub": user.username})
     return {"access_token": access_token, "token_type": "bearer"}
 
-@router.post("/login/json", response_model=Token)
+@router.post("/login/json", response_model=Token, dependencies=[Depends(limit_auth)])
 async def login_json(credentials: UserLogin):
     """Iniciar sesión con JSON"""
-    user = auth_service.authenticate_user(credentials.username, credentials.password)
+    try:
+        user = await auth_service.authenticate_user_async(credentials.username, credentials.password)
+    except HasherBusyError:
+        raise hasher_busy_exception()
     
     if not user:
         raise HTTPException(
@@ -57,4 +92,6 @@ async def login_json(credentials: UserLogin):
 @router.get("/me", response_model=User)
 async def get_current_user_info(current_user: User = Depends(get_current_active_user)):
     """Obtener información del usuario autenticado"""
+    if serializers.FAST_SERIALIZATION:
+        return FastJSONResponse(user_to_dict(current_user))
     return current_user
\ No newline at end of file
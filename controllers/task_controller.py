@@ -1,33 +1,274 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from models.task import Task, TaskCreate, TaskUpdate
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from datetime import datetime
+from models.task import (
+    Task, TaskBulkDelete, TaskBulkResult, TaskBulkUpdate, TaskChangeBatch, TaskCreate, TaskFilter, TaskSort, TaskStatistics,
+    TaskStatus, TaskUnarchive, TaskUpdate
+)
 from models.user import User
-from services.task_service import TaskService
+from models import serializers
+from models.serializers import FastJSONResponse, task_to_dict, tasks_to_list
+from services.task_export import ExportFormat, csv_chunks, ndjson_chunks
+from services.task_service import BULK_FORBIDDEN, BULK_NOT_FOUND, TaskService
 from middleware.auth import get_current_active_user
+from middleware.conditional import (
+    cache_headers, check_if_match, collection_etag, modified_since, none_match, not_modified, task_etag
+)
+from middleware.rate_limit import limit_tasks
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(limit_tasks)])
 from services.task_service import task_service_instance as task_service
 
+# Máximo de elementos por petición en los endpoints por lotes
+MAX_BULK_ITEMS = 10000
+# Espera máxima de un long-poll del feed de cambios y cada cuánto se envía un keepalive por SSE
+MAX_CHANGES_WAIT = 60.0
+SSE_KEEPALIVE = 15.0
+
+def check_bulk_size(items: list):
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo {MAX_BULK_ITEMS} elementos por lote"
+        )
+
+def bulk_error(task_id: int, result: str) -> TaskBulkResult:
+    if result == BULK_NOT_FOUND:
+        return TaskBulkResult(
+            id=task_id, status_code=status.HTTP_404_NOT_FOUND, detail=f"Tarea con ID {task_id} no encontrada"
+        )
+    return TaskBulkResult(
+        id=task_id, status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permiso para modificar esta tarea"
+    )
+
 @router.post("/", response_model=Task, status_code=status.HTTP_201_CREATED)
 async def create_task(
     task: TaskCreate,
     current_user: User = Depends(get_current_active_user)
 ):
     """Crear una nueva tarea"""
-    return task_service.create_task(task, current_user.id)
+    created = task_service.create_task(task, current_user.id)
+    if serializers.FAST_SERIALIZATION:
+        return FastJSONResponse(task_to_dict(created), status_code=status.HTTP_201_CREATED)
+    return created
+
+def get_task_filter(
+    status_filter: Optional[List[TaskStatus]] = Query(None, alias="status"),
+    priority_min: Optional[int] = Query(None, ge=1, le=5),
+    priority_max: Optional[int] = Query(None, ge=1, le=5),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    updated_from: Optional[datetime] = None,
+    updated_to: Optional[datetime] = None,
+    sort: TaskSort = TaskSort.ID
+) -> TaskFilter:
+    """Filtros y orden comunes a los listados de tareas"""
+    return TaskFilter(
+        status=status_filter,
+        priority_min=priority_min,
+        priority_max=priority_max,
+        created_from=created_from,
+        created_to=created_to,
+        updated_from=updated_from,
+        updated_to=updated_to,
+        sort=sort,
+    )
 
 @router.get("/", response_model=List[Task])
 async def get_all_tasks(
+    request: Request,
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de X-Next-Cursor (paginación por clave)"),
+    task_filter: TaskFilter = Depends(get_task_filter),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Obtener las tareas del usuario actual; la cabecera X-Next-Cursor apunta a la página siguiente"""
+    # La versión se lee antes que los datos: si cambian entre medias, el ETag queda viejo y la
+    # siguiente petición recibe 200, nunca un 304 con datos obsoletos
+    version = task_service.collection_version(current_user.id)
+    headers = cache_headers(collection_etag(current_user.id, version, request))
+    if none_match(request, headers["ETag"]):
+        return not_modified(headers)
+    
+    try:
+        tasks, next_cursor = task_service.get_user_tasks_page(current_user.id, limit, cursor, skip, task_filter)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        )
+    
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+    if serializers.FAST_SERIALIZATION:
+        return FastJSONResponse(tasks_to_list(tasks), headers=headers)
+    response.headers.update(headers)
+    return tasks
+
+@router.get("/export")
+async def export_tasks(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    task_filter: TaskFilter = Depends(get_task_filter),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Exportar todas las tareas del usuario en streaming (NDJSON o CSV) con memoria constante"""
+    tasks = task_service.iter_user_tasks(current_user.id, task_filter)
+    if export_format == ExportFormat.CSV:
+        body, media_type = csv_chunks(tasks), "text/csv; charset=utf-8"
+    else:
+        body, media_type = ndjson_chunks(tasks), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="tasks.{export_format.value}"'},
+    )
+
+@router.get("/search", response_model=List[Task])
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200, description="Palabras a buscar en título y descripción"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Buscar tareas del usuario por palabras (sin distinguir tildes ni mayúsculas, por prefijo), por relevancia"""
+    tasks = task_service.search_tasks(current_user.id, q, limit)
+    if serializers.FAST_SERIALIZATION:
+        return FastJSONResponse(tasks_to_list(tasks))
+    return tasks
+
+@router.get("/stats", response_model=TaskStatistics)
+async def get_task_stats(
+    days: int = Query(30, ge=1, le=366, description="Días de la serie diaria, terminando hoy"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Recuento de tareas por estado, por prioridad y por ambos, y tasa de completadas por día de updated_at"""
+    return task_service.get_task_stats(current_user.id, days)
+
+@router.get("/archive", response_model=List[Task])
+async def get_archived_tasks(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de X-Next-Cursor"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Tareas completadas archivadas del usuario, en orden de archivo; X-Next-Cursor apunta a la página siguiente"""
+    try:
+        tasks, next_cursor = task_service.get_archived_tasks_page(current_user.id, limit, cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        )
+    
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else {}
+    if serializers.FAST_SERIALIZATION:
+        return FastJSONResponse(tasks_to_list(tasks), headers=headers)
+    response.headers.update(headers)
+    return tasks
+
+@router.post("/archive/unarchive", response_model=List[TaskBulkResult], response_model_exclude_none=True)
+async def unarchive_tasks(
+    batch: TaskUnarchive,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Devolver tareas archivadas al listado; cada elemento indica su propio resultado"""
+    check_bulk_size(batch.ids)
+    return [
+        TaskBulkResult(id=task_id, status_code=status.HTTP_200_OK, task=task) if task is not None
+        else bulk_error(task_id, result)
+        for task_id, result, task in task_service.unarchive_tasks(batch.ids, current_user.id)
+    ]
+
+@router.get("/changes", response_model=TaskChangeBatch)
+async def get_task_changes(
+    since: Optional[int] = Query(None, description="Último `seq` recibido; sin él se devuelve solo la posición actual"),
+    timeout: float = Query(0, ge=0, le=MAX_CHANGES_WAIT, description="Segundos de espera si no hay cambios (long-poll)"),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Cambios de las tareas del usuario posteriores a `since`; con `resync` hay que releer el listado"""
+    batch = await task_service.changes.wait(current_user.id, since, timeout, limit)
+    return FastJSONResponse(batch.to_dict())
+
+def sse_event(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+@router.get("/changes/stream")
+async def stream_task_changes(
+    request: Request,
+    since: Optional[int] = Query(None, description="Último `seq` recibido (o la cabecera Last-Event-ID)"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Server-Sent Events con cada cambio de las tareas del usuario; un evento `resync` cierra el stream"""
+    last_event_id = request.headers.get("last-event-id", "")
+    if since is None and last_event_id.isdigit():
+        since = int(last_event_id)
+    feed, user_id = task_service.changes, current_user.id
+    
+    async def events():
+        position = since if since is not None else feed.read(user_id, None).next_since
+        while True:
+            # Se lee del buffer compartido: un cliente lento no acumula nada, se queda atrás y recibe resync
+            batch = await feed.wait(user_id, position, SSE_KEEPALIVE)
+            if batch.resync:
+                yield sse_event("resync", {"next_since": batch.next_since})
+                return
+            if not batch.changes:
+                yield ": keepalive\n\n"
+            for change in batch.changes:
+                yield sse_event(change.type.value, change.to_dict(), change.seq)
+            position = batch.next_since
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@router.post(
+    "/bulk", response_model=List[TaskBulkResult], response_model_exclude_none=True, status_code=status.HTTP_201_CREATED
+)
+async def create_tasks_bulk(
+    tasks: List[TaskCreate],
+    current_user: User = Depends(get_current_active_user)
+):
+    """Crear varias tareas en una sola petición; se devuelve el id asignado a cada una, en orden"""
+    check_bulk_size(tasks)
+    created = task_service.create_tasks(tasks, current_user.id)
+    # Diccionarios en lugar de modelos: FastAPI valida y serializa la lista de una vez
+    return [{"id": task.id, "status_code": status.HTTP_201_CREATED} for task in created]
+
+@router.patch("/bulk", response_model=List[TaskBulkResult])
+async def update_tasks_bulk(
+    updates: List[TaskBulkUpdate],
     current_user: User = Depends(get_current_active_user)
 ):
-    """Obtener todas las tareas del usuario actual"""
-    return task_service.get_user_tasks(current_user.id, skip, limit)
+    """Actualizar varias tareas; cada elemento indica su propio resultado"""
+    check_bulk_size(updates)
+    return [
+        TaskBulkResult(id=task_id, status_code=status.HTTP_200_OK, task=task) if task is not None
+        else bulk_error(task_id, result)
+        for task_id, result, task in task_service.update_tasks(updates, current_user.id)
+    ]
+
+@router.delete("/bulk", response_model=List[TaskBulkResult])
+async def delete_tasks_bulk(
+    batch: TaskBulkDelete,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Eliminar varias tareas; cada elemento indica su propio resultado"""
+    check_bulk_size(batch.ids)
+    return [
+        bulk_error(task_id, result) if result in (BULK_NOT_FOUND, BULK_FORBIDDEN)
+        else TaskBulkResult(id=task_id, status_code=status.HTTP_204_NO_CONTENT)
+        for task_id, result in task_service.delete_tasks(batch.ids, current_user.id)
+    ]
 
 @router.get("/{task_id}", response_model=Task)
 async def get_task(
     task_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener una tarea específica por su ID"""
@@ -45,15 +286,25 @@ async def get_task(
             detail="No tienes permiso para acceder a esta tarea"
         )
     
+    etag = task_etag(task)
+    headers = cache_headers(etag, task.updated_at)
+    if none_match(request, etag) or not modified_since(request, task.updated_at):
+        return not_modified(headers)
+    
+    if serializers.FAST_SERIALIZATION:
+        return FastJSONResponse(task_to_dict(task), headers=headers)
+    response.headers.update(headers)
     return task
 
 @router.put("/{task_id}", response_model=Task)
 async def update_task(
     task_id: int,
     task_update: TaskUpdate,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user)
 ):
-    """Actualizar una tarea existente"""
+    """Actualizar una tarea existente; con If-Match solo si no ha cambiado desde que se leyó"""
     task = task_service.get_task_by_id(task_id)
     
     if task is None:
@@ -68,14 +319,26 @@ async def update_task(
             detail="No tienes permiso para modificar esta tarea"
         )
     
-    return task_service.update_task(task_id, task_update)
+    # La comparación con If-Match se hace junto a la escritura: nada puede cambiar la tarea entre medias
+    updated = task_service.update_task(task_id, task_update, lambda current: check_if_match(request, current))
+    if updated is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tarea con ID {task_id} no encontrada"
+        )
+    headers = cache_headers(task_etag(updated), updated.updated_at)
+    if serializers.FAST_SERIALIZATION:
+        return FastJSONResponse(task_to_dict(updated), headers=headers)
+    response.headers.update(headers)
+    return updated
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(
     task_id: int,
+    request: Request,
     current_user: User = Depends(get_current_active_user)
 ):
-    """Eliminar una tarea"""
+    """Eliminar una tarea; con If-Match solo si no ha cambiado desde que se leyó"""
     task = task_service.get_task_by_id(task_id)
     
     if task is None:
@@ -90,5 +353,9 @@ async def delete_task(
             detail="No tienes permiso para eliminar esta tarea"
         )
     
-    task_service.delete_task(task_id)
+    if not task_service.delete_task(task_id, lambda current: check_if_match(request, current)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tarea con ID {task_id} no encontrada"
+        )
     return None
\ No newline at end of file
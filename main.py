@@ -4,26 +4,149 @@ Arquitectura: MVC (Model-View-Controller)
 Framework: FastAPI
 """
 
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from controllers.task_controller import router as task_router
 from controllers.auth_controller import router as auth_router
+from middleware.admission import AdmissionControlMiddleware
+from middleware.compression import CompressionMiddleware
+from middleware.metrics import MetricsMiddleware
+from services.auth_service import auth_service_instance
+from services.metrics import metrics_registry
+from services.maintenance import SWEEP_BATCH_SIZE, archive_completed, purge_inactive_users
+from services.persistence import Persistence
+from services.scheduler import Scheduler
+from services.sqlite_store import StorageBusyError
+from services.startup import STARTUP_MODES, use_prebuilt_openapi, warm_up
+from services.storage import configure_storage
+from services.task_service import task_service_instance
+
+# Almacenamiento: "memory" (por defecto) o "sqlite" para compartir datos entre workers
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "tasks.db")
+# Con el backend en memoria: directorio del snapshot y del WAL (vacío = sin persistencia)
+DATA_DIR = os.getenv("DATA_DIR", "")
+SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", "300"))
+# Peticiones en curso por proceso antes de responder 503 (0 = sin límite)
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", "256"))
+# Compresión de respuestas (gzip, y br con el paquete brotli): tamaño mínimo, presupuesto de CPU
+# por respuesta y caché de cuerpos comprimidos
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") == "1"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+COMPRESSION_CPU_BUDGET_MS = float(os.getenv("COMPRESSION_CPU_BUDGET_MS", "5"))
+COMPRESSION_CACHE_MB = float(os.getenv("COMPRESSION_CACHE_MB", "16"))
+
+# "eager": JWT, bcrypt y OpenAPI se cargan en el lifespan; "lazy": en el primer uso (arranque en frío más rápido)
+STARTUP_MODE = os.getenv("STARTUP_MODE", "eager")
+if STARTUP_MODE not in STARTUP_MODES:
+    raise RuntimeError(f"STARTUP_MODE desconocido: {STARTUP_MODE}")
+# Esquema OpenAPI generado al construir la imagen (build_openapi.py); vacío = generarlo en la primera petición
+OPENAPI_SCHEMA_PATH = os.getenv("OPENAPI_SCHEMA_PATH", "")
+
+# Trabajos en segundo plano: cuántos a la vez, milisegundos seguidos que un barrido ocupa el event loop
+# y segundos que se espera a los que están en curso al apagar
+SCHEDULER_CONCURRENCY = int(os.getenv("SCHEDULER_CONCURRENCY", "2"))
+SCHEDULER_SLICE_MS = float(os.getenv("SCHEDULER_SLICE_MS", "2"))
+SCHEDULER_SHUTDOWN_TIMEOUT = float(os.getenv("SCHEDULER_SHUTDOWN_TIMEOUT", "10"))
+SWEEP_BATCH = int(os.getenv("SWEEP_BATCH", str(SWEEP_BATCH_SIZE)))
+# Segundos entre borrados de las tareas de usuarios desactivados (0 = no se borran)
+PURGE_INACTIVE_INTERVAL = float(os.getenv("PURGE_INACTIVE_INTERVAL", "0"))
+# Días sin cambios tras los que una tarea completada pasa al archivo (0 = no se archiva, por defecto) y segundos
+# entre barridos. Las archivadas dejan de salir en GET por id, listados, búsqueda y exportación
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "0"))
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", "3600"))
+
+# Workers de uvicorn (serve.py lo exporta; `uvicorn --workers` no): el backend en memoria no se comparte
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+if WEB_CONCURRENCY > 1 and STORAGE_BACKEND == "memory":
+    raise RuntimeError("STORAGE_BACKEND=memory con varios workers: usa STORAGE_BACKEND=sqlite (ver serve.py)")
+
+storage = configure_storage(STORAGE_BACKEND, SQLITE_PATH, DATA_DIR)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if STARTUP_MODE == "eager":
+        warm_up(app)
+    scheduler = app.state.scheduler = Scheduler(SCHEDULER_CONCURRENCY, SCHEDULER_SLICE_MS / 1000)
+    if isinstance(storage, Persistence):
+        scheduler.every("snapshot", SNAPSHOT_INTERVAL, storage.snapshot_if_changed)
+    if PURGE_INACTIVE_INTERVAL > 0:
+        scheduler.every("purge_inactive_users", PURGE_INACTIVE_INTERVAL, lambda: scheduler.sweep(
+            "purge_inactive_users",
+            purge_inactive_users(task_service_instance, auth_service_instance.users, SWEEP_BATCH),
+        ))
+    if task_service_instance.archive is not None and ARCHIVE_AFTER_DAYS > 0:
+        # Cada lote se escribe en el archivo con fsync: en un hilo, fuera del event loop
+        scheduler.every("archive_completed", ARCHIVE_INTERVAL, lambda: scheduler.sweep_in_thread(
+            "archive_completed",
+            archive_completed(task_service_instance, datetime.now() - timedelta(days=ARCHIVE_AFTER_DAYS), SWEEP_BATCH),
+        ), delay=0)
+    scheduler.start()
+    yield
+    await scheduler.shutdown(SCHEDULER_SHUTDOWN_TIMEOUT)
+    if isinstance(storage, Persistence):
+        # Snapshot final: el siguiente arranque no tiene que reaplicar el WAL
+        await storage.snapshot_async()
+    if task_service_instance.archive is not None:
+        task_service_instance.archive.close()
+    # Liberar el pool de bcrypt y las conexiones al apagar
+    auth_service_instance.hasher.shutdown()
+    if storage is not None:
+        storage.close()
 
 app = FastAPI(
     title="Task Management API",
     description="API RESTful para gestión de tareas con autenticación JWT",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+if OPENAPI_SCHEMA_PATH:
+    use_prebuilt_openapi(app, OPENAPI_SCHEMA_PATH)
+
+@app.exception_handler(StorageBusyError)
+async def storage_busy_handler(request, exc):
+    """SQLite sigue bloqueado por otro worker tras SQLITE_BUSY_TIMEOUT_MS: 503 en lugar de esperar en el event loop"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Almacenamiento ocupado, inténtalo de nuevo más tarde"},
+        headers={"Retry-After": "1"},
+    )
+
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MIN_SIZE,
+        gzip_level=COMPRESSION_LEVEL,
+        cpu_budget=COMPRESSION_CPU_BUDGET_MS / 1000,
+        cache_bytes=int(COMPRESSION_CACHE_MB * 2**20),
+    )
+
+if MAX_IN_FLIGHT > 0:
+    app.add_middleware(AdmissionControlMiddleware, max_in_flight=MAX_IN_FLIGHT)
+
 # Configuración de CORS
+# Por fuera de AdmissionControlMiddleware: sus 503 también llevan las cabeceras CORS y el
+# navegador los entrega como 503 legibles (con Retry-After) en lugar de un error CORS opaco
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After"],
 )
 
+# Latencia por ruta, peticiones en curso y códigos de estado (METRICS_ENABLED=0 para desactivar)
+# Se añade después para quedar por fuera y contar también los 503 de AdmissionControlMiddleware
+if metrics_registry.enabled:
+    app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+
 # Registrar routers (Controllers)
 app.include_router(auth_router, prefix="/api/auth", tags=["Autenticación"])
 app.include_router(task_router, prefix="/api/tasks", tags=["Tareas"])
@@ -40,6 +163,11 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Métricas en formato de texto de Prometheus"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
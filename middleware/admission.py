@@ -0,0 +1,48 @@
+import json
+
+# Rutas que siempre se atienden: sondas de salud, scraping de métricas y las esperas del feed
+# de cambios, que mientras esperan no consumen CPU (solo un future de asyncio)
+EXEMPT_PATHS = ("/health", "/metrics", "/api/tasks/changes", "/api/tasks/changes/stream")
+RETRY_AFTER = 1
+
+
+class AdmissionControlMiddleware:
+    """
+    Middleware ASGI que limita las peticiones en curso del proceso.
+
+    Por encima de `max_in_flight` responde 503 con Retry-After al momento, en lugar de
+    aceptar más trabajo del que el event loop puede atender y que la latencia de todas
+    las peticiones se dispare.
+    """
+
+    def __init__(self, app, max_in_flight: int = 256):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.rejected = 0
+        self._body = json.dumps({"detail": "Servidor saturado, inténtalo de nuevo más tarde"}).encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if self.in_flight >= self.max_in_flight:
+            self.rejected += 1
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(self._body)).encode()),
+                    (b"retry-after", str(RETRY_AFTER).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": self._body})
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -5,7 +5,9 @@ from models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 from services.auth_service import auth_service_instance as auth_service
+from services.metrics import metrics_registry
 
+@metrics_registry.timed("get_current_user")
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -13,17 +15,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    username = auth_service.decode_token(token)
-    
-    if username is None:
-        raise credentials_exception
-    
-    user = auth_service.get_user_by_username(username)
+    user = auth_service.get_user_from_token(token)
     
     if user is None:
         raise credentials_exception
     
-    return User(**{k: v for k, v in user.items() if k != "hashed_password"})
+    return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     if not current_user.is_active:
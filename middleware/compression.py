@@ -0,0 +1,334 @@
+"""
+Compresión de respuestas: gzip y, si está instalado el paquete `brotli`, br.
+
+Solo se comprimen los tipos de contenido de la lista (JSON, NDJSON, CSV, texto) y los
+cuerpos de al menos `minimum_size` bytes: por debajo, las cabeceras de gzip y la CPU
+no compensan. Los streams (exportaciones) se comprimen trozo a trozo con el nivel
+rápido, vaciando el compresor en cada trozo para que el cliente los reciba según salen;
+text/event-stream no está en la lista, porque el feed de cambios no puede esperar a
+llenar un bloque.
+
+La compresión se hace en el hilo del event loop, así que cada respuesta tiene un
+presupuesto de CPU: con el rendimiento medido de cada nivel (bytes/s) se estima cuánto
+costaría comprimir el cuerpo; si no cabe con el nivel configurado se usa el rápido, y si
+tampoco cabe se envía sin comprimir.
+
+Los cuerpos comprimidos de respuestas con ETag (listados y tareas, que se consultan
+una y otra vez mientras no cambian) se guardan en una caché LRU por huella del cuerpo:
+un sondeo que recibe la misma colección no vuelve a comprimirla.
+"""
+
+import hashlib
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional; sin él solo se ofrece gzip
+    brotli = None
+
+DEFAULT_CONTENT_TYPES = ("application/json", "application/x-ndjson", "text/csv", "text/plain", "text/html")
+DEFAULT_MINIMUM_SIZE = 1024
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 4
+# Nivel de respaldo cuando el configurado no cabe en el presupuesto, y el de los streams
+FAST_LEVEL = 1
+# Rendimiento (bytes/s) supuesto de cada (codificación, nivel) hasta que se mide; conservador
+INITIAL_THROUGHPUT = 20 * 2**20
+# Cuerpos más pequeños no se usan para medir: el coste fijo de cada llamada falsea el rendimiento
+MEASURE_MIN_SIZE = 16 * 1024
+# Peso de cada medida nueva en la media móvil del rendimiento
+THROUGHPUT_ALPHA = 0.2
+GZIP_WBITS = 31
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Codificaciones soportadas, por orden de preferencia del servidor"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str, encodings: Sequence[str]) -> Optional[str]:
+    """Codificación de `encodings` preferida por Accept-Encoding (q-values; empate: orden del servidor)"""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+    best, best_weight = None, 0.0
+    for coding in encodings:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(encoding: str, body: bytes, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return zlib.compress(body, level, wbits=GZIP_WBITS)
+
+
+class _StreamCompressor:
+    """Compresor incremental que vacía su salida en cada trozo"""
+
+    def __init__(self, encoding: str, level: int):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+            self._compress = self._compressor.process
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+            self._compress = self._compressor.compress
+        self.encoding = encoding
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compress(data) + self._compressor.flush()
+        return self._compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class CompressedBodyCache:
+    """Caché LRU de cuerpos comprimidos por (codificación, huella del cuerpo), acotada en bytes"""
+
+    def __init__(self, max_bytes: int = 16 * 2**20):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(encoding: str, body: bytes) -> tuple:
+        return encoding, len(body), hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: tuple, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self._entries[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI que comprime las respuestas según Accept-Encoding.
+
+    `cpu_budget` son los segundos de CPU que puede costar comprimir una respuesta
+    (0 = sin límite) y `cache_bytes` el tamaño de la caché de cuerpos comprimidos
+    (0 = sin caché).
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = DEFAULT_MINIMUM_SIZE,
+        gzip_level: int = DEFAULT_GZIP_LEVEL,
+        brotli_quality: int = DEFAULT_BROTLI_QUALITY,
+        content_types: Sequence[str] = DEFAULT_CONTENT_TYPES,
+        cpu_budget: float = 0.005,
+        cache_bytes: int = 16 * 2**20,
+        encodings: Optional[Sequence[str]] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality}
+        self.content_types = frozenset(content_types)
+        self.cpu_budget = cpu_budget
+        self.cache = CompressedBodyCache(cache_bytes) if cache_bytes > 0 else None
+        self.encodings = tuple(encodings) if encodings is not None else available_encodings()
+        self.throughput: Dict[Tuple[str, int], float] = {}
+        self.compressed = 0
+        self.over_budget = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _Responder(self, encoding, send).send)
+
+    def eligible(self, headers: Headers) -> bool:
+        """Tipo de contenido de la lista, sin codificar ya y sin Cache-Control: no-transform"""
+        content_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+        return (
+            content_type in self.content_types
+            and "content-encoding" not in headers
+            and "no-transform" not in headers.get("cache-control", "").lower()
+        )
+
+    def choose_level(self, encoding: str, size: int) -> Optional[int]:
+        """Nivel cuya compresión estimada cabe en el presupuesto de CPU, o None si ninguno"""
+        level = self.levels[encoding]
+        if not self.cpu_budget:
+            return level
+        for candidate in (level, FAST_LEVEL):
+            if size / self.throughput.get((encoding, candidate), INITIAL_THROUGHPUT) <= self.cpu_budget:
+                return candidate
+        return None
+
+    def compress_body(self, encoding: str, body: bytes, cacheable: bool) -> Optional[bytes]:
+        """Cuerpo comprimido (de la caché si está), o None si no cabe en el presupuesto de CPU"""
+        key = None
+        if cacheable and self.cache is not None:
+            key = self.cache.key(encoding, body)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        level = self.choose_level(encoding, len(body))
+        if level is None:
+            self.over_budget += 1
+            return None
+        start = time.perf_counter()
+        compressed = compress(encoding, body, level)
+        self.measure(encoding, level, len(body), time.perf_counter() - start)
+        if key is not None:
+            self.cache.put(key, compressed)
+        return compressed
+
+    def measure(self, encoding: str, level: int, size: int, seconds: float) -> None:
+        if size < MEASURE_MIN_SIZE or seconds <= 0:
+            return
+        observed = size / seconds
+        previous = self.throughput.get((encoding, level))
+        self.throughput[(encoding, level)] = (
+            observed if previous is None else previous + THROUGHPUT_ALPHA * (observed - previous)
+        )
+
+    def stats(self) -> dict:
+        return {
+            "compressed": self.compressed,
+            "over_budget": self.over_budget,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "cache_hits": self.cache.hits if self.cache is not None else 0,
+            "cache_misses": self.cache.misses if self.cache is not None else 0,
+        }
+
+
+class _Responder:
+    """Estado de una respuesta: retiene el inicio hasta ver el primer trozo del cuerpo"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start = None
+        self.passthrough = False
+        self.stream: Optional[_StreamCompressor] = None
+
+    async def send(self, message):
+        if self.passthrough:
+            await self._send(message)
+            return
+        if message["type"] == "http.response.start":
+            await self.response_start(message)
+        elif message["type"] == "http.response.body":
+            if self.stream is not None:
+                await self.stream_body(message)
+            else:
+                await self.first_body(message)
+        else:
+            await self._send(message)
+
+    async def response_start(self, message):
+        headers = Headers(raw=message["headers"])
+        status_code = message["status"]
+        if status_code < 200 or status_code in (204, 304) or not self.middleware.eligible(headers):
+            self.passthrough = True
+            await self._send(message)
+            return
+        MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+        length = headers.get("content-length")
+        if length is not None and length.isdigit() and int(length) < self.middleware.minimum_size:
+            self.passthrough = True
+            await self._send(message)
+            return
+        self.start = message
+
+    async def first_body(self, message):
+        middleware = self.middleware
+        body = message.get("body", b"")
+        headers = MutableHeaders(raw=self.start["headers"])
+
+        if message.get("more_body", False):
+            # Stream: se comprime con el nivel rápido según llegan los trozos
+            self.stream = _StreamCompressor(self.encoding, FAST_LEVEL)
+            self._set_encoding(headers)
+            del headers["content-length"]
+            await self._send(self.start)
+            await self.stream_body(message)
+            return
+
+        self.passthrough = True
+        compressed = None
+        if len(body) >= middleware.minimum_size:
+            compressed = middleware.compress_body(self.encoding, body, "etag" in headers)
+        if compressed is None:
+            await self._send(self.start)
+            await self._send(message)
+            return
+        middleware.compressed += 1
+        middleware.bytes_in += len(body)
+        middleware.bytes_out += len(compressed)
+        self._set_encoding(headers)
+        headers["content-length"] = str(len(compressed))
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": compressed})
+
+    async def stream_body(self, message):
+        middleware = self.middleware
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        data = self.stream.chunk(body) if body else b""
+        if not more_body:
+            data += self.stream.finish()
+            middleware.compressed += 1
+        middleware.bytes_in += len(body)
+        middleware.bytes_out += len(data)
+        if data or not more_body:
+            await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    def _set_encoding(self, headers: MutableHeaders) -> None:
+        # El ETag se deja tal cual: identifica la versión de la tarea, no los bytes, y Vary:
+        # Accept-Encoding ya separa las representaciones en las cachés. Pasarlo a débil haría
+        # que el If-Match de un cliente que lo leyó comprimido fallara siempre con 412
+        headers["content-encoding"] = self.encoding
@@ -0,0 +1,85 @@
+import zlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Optional
+from fastapi import HTTPException, Request, Response, status
+from models.task import Task
+from services.task_record import epoch_us
+
+# Datos por usuario: solo cachés privadas, y siempre revalidando con ETag
+CACHE_CONTROL = "private, no-cache"
+
+
+def task_etag(task: Task) -> str:
+    """ETag fuerte de una tarea: cambia con cada modificación porque se bumpea updated_at"""
+    return f'"{task.id}-{epoch_us(task.updated_at)}"'
+
+
+def collection_etag(user_id: int, version: str, request: Request) -> str:
+    """
+    ETag débil de un listado: usuario, versión de su colección y query (página, filtros, orden).
+    Las versiones son por usuario: sin el id, dos cuentas en el mismo cliente podrían compartir ETag.
+    """
+    return f'W/"{user_id}-{version}-{zlib.crc32(request.url.query.encode()):08x}"'
+
+
+def http_date(value: datetime) -> str:
+    """Fecha HTTP (RFC 7231) de una fecha local naive"""
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def parse_etags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def none_match(request: Request, etag: str) -> bool:
+    """If-None-Match coincide con `etag` (comparación débil): el cliente ya tiene esta versión"""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    return header.strip() == "*" or _opaque(etag) in (_opaque(tag) for tag in parse_etags(header))
+
+
+def modified_since(request: Request, last_modified: datetime) -> bool:
+    """Falso si If-Modified-Since es posterior a `last_modified`; If-None-Match tiene prioridad"""
+    header = request.headers.get("if-modified-since")
+    if header is None or "if-none-match" in request.headers:
+        return True
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return True
+    if since.tzinfo is None:
+        return True
+    # Last-Modified tiene resolución de segundos
+    return last_modified.astimezone(timezone.utc).replace(microsecond=0) > since
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified(headers: dict) -> Response:
+    """Respuesta 304 sin cuerpo: no se serializa nada"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+def check_if_match(request: Request, task: Task) -> None:
+    """Lanza 412 si If-Match no coincide con la versión actual de la tarea (comparación fuerte)"""
+    header = request.headers.get("if-match")
+    if header is None or header.strip() == "*":
+        return
+    etag = task_etag(task)
+    if etag not in (tag for tag in parse_etags(header) if not tag.startswith("W/")):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="La tarea ha cambiado desde que se leyó",
+            headers={"ETag": etag},
+        )
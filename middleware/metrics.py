@@ -0,0 +1,57 @@
+import time
+from typing import Dict, Tuple
+from services.metrics import Histogram, MetricsRegistry
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide la latencia, las peticiones en curso y los códigos de estado por ruta.
+    La ruta es la plantilla (p. ej. /api/tasks/{task_id}), no la URL, para acotar las etiquetas.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+        # (método, endpoint) -> (histograma, método, plantilla de la ruta)
+        self._routes: Dict[tuple, Tuple[Histogram, str, str]] = {}
+
+    async def __call__(self, scope, receive, send):
+        registry = self.registry
+        if scope["type"] != "http" or not registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        registry.in_flight.value += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            registry.in_flight.value -= 1
+            key = (scope["method"], scope.get("endpoint"))
+            entry = self._routes.get(key)
+            if entry is None:
+                method, route = key[0], self._route(scope)
+                entry = self._routes[key] = (registry.request_duration.labels(method, route), method, route)
+            histogram, method, route = entry
+            histogram.observe(duration)
+            registry.requests.inc(method, route, status_code)
+
+    def _route(self, scope) -> str:
+        """Plantilla de la ruta que atendió la petición (el router deja el endpoint en el scope)"""
+        endpoint = scope.get("endpoint")
+        if endpoint is not None:
+            for candidate in scope["app"].routes:
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    return candidate.path
+        return UNMATCHED_ROUTE
@@ -0,0 +1,46 @@
+import math
+from fastapi import Depends, HTTPException, Request, status
+from models.user import User
+from middleware.auth import get_current_active_user
+from services.rate_limiter import rate_limiter_instance as rate_limiter
+
+# En los listados cada LIST_COST_UNIT tareas pedidas (parámetro limit) cuestan una ficha más
+LIST_COST_UNIT = 100
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def check_rate(route: str, key: str, cost: float = 1) -> None:
+    retry_after = rate_limiter.acquire(route, key, cost)
+    if retry_after == math.inf:
+        # Más cara que la ráfaga entera: reintentarla no sirve, hay que pedir menos
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="La petición supera el límite de peticiones; reduce el parámetro limit",
+        )
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiadas peticiones, inténtalo de nuevo más tarde",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+def task_request_cost(request: Request) -> float:
+    """Fichas que cuesta una petición de tareas: los listados grandes cuestan más"""
+    limit = request.query_params.get("limit")
+    if request.method == "GET" and limit is not None and limit.isdigit():
+        return 1 + int(limit) // LIST_COST_UNIT
+    return 1
+
+
+async def limit_auth(request: Request) -> None:
+    """Límite por IP de las rutas anónimas de autenticación"""
+    check_rate("auth", client_ip(request))
+
+
+async def limit_tasks(request: Request, current_user: User = Depends(get_current_active_user)) -> None:
+    """Límite por usuario de las rutas de tareas"""
+    check_rate("tasks", str(current_user.id), task_request_cost(request))
@@ -0,0 +1,74 @@
+"""
+Serialización rápida (opcional) de Task y User.
+
+Con FAST_SERIALIZATION=1 los controladores devuelven directamente FastJSONResponse
+con los diccionarios generados aquí, en lugar de pasar por el response_model de
+FastAPI, que vuelve a validar y codificar con jsonable_encoder objetos que el
+servicio ya garantiza válidos. La salida JSON es idéntica a la de pydantic.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Iterable, List
+
+from fastapi.responses import Response
+
+from models.task import Task
+from models.user import User
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin él se usa json de la librería estándar
+    orjson = None
+
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "0") == "1"
+
+
+def iso_datetime(value: datetime) -> str:
+    """Fecha en el mismo formato que pydantic (UTC como "Z")"""
+    text = value.isoformat()
+    if text.endswith("+00:00"):
+        return text[:-6] + "Z"
+    return text
+
+
+def task_to_dict(task: Task) -> dict:
+    """Diccionario JSON de una tarea, en el orden de campos de Task"""
+    return {
+        "title": task.title,
+        "description": task.description,
+        "status": task.status.value,
+        "priority": task.priority,
+        "id": task.id,
+        "user_id": task.user_id,
+        "created_at": iso_datetime(task.created_at),
+        "updated_at": iso_datetime(task.updated_at),
+    }
+
+
+def tasks_to_list(tasks: Iterable[Task]) -> List[dict]:
+    return [task_to_dict(task) for task in tasks]
+
+
+def user_to_dict(user: User) -> dict:
+    """Diccionario JSON de un usuario, en el orden de campos de User"""
+    return {
+        "username": user.username,
+        "email": user.email,
+        "full_name": user.full_name,
+        "id": user.id,
+        "is_active": user.is_active,
+        "created_at": iso_datetime(user.created_at),
+    }
+
+
+class FastJSONResponse(Response):
+    """Respuesta JSON codificada con orjson (o json compacto si no está instalado)"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
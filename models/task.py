@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
-from datetime import datetime
+from typing import Dict, List, Optional
+from datetime import date, datetime
 from enum import Enum
 
 class TaskStatus(str, Enum):
@@ -29,4 +29,79 @@ class Task(TaskBase):
     created_at: datetime
     updated_at: datetime
     # Pydantic v2: usar model_config en lugar de class Config
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class TaskSort(str, Enum):
+    ID = "id"
+    ID_DESC = "-id"
+    PRIORITY = "priority"
+    PRIORITY_DESC = "-priority"
+    UPDATED_AT = "updated_at"
+    UPDATED_AT_DESC = "-updated_at"
+
+class TaskFilter(BaseModel):
+    """Filtros y orden para listar tareas (las fechas son inclusivas)"""
+    status: Optional[List[TaskStatus]] = None
+    priority_min: Optional[int] = Field(None, ge=1, le=5)
+    priority_max: Optional[int] = Field(None, ge=1, le=5)
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    updated_from: Optional[datetime] = None
+    updated_to: Optional[datetime] = None
+    sort: TaskSort = TaskSort.ID
+
+class TaskBulkUpdate(TaskUpdate):
+    """Actualización de una tarea dentro de un lote"""
+    id: int
+
+class TaskBulkDelete(BaseModel):
+    """Lote de ids de tareas a eliminar"""
+    ids: List[int]
+
+class TaskUnarchive(BaseModel):
+    """Lote de ids de tareas archivadas que vuelven al listado"""
+    ids: List[int]
+
+class TaskBulkResult(BaseModel):
+    """Resultado de una operación de un lote"""
+    id: Optional[int] = None
+    status_code: int
+    task: Optional[Task] = None
+    detail: Optional[str] = None
+
+class TaskChangeType(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    # La tarea pasa al archivo (GET /api/tasks/archive) o vuelve de él
+    ARCHIVED = "archived"
+    UNARCHIVED = "unarchived"
+
+class TaskChange(BaseModel):
+    """Cambio de una tarea en el feed de cambios; `task` es None en los borrados y al archivarla"""
+    seq: int
+    type: TaskChangeType
+    task_id: int
+    task: Optional[Task] = None
+
+class TaskChangeBatch(BaseModel):
+    """Cambios posteriores a `since`; con `resync` hay que volver a leer el listado completo"""
+    changes: List[TaskChange]
+    next_since: int
+    resync: bool = False
+
+class TaskDailyStatistics(BaseModel):
+    """Tareas cuya última actualización fue ese día y cuántas de ellas están completadas"""
+    day: date
+    updated: int
+    completed: int
+    completion_rate: float
+
+class TaskStatistics(BaseModel):
+    """Recuentos de las tareas del usuario; las prioridades van como claves de texto ("1".."5")"""
+    total: int
+    by_status: Dict[TaskStatus, int]
+    by_priority: Dict[str, int]
+    by_status_priority: Dict[TaskStatus, Dict[str, int]]
+    completion_rate: float
+    daily: List[TaskDailyStatistics]
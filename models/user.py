@@ -62,6 +62,12 @@ class UserLogin(BaseModel):
     username: str
     password: str
 
+class UserUpdate(BaseModel):
+    """Schema para actualizar un usuario"""
+    username: Optional[str] = Field(None, min_length=3, max_length=50)
+    email: Optional[EmailStr] = None
+    full_name: Optional[str] = Field(None, max_length=100)
+
 class User(UserBase):
     """Schema completo de un usuario"""
     id: int
@@ -0,0 +1,64 @@
+"""
+Punto de entrada de producción: uvicorn con N workers
+
+Varios procesos solo comparten datos con STORAGE_BACKEND=sqlite (ids reservados en
+transacciones, un fichero común). Con más de un worker y sin STORAGE_BACKEND se usa
+SQLite; con STORAGE_BACKEND=memory explícito se rechaza, porque cada worker tendría
+sus propias tareas y usuarios.
+
+Por defecto se arranca un solo worker. Varios workers son opcionales (WORKERS o
+WEB_CONCURRENCY): el feed de cambios, el límite de peticiones, la caché de compresión
+y la caché de tokens son de cada proceso, así que con más de uno cada worker solo ve
+lo que atiende él.
+
+Uso:
+    WORKERS=4 SQLITE_PATH=/data/tasks.db python serve.py
+"""
+
+import os
+from typing import Dict, MutableMapping
+
+import uvicorn
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8000
+
+
+def resolve_settings(env: MutableMapping[str, str]) -> Dict[str, object]:
+    """Número de workers y backend a partir del entorno; lanza ValueError si la combinación no es válida"""
+    workers = int(env.get("WORKERS") or env.get("WEB_CONCURRENCY") or 1)
+    if workers < 1:
+        raise ValueError("WORKERS debe ser al menos 1")
+    backend = env.get("STORAGE_BACKEND") or ("sqlite" if workers > 1 else "memory")
+    if backend == "memory" and workers > 1:
+        raise ValueError(
+            "STORAGE_BACKEND=memory no admite varios workers: cada proceso tendría sus propios datos. "
+            "Usa STORAGE_BACKEND=sqlite o WORKERS=1"
+        )
+    return {
+        "workers": workers,
+        "backend": backend,
+        "host": env.get("HOST", DEFAULT_HOST),
+        "port": int(env.get("PORT", DEFAULT_PORT)),
+    }
+
+
+def main():
+    try:
+        settings = resolve_settings(os.environ)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    # Los workers importan main.py en procesos nuevos y heredan el entorno
+    os.environ["STORAGE_BACKEND"] = settings["backend"]
+    os.environ["WEB_CONCURRENCY"] = str(settings["workers"])
+    uvicorn.run(
+        "main:app",
+        host=settings["host"],
+        port=settings["port"],
+        workers=settings["workers"],
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
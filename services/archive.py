@@ -0,0 +1,254 @@
+"""
+Archivo de tareas: segmento en disco comprimido y de solo añadir, leído con mmap.
+
+El segmento es una secuencia de bloques con una cabecera de tamaño fijo (BLOCK) y un contenido:
+
+- BLOCK_TASKS: tareas de un usuario codificadas como en el WAL (persistence.encode_task),
+  comprimidas juntas con zlib. La cabecera lleva el id mínimo y máximo del bloque.
+- BLOCK_REMOVED: ids de tareas del usuario que salen del archivo (unarchive), sin comprimir.
+  Solo afectan a los bloques anteriores: una tarea que se vuelve a archivar reaparece.
+- BLOCK_DROP_USER: todas las tareas archivadas del usuario quedan fuera (purga).
+
+En memoria solo se guarda dónde está cada bloque de cada usuario y los ids que han salido;
+las tareas se descomprimen bloque a bloque al paginar. Al abrir se recorren las cabeceras y
+se comprueba el CRC de cada bloque; una cola incompleta (escritura interrumpida) se descarta.
+
+Un cambio que mueve tareas entre el almacén y el archivo escribe primero en el destino: si
+el proceso cae entre las dos escrituras la tarea queda en los dos sitios, y TaskService da
+por buena la copia del almacén.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from services.persistence import TASK_ID, decode_task, encode_task
+from services.task_record import TaskRecord
+from services.wal import fsync_directory
+
+ARCHIVE_FILE = "archive.seg"
+
+BLOCK_TASKS = 1
+BLOCK_REMOVED = 2
+BLOCK_DROP_USER = 3
+# tipo, user_id, nº de elementos, id mínimo, id máximo, bytes del contenido, CRC32 del contenido
+BLOCK = struct.Struct("<BqIqqII")
+COMPRESSION_LEVEL = 6
+
+
+class ArchivedBlock(NamedTuple):
+    # Offset del contenido en el segmento
+    offset: int
+    length: int
+    count: int
+    min_id: int
+    max_id: int
+
+
+class UserArchive:
+    """Bloques archivados de un usuario y los ids que han salido del archivo"""
+
+    __slots__ = ("blocks", "removed", "removed_count")
+
+    def __init__(self):
+        self.blocks: List[ArchivedBlock] = []
+        # id -> nº de bloques del usuario cuando salió: oculta la tarea solo en los bloques anteriores
+        self.removed: Dict[int, int] = {}
+        self.removed_count = 0
+
+    def visible(self, task_id: int, block_index: int) -> bool:
+        return self.removed.get(task_id, 0) <= block_index
+
+    @property
+    def count(self) -> int:
+        return sum(block.count for block in self.blocks) - self.removed_count
+
+
+class TaskArchive:
+    """
+    Tareas archivadas por usuario en un segmento de solo añadir.
+    Sin `path` se usa un fichero temporal que se borra al cerrar (sin persistencia, como el almacén).
+    """
+
+    def __init__(self, path: Optional[str] = None, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync and path is not None
+        if path is None:
+            self._file = tempfile.TemporaryFile(prefix="tasks-archive-")
+        else:
+            self._file = open(path, "a+b")
+        self._users: Dict[int, UserArchive] = {}
+        self._map: Optional[mmap.mmap] = None
+        self._size = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def size(self) -> int:
+        """Bytes del segmento"""
+        return self._size
+
+    def count(self, user_id: int) -> int:
+        """Tareas archivadas de un usuario"""
+        user = self._users.get(user_id)
+        return user.count if user is not None else 0
+
+    def __len__(self) -> int:
+        return sum(user.count for user in self._users.values())
+
+    def _view(self) -> mmap.mmap:
+        """mmap de todo el segmento; se rehace cuando el fichero ha crecido"""
+        if self._map is None or len(self._map) < self._size:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def _load(self) -> None:
+        size = os.fstat(self._file.fileno()).st_size
+        self._size = size
+        if not size:
+            return
+        data = self._view()
+        offset = 0
+        while offset + BLOCK.size <= size:
+            kind, user_id, count, min_id, max_id, length, crc = BLOCK.unpack_from(data, offset)
+            start = offset + BLOCK.size
+            if start + length > size or zlib.crc32(data[start:start + length]) != crc:
+                break
+            self._apply(kind, user_id, ArchivedBlock(start, length, count, min_id, max_id))
+            offset = start + length
+        if offset < size:
+            # Cola de una escritura interrumpida: se descarta
+            self._map.close()
+            self._map = None
+            self._file.truncate(offset)
+            self._size = offset
+
+    def _apply(self, kind: int, user_id: int, block: ArchivedBlock) -> None:
+        if kind == BLOCK_DROP_USER:
+            self._users.pop(user_id, None)
+            return
+        user = self._users.setdefault(user_id, UserArchive())
+        if kind == BLOCK_TASKS:
+            user.blocks.append(block)
+            return
+        data = self._view()
+        position = len(user.blocks)
+        # Cada id sale una vez por cada copia visible (TaskService solo saca tareas que ha encontrado)
+        for (task_id,) in TASK_ID.iter_unpack(data[block.offset:block.offset + block.length]):
+            user.removed[task_id] = position
+            user.removed_count += 1
+
+    def _append(self, kind: int, user_id: int, count: int, min_id: int, max_id: int, payload: bytes) -> ArchivedBlock:
+        header = BLOCK.pack(kind, user_id, count, min_id, max_id, len(payload), zlib.crc32(payload))
+        offset = self._size
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(header + payload)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+            if not offset:
+                fsync_directory(os.path.dirname(os.path.abspath(self.path)))
+        self._size = offset + BLOCK.size + len(payload)
+        return ArchivedBlock(offset + BLOCK.size, len(payload), count, min_id, max_id)
+
+    def _decode(self, block: ArchivedBlock) -> List[TaskRecord]:
+        data = zlib.decompress(self._view()[block.offset:block.offset + block.length])
+        tasks, offset = [], 0
+        for _ in range(block.count):
+            task, offset = decode_task(data, offset)
+            tasks.append(task)
+        return tasks
+
+    def append(self, user_id: int, tasks: List[TaskRecord]) -> None:
+        """Archivar tareas de un usuario en un bloque nuevo"""
+        if not tasks:
+            return
+        payload = zlib.compress(b"".join(encode_task(task) for task in tasks), COMPRESSION_LEVEL)
+        ids = [task.id for task in tasks]
+        with self._lock:
+            block = self._append(BLOCK_TASKS, user_id, len(tasks), min(ids), max(ids), payload)
+            self._apply(BLOCK_TASKS, user_id, block)
+
+    def get_many(self, user_id: int, task_ids: Iterable[int]) -> Dict[int, TaskRecord]:
+        """Tareas archivadas del usuario con esos ids (descomprime solo los bloques que pueden contenerlas)"""
+        wanted = set(task_ids)
+        found: Dict[int, TaskRecord] = {}
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None or not wanted:
+                return found
+            low, high = min(wanted), max(wanted)
+            for index, block in enumerate(user.blocks):
+                if block.max_id < low or block.min_id > high:
+                    continue
+                for task in self._decode(block):
+                    # Si una tarea se archivó varias veces vale la última copia
+                    if task.id in wanted and user.visible(task.id, index):
+                        found[task.id] = task
+        return found
+
+    def remove(self, user_id: int, task_ids: List[int]) -> None:
+        """Sacar tareas del archivo (las que ya han vuelto al almacén)"""
+        if not task_ids:
+            return
+        payload = b"".join(TASK_ID.pack(task_id) for task_id in task_ids)
+        with self._lock:
+            block = self._append(BLOCK_REMOVED, user_id, len(task_ids), 0, 0, payload)
+            self._apply(BLOCK_REMOVED, user_id, block)
+
+    def drop_user(self, user_id: int) -> int:
+        """Olvidar todas las tareas archivadas de un usuario; devuelve cuántas eran"""
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None:
+                return 0
+            self._append(BLOCK_DROP_USER, user_id, 0, 0, 0, b"")
+            self._apply(BLOCK_DROP_USER, user_id, None)
+            return user.count
+
+    def page(
+        self, user_id: int, position: Tuple[int, int] = (0, 0), limit: int = 100
+    ) -> Tuple[List[TaskRecord], Optional[Tuple[int, int]]]:
+        """
+        Tareas archivadas del usuario en orden de archivo, a partir de `position` (bloque, tarea del bloque).
+        Devuelve la página y la posición siguiente, o None si no hay más.
+        """
+        block_index, item = position
+        tasks: List[TaskRecord] = []
+        with self._lock:
+            user = self._users.get(user_id)
+            blocks = user.blocks if user is not None else []
+            while block_index < len(blocks):
+                decoded = self._decode(blocks[block_index])
+                while item < len(decoded):
+                    task = decoded[item]
+                    item += 1
+                    if user.visible(task.id, block_index):
+                        tasks.append(task)
+                        if len(tasks) == limit:
+                            if item == len(decoded):
+                                block_index, item = block_index + 1, 0
+                            more = block_index < len(blocks)
+                            return tasks, (block_index, item) if more else None
+                block_index, item = block_index + 1, 0
+        return tasks, None
+
+    def iter_user(self, user_id: int, batch_size: int = 1000) -> Iterator[TaskRecord]:
+        """Recorrer todas las tareas archivadas de un usuario"""
+        position = (0, 0)
+        while position is not None:
+            tasks, position = self.page(user_id, position, batch_size)
+            yield from tasks
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
@@ -1,52 +1,61 @@
+import os
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from models.user import User, UserCreate
+from models.user import User, UserCreate, UserUpdate
+from services.metrics import metrics_registry
+from services.password_hasher import PasswordHasher, check_password, hash_password
+from services.token_cache import TokenCache
+from services.user_directory import UserDirectory
 
 SECRET_KEY = "tu_clave_secreta_super_segura_cambiala_en_produccion"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+TOKEN_CACHE_MAX_SIZE = 10000
+
+# Pool de bcrypt: "thread", "process" o "inline" (en el hilo del event loop)
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+@lru_cache(maxsize=None)
+def jose_jwt():
+    """Módulo jwt de python-jose (con el backend de cryptography); se importa en el primer token"""
+    from jose import jwt
+
+    return jwt
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 class AuthService:
     def __init__(self):
-        self.users = []
-        self.next_id = 1
+        self.users = UserDirectory()
+        self.token_cache = TokenCache(TOKEN_CACHE_MAX_SIZE)
+        self.hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_EXECUTOR)
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verificar que la contraseña sea correcta"""
-        # Truncar a 72 bytes (límite de bcrypt)
-        password_truncated = plain_password[:72]
-        return pwd_context.verify(password_truncated, hashed_password)
+        return check_password(plain_password, hashed_password)
     
     def get_password_hash(self, password: str) -> str:
         """Hashear la contraseña"""
-        # Truncar a 72 bytes (límite de bcrypt)
-        password_truncated = password[:72]
-        return pwd_context.hash(password_truncated)
+        return hash_password(password)
     
+    @metrics_registry.timed("user_lookup")
     def get_user_by_username(self, username: str) -> Optional[dict]:
         """Obtener usuario por nombre de usuario"""
-        for user in self.users:
-            if user["username"] == username:
-                return user
-        return None
+        return self.users.get_by_username(username)
     
     def get_user_by_email(self, email: str) -> Optional[dict]:
-        """Obtener usuario por email"""
-        for user in self.users:
-            if user["email"] == email:
-                return user
-        return None
+        """Obtener usuario por email (sin distinguir mayúsculas)"""
+        return self.users.get_by_email(email)
     
-    def create_user(self, user_data: UserCreate) -> User:
+    def create_user(self, user_data: UserCreate, hashed_password: Optional[str] = None) -> User:
         """Crear un nuevo usuario"""
-        hashed_password = self.get_password_hash(user_data.password)
+        if hashed_password is None:
+            hashed_password = self.get_password_hash(user_data.password)
         
         user_dict = {
-            "id": self.next_id,
+            "id": self.users.allocate_id(),
             "username": user_data.username,
             "email": user_data.email,
             "full_name": user_data.full_name,
@@ -55,8 +64,7 @@ class AuthService:
             "created_at": datetime.now(timezone.utc)
         }
         
-        self.users.append(user_dict)
-        self.next_id += 1
+        self.users.add(user_dict)
         
         return User(
             id=user_dict["id"],
@@ -67,6 +75,26 @@ class AuthService:
             created_at=user_dict["created_at"]
         )
     
+    async def create_user_async(self, user_data: UserCreate) -> User:
+        """Crear un nuevo usuario hasheando la contraseña en el pool de bcrypt"""
+        hashed_password = await self.hasher.hash(user_data.password)
+        return self.create_user(user_data, hashed_password)
+    
+    def update_user(self, user_id: int, user_update: UserUpdate) -> Optional[User]:
+        """Actualizar los datos de un usuario"""
+        user = self.users.update(user_id, user_update.model_dump(exclude_unset=True))
+        if user is None:
+            return None
+        self.token_cache.invalidate_user(user_id)
+        return User(**{k: v for k, v in user.items() if k != "hashed_password"})
+    
+    def deactivate_user(self, user_id: int) -> bool:
+        """Desactivar un usuario"""
+        if self.users.deactivate(user_id) is None:
+            return False
+        self.token_cache.invalidate_user(user_id)
+        return True
+    
     def authenticate_user(self, username: str, password: str) -> Optional[User]:
         """Autenticar un usuario"""
         user = self.get_user_by_username(username)
@@ -84,21 +112,60 @@ class AuthService:
             created_at=user["created_at"]
         )
     
+    async def authenticate_user_async(self, username: str, password: str) -> Optional[User]:
+        """Autenticar un usuario verificando la contraseña en el pool de bcrypt"""
+        user = self.get_user_by_username(username)
+        if not user:
+            return None
+        if not await self.hasher.verify(password, user["hashed_password"]):
+            return None
+        
+        return User(**{k: v for k, v in user.items() if k != "hashed_password"})
+    
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         """Crear token JWT"""
         to_encode = data.copy()
         # usar datetime timezone-aware para evitar DeprecationWarning
         expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
         to_encode.update({"exp": expire})
-        return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+        return jose_jwt().encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    
+    @metrics_registry.timed("jwt_decode")
+    def decode_payload(self, token: str) -> Optional[dict]:
+        """Verificar un token JWT y devolver su contenido, o None si no es válido"""
+        jwt = jose_jwt()
+        try:
+            return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except jwt.JWTError:
+            return None
     
     def decode_token(self, token: str) -> Optional[str]:
         """Decodificar token JWT"""
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            return payload.get("sub")
-        except JWTError:
+        payload = self.decode_payload(token)
+        return payload.get("sub") if payload is not None else None
+    
+    def get_user_from_token(self, token: str) -> Optional[User]:
+        """Obtener el usuario de un token, usando la caché de tokens verificados"""
+        user = self.token_cache.get(token)
+        if user is not None:
+            return user
+        
+        payload = self.decode_payload(token)
+        if payload is None:
+            return None
+        
+        username = payload.get("sub")
+        if username is None:
             return None
+        
+        user_dict = self.get_user_by_username(username)
+        if user_dict is None:
+            return None
+        
+        user = User(**{k: v for k, v in user_dict.items() if k != "hashed_password"})
+        if "exp" in payload:
+            self.token_cache.put(token, user, payload["exp"])
+        return user
 
 # Instancia global compartida
 auth_service_instance = AuthService()
\ No newline at end of file
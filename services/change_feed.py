@@ -0,0 +1,146 @@
+"""
+Feed de cambios de tareas por usuario.
+
+TaskService publica cada alta, modificación o borrado en un buffer circular acotado
+por usuario, con números de secuencia crecientes. Los clientes piden los cambios
+posteriores a la última secuencia que vieron (long-poll o SSE) y los leen directamente
+del buffer compartido, sin colas por suscriptor: un suscriptor en espera es solo un
+future de asyncio. Si un cliente se queda tan atrás que sus cambios ya salieron del
+buffer recibe `resync` y debe volver a leer el listado completo.
+
+Las secuencias parten del reloj (microsegundos) al arrancar el proceso, así que siguen
+creciendo tras un reinicio y un `since` de antes del reinicio también pide resync.
+El feed es del proceso: con varios workers cada uno ve solo los cambios que atiende.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from models.serializers import task_to_dict
+from models.task import Task, TaskChangeType
+
+CHANGE_FEED_SIZE = int(os.getenv("CHANGE_FEED_SIZE", "1000"))
+# Cambios tras los que la tarea ya no está en el listado: el evento no lleva la tarea
+REMOVALS = (TaskChangeType.DELETED, TaskChangeType.ARCHIVED)
+
+
+class ChangeEvent(NamedTuple):
+    seq: int
+    type: TaskChangeType
+    task_id: int
+    # JSON de la tarea tras el cambio; None en los borrados
+    task: Optional[dict]
+
+    def to_dict(self) -> dict:
+        return {"seq": self.seq, "type": self.type.value, "task_id": self.task_id, "task": self.task}
+
+
+class ChangeBatch(NamedTuple):
+    changes: List[ChangeEvent]
+    # Secuencia a pasar como `since` en la siguiente petición
+    next_since: int
+    resync: bool = False
+
+    def to_dict(self) -> dict:
+        return {
+            "changes": [change.to_dict() for change in self.changes],
+            "next_since": self.next_since,
+            "resync": self.resync,
+        }
+
+
+class UserFeed:
+    __slots__ = ("events", "last_seq", "waiters")
+
+    def __init__(self, size: int, start_seq: int):
+        self.events: Deque[ChangeEvent] = deque(maxlen=size)
+        self.last_seq = start_seq
+        self.waiters: Set[asyncio.Future] = set()
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ChangeFeed:
+    """Buffers circulares de cambios por usuario con espera asíncrona de cambios nuevos"""
+
+    def __init__(self, size: int = CHANGE_FEED_SIZE):
+        self.size = size
+        self.start_seq = time.time_ns() // 1000
+        self._feeds: Dict[int, UserFeed] = {}
+        self._lock = threading.Lock()
+
+    def _feed(self, user_id: int) -> UserFeed:
+        feed = self._feeds.get(user_id)
+        if feed is None:
+            feed = self._feeds.setdefault(user_id, UserFeed(self.size, self.start_seq))
+        return feed
+
+    def subscribers(self) -> int:
+        return sum(len(feed.waiters) for feed in self._feeds.values())
+
+    def publish(self, user_id: int, changes: Iterable[Tuple[TaskChangeType, Task]]) -> None:
+        """Registrar cambios de tareas de un usuario y despertar a quien los espera"""
+        changes = list(changes)
+        if not changes:
+            return
+        # De un lote mayor que el buffer solo sobrevivirían los últimos: no se serializa el resto
+        skipped = max(0, len(changes) - self.size)
+        with self._lock:
+            feed = self._feed(user_id)
+            seq = feed.last_seq + skipped
+            for change_type, task in changes[skipped:]:
+                seq += 1
+                payload = None if change_type in REMOVALS else task_to_dict(task)
+                feed.events.append(ChangeEvent(seq, change_type, task.id, payload))
+            feed.last_seq = seq
+            waiters, feed.waiters = feed.waiters, set()
+        # Los futures pertenecen a su event loop: se resuelven desde él aunque se publique desde otro hilo
+        for future in waiters:
+            future.get_loop().call_soon_threadsafe(_wake, future)
+
+    def read(self, user_id: int, since: Optional[int], limit: int = 100) -> ChangeBatch:
+        """
+        Cambios posteriores a `since`, como mucho `limit`.
+        Sin `since` devuelve solo la posición actual; si los cambios pedidos ya no están en el buffer, resync.
+        """
+        with self._lock:
+            feed = self._feed(user_id)
+            last_seq = feed.last_seq
+            if since is None or since == last_seq:
+                return ChangeBatch([], last_seq)
+            oldest = feed.events[0].seq - 1 if feed.events else last_seq
+            if since < oldest or since > last_seq:
+                return ChangeBatch([], last_seq, resync=True)
+            start = since - oldest
+            changes = list(islice(feed.events, start, start + limit))
+        return ChangeBatch(changes, changes[-1].seq)
+
+    async def wait(self, user_id: int, since: Optional[int], timeout: float, limit: int = 100) -> ChangeBatch:
+        """Como `read`, pero si no hay cambios espera hasta `timeout` segundos a que llegue alguno"""
+        batch = self.read(user_id, since, limit)
+        if batch.changes or batch.resync or since is None:
+            return batch
+
+        future = asyncio.get_running_loop().create_future()
+        with self._lock:
+            feed = self._feed(user_id)
+            if feed.last_seq != since:
+                future = None  # se publicó algo entre la lectura y la suscripción
+            else:
+                feed.waiters.add(future)
+        if future is not None:
+            try:
+                await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    feed.waiters.discard(future)
+        return self.read(user_id, since, limit)
@@ -0,0 +1,111 @@
+"""
+Control de concurrencia de los almacenes en memoria.
+
+Hoy todo se ejecuta en el hilo del event loop, pero los endpoints síncronos van al
+threadpool de Starlette y bcrypt y los snapshots ya usan otros hilos. El modelo es:
+
+- Los ids salen de un IdAllocator atómico: nunca se repiten aunque se pidan a la vez.
+- Cada usuario tiene su propio lock de escritura (reentrante): las escrituras de
+  usuarios distintos no se esperan entre sí y no hay un lock global.
+- Las tareas guardadas no se modifican nunca: una modificación crea una copia y la
+  sustituye (copy-on-write), así que quien tiene una tarea ve siempre una versión entera.
+- Las lecturas no toman locks. Cada usuario tiene un contador de versión que se
+  incrementa al empezar y al terminar cada escritura (impar = escritura en curso); una
+  lectura que coincide con una escritura lo detecta y se repite, como un seqlock.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, TypeVar
+
+T = TypeVar("T")
+
+# Reintentos de una lectura que coincide con escrituras antes de esperar al lock del usuario
+READ_RETRIES = 8
+# Errores de recorrer listas o diccionarios que otro hilo está modificando (la lectura se repite)
+TORN_READ_ERRORS = (IndexError, KeyError, RuntimeError)
+
+
+class IdAllocator:
+    """Ids enteros consecutivos, reservados de forma atómica entre hilos"""
+
+    def __init__(self, next_id: int = 1):
+        self._next_id = next_id
+        self._lock = threading.Lock()
+
+    @property
+    def next_id(self) -> int:
+        return self._next_id
+
+    def allocate(self) -> int:
+        with self._lock:
+            value = self._next_id
+            self._next_id += 1
+            return value
+
+    def allocate_many(self, count: int) -> range:
+        with self._lock:
+            start = self._next_id
+            self._next_id += count
+            return range(start, start + count)
+
+    def advance(self, next_id: int) -> None:
+        """Garantizar que el siguiente id es al menos `next_id` (al cargar datos)"""
+        with self._lock:
+            self._next_id = max(self._next_id, next_id)
+
+
+class UserLocks:
+    """Lock de escritura por usuario y contador de versión para lecturas sin lock"""
+
+    def __init__(self):
+        self._locks: Dict[int, threading.RLock] = {}
+        self._seq: Dict[int, int] = {}
+        # Escrituras anidadas en curso por usuario (solo las toca quien tiene el lock)
+        self._depth: Dict[int, int] = {}
+        self.retries = 0
+
+    def lock(self, user_id: int) -> threading.RLock:
+        lock = self._locks.get(user_id)
+        if lock is None:
+            # setdefault es atómico: dos hilos que llegan a la vez se quedan con el mismo lock
+            lock = self._locks.setdefault(user_id, threading.RLock())
+        return lock
+
+    @contextmanager
+    def writing(self, user_id: int) -> Iterator[None]:
+        """Escritura sobre los datos de un usuario: lock del usuario y versión impar mientras dura"""
+        with self.lock(user_id):
+            depth = self._depth.get(user_id, 0)
+            if not depth:
+                self._seq[user_id] = self._seq.get(user_id, 0) + 1
+            self._depth[user_id] = depth + 1
+            try:
+                yield
+            finally:
+                if depth:
+                    self._depth[user_id] = depth
+                else:
+                    del self._depth[user_id]
+                    self._seq[user_id] += 1
+
+    def read(self, user_id: int, read: Callable[[], T]) -> T:
+        """Ejecutar `read` sin lock y repetirla si coincidió con una escritura del usuario"""
+        seq = self._seq
+        for _ in range(READ_RETRIES):
+            before = seq.get(user_id, 0)
+            if not before & 1:
+                try:
+                    result = read()
+                except TORN_READ_ERRORS:
+                    pass
+                else:
+                    if seq.get(user_id, 0) == before:
+                        return result
+            self.retries += 1
+            # Ceder el GIL al hilo que está escribiendo
+            time.sleep(0)
+        # Escrituras continuas: esperar a que termine la actual para no reintentar sin fin
+        with self.lock(user_id):
+            return read()
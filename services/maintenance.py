@@ -0,0 +1,51 @@
+"""
+Barridos de mantenimiento de las tareas, ejecutados por el planificador (services.scheduler).
+
+Cada barrido es un generador: cada paso procesa un lote de como mucho `batch_size`
+tareas de un usuario con su lock tomado y lo suelta antes de ceder, así que las
+peticiones del usuario esperan como mucho un lote y el resto no espera nada.
+"""
+
+from datetime import datetime
+from typing import Iterable, Iterator
+from services.task_service import TaskService
+
+# Tareas por paso de un barrido: cada lote ocupa el event loop menos de un milisegundo
+SWEEP_BATCH_SIZE = 200
+
+
+def inactive_user_ids(users: Iterable[dict]) -> Iterator[int]:
+    """Ids de los usuarios desactivados"""
+    return (user["id"] for user in users if not user["is_active"])
+
+
+def purge_inactive_users(
+    task_service: TaskService, users: Iterable[dict], batch_size: int = SWEEP_BATCH_SIZE
+) -> Iterator[int]:
+    """Borrar por lotes las tareas de los usuarios desactivados; cada paso devuelve las tareas borradas"""
+    # La lista se saca antes de empezar: el directorio puede cambiar mientras el barrido cede el loop
+    for user_id in list(inactive_user_ids(users)):
+        while True:
+            deleted = task_service.purge_user_tasks(user_id, batch_size)
+            yield deleted
+            if deleted < batch_size:
+                break
+        # Las archivadas se olvidan de una vez: es un único bloque que marca al usuario en el archivo
+        yield task_service.purge_user_archive(user_id)
+
+
+def archive_completed(
+    task_service: TaskService, before: datetime, batch_size: int = SWEEP_BATCH_SIZE
+) -> Iterator[int]:
+    """
+    Pasar al archivo las tareas completadas sin cambios desde antes de `before`.
+    Cada paso revisa como mucho `batch_size` tareas de un usuario, empezando por las más antiguas
+    y sin pasar de `before`, y devuelve cuántas ha archivado.
+    """
+    for user_id in task_service.store.user_ids():
+        after = None
+        while True:
+            archived, after = task_service.archive_completed(user_id, before, after, batch_size)
+            yield archived
+            if after is None:
+                break
@@ -0,0 +1,217 @@
+"""
+Métricas en proceso con exposición en formato de texto de Prometheus.
+
+Los histogramas tienen buckets fijos: observar un valor es un bisect y dos sumas.
+Los métodos de TaskService medidos con `timed` también se llaman desde hilos de
+trabajo (exportación, barridos en hilo), así que cada histograma y cada familia de
+contadores tiene su propio lock: sin contención es un acquire/release de cientos de
+ns. Los gauges solo se tocan desde el event loop y no lo llevan.
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Segundos; cubren desde operaciones en memoria (µs) hasta bcrypt (cientos de ms)
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# Trabajos en segundo plano: un barrido completo puede durar minutos; cada tramo, milisegundos
+JOB_BUCKETS = (0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+SLICE_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+def _labels(names: Tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Histograma con buckets fijos (límite superior inclusivo, como en Prometheus)"""
+
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        # Un contador por bucket más el de +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Buckets acumulados, suma y total leídos de forma consistente"""
+        with self._lock:
+            counts, total_sum, total_count = list(self.counts), self.sum, self.count
+        total, cumulative = 0, []
+        for count in counts:
+            total += count
+            cumulative.append(total)
+        return cumulative, total_sum, total_count
+
+
+class HistogramFamily:
+    """Histogramas con el mismo nombre y distintas etiquetas"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], bounds=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.bounds = bounds
+        self.children: Dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> Histogram:
+        histogram = self.children.get(values)
+        if histogram is None:
+            with self._lock:
+                histogram = self.children.setdefault(values, Histogram(self.bounds))
+        return histogram
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        bucket_labels = [f'le="{bound}"' for bound in self.bounds] + ['le="+Inf"']
+        with self._lock:
+            children = sorted(self.children.items())
+        for values, histogram in children:
+            cumulative, total_sum, total_count = histogram.snapshot()
+            for le, count in zip(bucket_labels, cumulative):
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, values, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, values)} {_number(total_sum)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, values)} {total_count}")
+        return lines
+
+
+class CounterFamily:
+    """Contadores con etiquetas"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values, amount: int = 1) -> None:
+        with self._lock:
+            self.values[values] = self.values.get(values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self.values.items())
+        lines.extend(f"{self.name}{_labels(self.label_names, key)} {_number(value)}" for key, value in values)
+        return lines
+
+
+class Gauge:
+    """Valor que sube y baja"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {self.value}"]
+
+
+class MetricsRegistry:
+    """Métricas HTTP y de fases internas de la API"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.request_duration = HistogramFamily(
+            "http_request_duration_seconds", "Duración de las peticiones HTTP por ruta", ("method", "route")
+        )
+        self.requests = CounterFamily(
+            "http_requests_total", "Peticiones HTTP por ruta y código de estado", ("method", "route", "status")
+        )
+        self.in_flight = Gauge("http_requests_in_flight", "Peticiones HTTP en curso")
+        self.phase_duration = HistogramFamily(
+            "app_phase_duration_seconds", "Duración de fases internas (JWT, usuario, bcrypt, TaskService)", ("phase",)
+        )
+        # Trabajos en segundo plano (services.scheduler)
+        self.job_runs = CounterFamily("app_job_runs_total", "Ejecuciones de trabajos por resultado", ("job", "outcome"))
+        self.job_duration = HistogramFamily(
+            "app_job_duration_seconds", "Duración de cada ejecución de un trabajo", ("job",), bounds=JOB_BUCKETS
+        )
+        self.job_items = CounterFamily("app_job_items_total", "Elementos procesados por los trabajos", ("job",))
+        self.jobs_running = Gauge("app_jobs_running", "Trabajos en ejecución")
+        self.job_slice = HistogramFamily(
+            "app_job_slice_seconds", "Tiempo seguido que un barrido ocupa el event loop antes de cederlo", ("job",),
+            bounds=SLICE_BUCKETS,
+        )
+
+    def timed(self, phase: str):
+        """
+        Decorador que mide cada llamada (función normal o async) en app_phase_duration_seconds.
+        Si las métricas están desactivadas al decorar, devuelve la función sin envolver (coste cero).
+        """
+        histogram = self.phase_duration.labels(phase)
+        perf_counter = time.perf_counter
+
+        def decorate(fn):
+            if not self.enabled:
+                return fn
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await fn(*args, **kwargs)
+                    start = perf_counter()
+                    try:
+                        return await fn(*args, **kwargs)
+                    finally:
+                        histogram.observe(perf_counter() - start)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    histogram.observe(perf_counter() - start)
+            return wrapper
+
+        return decorate
+
+    def render(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus (versión 0.0.4)"""
+        lines = []
+        metrics = (
+            self.request_duration, self.requests, self.in_flight, self.phase_duration,
+            self.job_runs, self.job_duration, self.job_items, self.jobs_running, self.job_slice,
+        )
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Instancia global compartida
+metrics_registry = MetricsRegistry(METRICS_ENABLED)
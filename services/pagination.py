@@ -0,0 +1,20 @@
+import base64
+import json
+
+
+def encode_cursor(position: dict) -> str:
+    """Codificar la posición de la última fila devuelta como cursor opaco"""
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Decodificar un cursor; lanza ValueError si no es válido"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("cursor inválido") from exc
+    if not isinstance(position, dict):
+        raise ValueError("cursor inválido")
+    return position
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional
+from services.metrics import metrics_registry
+
+BCRYPT_VERIFY = metrics_registry.phase_duration.labels("bcrypt_verify")
+
+
+@lru_cache(maxsize=None)
+def password_context():
+    """Contexto de passlib con el backend de bcrypt cargado; se importa en el primer uso, no al arrancar"""
+    from passlib.context import CryptContext
+
+    context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    context.handler("bcrypt").get_backend()
+    return context
+
+
+def hash_password(password: str) -> str:
+    """Hashear la contraseña con bcrypt"""
+    # Truncar a 72 bytes (límite de bcrypt)
+    return password_context().hash(password[:72])
+
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    """Verificar una contraseña contra su hash bcrypt"""
+    # Truncar a 72 bytes (límite de bcrypt)
+    return password_context().verify(plain_password[:72], hashed_password)
+
+
+def timed_call(fn, *args):
+    """Ejecutar `fn` y devolver (resultado, segundos); se llama dentro del worker para no medir la espera en cola"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class HasherBusyError(Exception):
+    """La cola de hashing está llena; el cliente debe reintentar más tarde"""
+
+
+class PasswordHasher:
+    """
+    Ejecuta bcrypt en un pool de hilos o procesos para no bloquear el event loop.
+
+    `max_pending` limita las operaciones en curso o en espera; al superarlo se lanza
+    HasherBusyError en lugar de encolar sin límite. Con executor="inline" el hashing
+    se hace en el propio hilo del llamador (comportamiento anterior).
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 64, executor: str = "thread"):
+        if executor not in ("thread", "process", "inline"):
+            raise ValueError(f"executor desconocido: {executor}")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor_kind = executor
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        # El pool se crea en el primer uso para no lanzar procesos al importar
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HasherBusyError()
+            self._pending += 1
+        try:
+            if self.executor_kind == "inline":
+                return fn(*args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        if not metrics_registry.enabled:
+            return await self._run(check_password, plain_password, hashed_password)
+        # Solo el bcrypt: la espera en la cola del pool no entra en bcrypt_verify
+        valid, elapsed = await self._run(timed_call, check_password, plain_password, hashed_password)
+        BCRYPT_VERIFY.observe(elapsed)
+        return valid
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,382 @@
+"""
+Persistencia del backend en memoria: snapshots binarios + write-ahead log.
+
+Cada cambio de TaskStore/UserDirectory se registra en el WAL con el estado completo
+de la tarea o usuario (o su borrado), así que reaplicarlo es idempotente. Un snapshot
+guarda todo el estado y el lsn hasta el que llega; al arrancar se carga el snapshot
+con mmap y solo se reaplica la cola del WAL posterior a ese lsn.
+
+El snapshot se toma "en caliente": la lista de tareas se captura en el event loop y se
+codifica en otro hilo. Si una tarea cambia mientras tanto, su registro del WAL tiene un
+lsn posterior al del snapshot y se vuelve a aplicar en la recuperación.
+"""
+
+import asyncio
+import mmap
+import os
+import struct
+import threading
+import zlib
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from services.task_record import TaskRecord
+from services.task_store import TaskStore
+from services.user_directory import UserDirectory
+from services.wal import WriteAheadLog, fsync_directory, list_segments, read_segment
+
+OP_TASK_PUT = 1
+OP_TASK_DELETE = 2
+OP_USER_PUT = 3
+
+SNAPSHOT_FILE = "snapshot.bin"
+SNAPSHOT_MAGIC = b"TASKSNAP"
+SNAPSHOT_VERSION = 1
+# magic, versión, lsn, siguiente id de tarea, siguiente id de usuario, nº de usuarios, nº de tareas, bytes de texto
+SNAPSHOT_HEADER = struct.Struct("<8sIQqqQQQ")
+SNAPSHOT_CRC = struct.Struct("<I")
+# id, user_id, estado, prioridad, created_us, updated_us, longitud del título y de la descripción (-1 = None).
+# El WAL y el archivo la usan con longitudes en bytes; el snapshot, con longitudes en caracteres
+# (sus textos van todos seguidos y se decodifican de una vez)
+TASK = struct.Struct("<qqBbqqii")
+TASK_ID = struct.Struct("<q")
+# id, is_active
+USER = struct.Struct("<q?")
+TEXT_LENGTH = struct.Struct("<i")
+USER_TEXT_FIELDS = ("username", "email", "full_name", "hashed_password")
+
+
+def _text(value: Optional[str]) -> Tuple[int, bytes]:
+    if value is None:
+        return -1, b""
+    data = value.encode()
+    return len(data), data
+
+
+def encode_task(task: TaskRecord) -> bytes:
+    title_len, title = _text(task.title)
+    description_len, description = _text(task.description)
+    return TASK.pack(
+        task.id, task.user_id, task.status_code, task.priority, task.created_us, task.updated_us,
+        title_len, description_len,
+    ) + title + description
+
+
+def decode_task(data, offset: int = 0) -> Tuple[TaskRecord, int]:
+    """Decodificar una tarea en `offset`; devuelve el registro y el offset siguiente"""
+    task_id, user_id, status_code, priority, created_us, updated_us, title_len, description_len = (
+        TASK.unpack_from(data, offset)
+    )
+    offset += TASK.size
+    title = data[offset:offset + title_len].decode()
+    offset += title_len
+    description = None
+    if description_len >= 0:
+        description = data[offset:offset + description_len].decode()
+        offset += description_len
+    record = TaskRecord.from_values(
+        task_id, user_id, title, description, status_code, priority, created_us, updated_us
+    )
+    return record, offset
+
+
+def encode_user(user: dict) -> bytes:
+    parts = [USER.pack(user["id"], user["is_active"])]
+    for value in (*(user[field] for field in USER_TEXT_FIELDS), user["created_at"].isoformat()):
+        length, data = _text(value)
+        parts.append(TEXT_LENGTH.pack(length))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def decode_user(data, offset: int = 0) -> Tuple[dict, int]:
+    user_id, is_active = USER.unpack_from(data, offset)
+    offset += USER.size
+    values = []
+    for _ in range(len(USER_TEXT_FIELDS) + 1):
+        (length,) = TEXT_LENGTH.unpack_from(data, offset)
+        offset += TEXT_LENGTH.size
+        if length < 0:
+            values.append(None)
+            continue
+        values.append(data[offset:offset + length].decode())
+        offset += length
+    user = dict(zip(USER_TEXT_FIELDS, values))
+    user.update(id=user_id, is_active=is_active, created_at=datetime.fromisoformat(values[-1]))
+    return user, offset
+
+
+class SnapshotState(NamedTuple):
+    lsn: int
+    task_next_id: int
+    user_next_id: int
+    users: List[dict]
+    tasks: List[TaskRecord]
+
+
+def write_snapshot(path: str, state: SnapshotState) -> None:
+    """
+    Escribir el snapshot en un fichero temporal y renombrarlo (atómico).
+    Las tareas van en columnas: una fila de tamaño fijo por tarea (longitudes en caracteres)
+    y después todos los textos seguidos, para leerlas con iter_unpack y un único decode.
+    """
+    tmp_path = path + ".tmp"
+    crc = 0
+    with open(tmp_path, "wb") as f:
+        def write(data: bytes) -> None:
+            nonlocal crc
+            crc = zlib.crc32(data, crc)
+            f.write(data)
+
+        texts = []
+        rows = bytearray()
+        for task in state.tasks:
+            description = task.description
+            rows += TASK.pack(
+                task.id, task.user_id, task.status_code, task.priority, task.created_us, task.updated_us,
+                len(task.title), -1 if description is None else len(description),
+            )
+            texts.append(task.title)
+            if description is not None:
+                texts.append(description)
+        text = "".join(texts).encode()
+        del texts
+
+        write(SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, state.lsn, state.task_next_id, state.user_next_id,
+            len(state.users), len(state.tasks), len(text),
+        ))
+        write(b"".join(encode_user(user) for user in state.users))
+        write(rows)
+        write(text)
+        f.write(SNAPSHOT_CRC.pack(crc))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_directory(os.path.dirname(path) or ".")
+
+
+def read_snapshot(path: str) -> Optional[SnapshotState]:
+    """Leer un snapshot con mmap; None si no existe. Lanza ValueError si está corrupto"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        view = memoryview(data)
+        try:
+            (expected,) = SNAPSHOT_CRC.unpack_from(data, len(data) - SNAPSHOT_CRC.size)
+            if zlib.crc32(view[:-SNAPSHOT_CRC.size]) != expected:
+                raise ValueError(f"snapshot corrupto: {path}")
+            magic, version, lsn, task_next_id, user_next_id, user_count, task_count, text_size = (
+                SNAPSHOT_HEADER.unpack_from(data)
+            )
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError(f"formato de snapshot desconocido: {path}")
+            offset = SNAPSHOT_HEADER.size
+            users = []
+            for _ in range(user_count):
+                user, offset = decode_user(data, offset)
+                users.append(user)
+            rows_end = offset + task_count * TASK.size
+            text = data[rows_end:rows_end + text_size].decode()
+            tasks = []
+            position = 0
+            new_record = TaskRecord.from_values
+            for task_id, user_id, status_code, priority, created_us, updated_us, title_len, description_len in (
+                TASK.iter_unpack(view[offset:rows_end])
+            ):
+                title = text[position:position + title_len]
+                position += title_len
+                description = None
+                if description_len >= 0:
+                    description = text[position:position + description_len]
+                    position += description_len
+                tasks.append(new_record(
+                    task_id, user_id, title, description, status_code, priority, created_us, updated_us
+                ))
+        finally:
+            view.release()
+    return SnapshotState(lsn, task_next_id, user_next_id, users, tasks)
+
+
+class JournaledTaskStore(TaskStore):
+    """
+    TaskStore que registra cada cambio en el WAL.
+    El registro se añade con el lock del usuario tomado: el orden del WAL es el de los cambios.
+    Se añade antes de aplicar el cambio: si el WAL ya no escribe (WALWriteError) el almacén no cambia.
+    """
+
+    def __init__(self, wal: Optional[WriteAheadLog] = None):
+        super().__init__()
+        self.wal = wal
+
+    def add(self, task) -> None:
+        task = TaskRecord.from_task(task)
+        with self.user_lock(task.user_id):
+            self._log_put(task)
+            super().add(task)
+
+    def update(self, task) -> None:
+        task = TaskRecord.from_task(task)
+        with self.user_lock(task.user_id):
+            self._log_put(task)
+            super().update(task)
+
+    def update_fields(
+        self, task_id: int, changes: dict, check: Optional[Callable[[TaskRecord], None]] = None
+    ) -> Optional[TaskRecord]:
+        task = self.get(task_id)
+        if task is None:
+            return None
+        with self.user_lock(task.user_id):
+            old = self.get(task_id)
+            if old is None:
+                return None
+            if check is not None:
+                check(old)
+            task = old.copy()
+            task.apply(changes)
+            self._log_put(task)
+            return super().update_fields(task_id, changes)
+
+    def remove(self, task_id: int, check: Optional[Callable[[TaskRecord], None]] = None) -> Optional[TaskRecord]:
+        task = self.get(task_id)
+        if task is None:
+            return None
+        with self.user_lock(task.user_id):
+            task = self.get(task_id)
+            if task is None:
+                return None
+            if check is not None:
+                check(task)
+            if self.wal is not None:
+                self.wal.append(OP_TASK_DELETE, TASK_ID.pack(task_id))
+            return super().remove(task_id)
+
+    def _log_put(self, task: TaskRecord) -> None:
+        if self.wal is not None:
+            self.wal.append(OP_TASK_PUT, encode_task(task))
+
+
+class JournaledUserDirectory(UserDirectory):
+    """UserDirectory que registra cada alta o cambio en el WAL"""
+
+    def __init__(self, wal: Optional[WriteAheadLog] = None):
+        super().__init__()
+        self.wal = wal
+
+    def add(self, user: dict) -> None:
+        # Se valida y se registra antes de cambiar los índices: si el WAL falla el usuario no queda a medias
+        self._check_add(user)
+        self._log_put(user)
+        super().add(user)
+
+    def update(self, user_id: int, changes: dict) -> Optional[dict]:
+        user = self.get(user_id)
+        if user is None:
+            return None
+        self._check_update(user, changes)
+        self._log_put({**user, **changes})
+        return super().update(user_id, changes)
+
+    def _log_put(self, user: dict) -> None:
+        if self.wal is not None:
+            self.wal.append(OP_USER_PUT, encode_user(user))
+
+
+class Persistence:
+    """Recuperación al arrancar y snapshots periódicos de los almacenes en memoria"""
+
+    def __init__(self, directory: str, commit_interval: float = 0.005, fsync: bool = True):
+        self.directory = directory
+        self.commit_interval = commit_interval
+        self.fsync = fsync
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.snapshot_lsn = 0
+        self.tasks: Optional[JournaledTaskStore] = None
+        self.users: Optional[JournaledUserDirectory] = None
+        self.wal: Optional[WriteAheadLog] = None
+        self._snapshot_lock = threading.Lock()
+
+    def open(self) -> Tuple[JournaledTaskStore, JournaledUserDirectory]:
+        """Recuperar el estado (snapshot + cola del WAL) y empezar a registrar cambios"""
+        os.makedirs(self.directory, exist_ok=True)
+        snapshot = read_snapshot(self.snapshot_path)
+        tasks: Dict[int, TaskRecord] = {}
+        users: Dict[int, dict] = {}
+        task_next_id = user_next_id = 1
+        last_lsn = 0
+        if snapshot is not None:
+            tasks = {task.id: task for task in snapshot.tasks}
+            users = {user["id"]: user for user in snapshot.users}
+            task_next_id, user_next_id = snapshot.task_next_id, snapshot.user_next_id
+            last_lsn = self.snapshot_lsn = snapshot.lsn
+
+        segments = list_segments(self.directory)
+        for i, (_, path) in enumerate(segments):
+            # Segmentos completamente cubiertos por el snapshot: no se leen
+            if i + 1 < len(segments) and segments[i + 1][0] - 1 <= self.snapshot_lsn:
+                continue
+            for lsn, op, payload in read_segment(path):
+                if lsn <= self.snapshot_lsn:
+                    continue
+                last_lsn = max(last_lsn, lsn)
+                if op == OP_TASK_PUT:
+                    task, _ = decode_task(payload)
+                    tasks[task.id] = task
+                    task_next_id = max(task_next_id, task.id + 1)
+                elif op == OP_TASK_DELETE:
+                    (task_id,) = TASK_ID.unpack(payload)
+                    tasks.pop(task_id, None)
+                    task_next_id = max(task_next_id, task_id + 1)
+                elif op == OP_USER_PUT:
+                    user, _ = decode_user(payload)
+                    users[user["id"]] = user
+                    user_next_id = max(user_next_id, user["id"] + 1)
+
+        self.tasks = JournaledTaskStore()
+        self.tasks.load(sorted(tasks.values(), key=lambda task: task.id), task_next_id)
+        self.users = JournaledUserDirectory()
+        self.users.load(sorted(users.values(), key=lambda user: user["id"]), user_next_id)
+        self.wal = WriteAheadLog(self.directory, last_lsn + 1, self.commit_interval, self.fsync)
+        self.tasks.wal = self.users.wal = self.wal
+        return self.tasks, self.users
+
+    def capture(self) -> SnapshotState:
+        """Capturar el estado para un snapshot; se llama desde el hilo que modifica los almacenes"""
+        lsn = self.wal.rotate()
+        return SnapshotState(
+            lsn, self.tasks.next_id, self.users.next_id, [dict(user) for user in self.users], list(self.tasks)
+        )
+
+    def write(self, state: SnapshotState) -> None:
+        """Guardar un estado capturado y borrar los segmentos del WAL que ya cubre (puede ir en otro hilo)"""
+        with self._snapshot_lock:
+            if state.lsn <= self.snapshot_lsn and os.path.exists(self.snapshot_path):
+                return
+            write_snapshot(self.snapshot_path, state)
+            self.snapshot_lsn = state.lsn
+            self.wal.remove_segments_until(state.lsn)
+
+    def snapshot(self) -> int:
+        """Tomar un snapshot de forma síncrona; devuelve su lsn"""
+        state = self.capture()
+        self.write(state)
+        return state.lsn
+
+    async def snapshot_async(self) -> int:
+        """Capturar en el event loop y codificar y escribir el snapshot en un hilo"""
+        state = self.capture()
+        await asyncio.to_thread(self.write, state)
+        return state.lsn
+
+    async def snapshot_if_changed(self) -> None:
+        """Tomar un snapshot si hubo cambios desde el anterior (trabajo periódico del planificador)"""
+        if self.wal.last_lsn > self.snapshot_lsn:
+            await self.snapshot_async()
+
+    def flush(self) -> None:
+        self.wal.flush()
+
+    def close(self) -> None:
+        if self.wal is not None:
+            self.wal.close()
@@ -0,0 +1,121 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Tuple
+
+
+class RateLimit(NamedTuple):
+    """Token bucket: `rate` fichas por segundo y como mucho `burst` acumuladas"""
+    rate: float
+    burst: float
+
+
+# "auth" se aplica por IP a register/login; "tasks" por usuario a /api/tasks
+DEFAULT_LIMITS = {
+    "auth": RateLimit(5, 20),
+    "tasks": RateLimit(50, 200),
+}
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+def parse_limits(spec: str) -> Dict[str, RateLimit]:
+    """Leer límites con el formato "auth=5:20,tasks=50:200" (ruta=fichas por segundo:ráfaga)"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, values = item.partition("=")
+        rate, _, burst = values.partition(":")
+        limits[name.strip()] = RateLimit(float(rate), float(burst or rate))
+    return limits
+
+
+class RateLimiter:
+    """
+    Token buckets por (ruta, clave) con memoria acotada.
+
+    Un bucket que lleva quieto el tiempo de rellenarse entero equivale a uno nuevo, así
+    que se puede descartar sin cambiar ninguna decisión. Al llegar a `max_keys` se
+    descartan primero esos buckets inactivos y, si no basta, los menos usados.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, RateLimit],
+        max_keys: int = 100000,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limits = dict(limits)
+        self.max_keys = max_keys
+        self.enabled = enabled
+        self.clock = clock
+        # (ruta, clave) -> [fichas, último acceso]
+        self._buckets: "OrderedDict[Tuple[str, str], list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, route: str, key: str, cost: float = 1) -> float:
+        """
+        Consumir `cost` fichas del bucket de `key` en `route`.
+        Devuelve 0 si se permite, o los segundos hasta que habrá fichas suficientes
+        (math.inf si `cost` supera la ráfaga: esa petición no cabe nunca).
+        """
+        limit = self.limits.get(route)
+        if not self.enabled or limit is None:
+            return 0.0
+        if cost > limit.burst:
+            with self._lock:
+                self.limited += 1
+            return math.inf
+        now = self.clock()
+        bucket_key = (route, key)
+        with self._lock:
+            bucket = self._buckets.get(bucket_key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._evict(now)
+                bucket = self._buckets[bucket_key] = [limit.burst, now]
+            else:
+                self._buckets.move_to_end(bucket_key)
+                bucket[0] = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                self.allowed += 1
+                return 0.0
+            self.limited += 1
+            return (cost - bucket[0]) / limit.rate
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def stats(self) -> dict:
+        return {"keys": len(self._buckets), "allowed": self.allowed, "limited": self.limited, "evictions": self.evictions}
+
+    def _evict(self, now: float) -> None:
+        # Los menos usados están al principio: se recorren mientras estén inactivos
+        while self._buckets:
+            (route, _), (_, last) = next(iter(self._buckets.items()))
+            limit = self.limits.get(route)
+            if limit is not None and now - last < limit.burst / limit.rate:
+                break
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+        while len(self._buckets) >= self.max_keys:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+
+
+# Instancia global compartida
+rate_limiter_instance = RateLimiter(
+    {**DEFAULT_LIMITS, **parse_limits(os.getenv("RATE_LIMITS", ""))},
+    RATE_LIMIT_MAX_KEYS,
+    enabled=os.getenv("RATE_LIMIT_ENABLED", "1") == "1",
+)
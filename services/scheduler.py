@@ -0,0 +1,225 @@
+"""
+Trabajos en segundo plano dentro del proceso, sobre el event loop de la app.
+
+- Los trabajos pendientes están en un heap ordenado por instante de ejecución; un único
+  despachador duerme hasta el primero (o hasta que se programa uno anterior).
+- Como mucho `max_concurrency` trabajos a la vez; un trabajo periódico se vuelve a
+  programar al terminar, así que nunca se solapa consigo mismo.
+- Los trabajos que recorren muchas tareas son barridos: un generador que hace un lote
+  pequeño por paso. `Scheduler.sweep` ejecuta pasos hasta agotar `slice_seconds` y deja
+  el event loop libre `slice_pause` segundos, así que las peticiones esperan como mucho un
+  tramo (unos milisegundos) aunque el barrido recorra millones de tareas. Sin la pausa, una
+  petición que necesita varias vueltas del loop esperaría un tramo en cada una. Ningún lock
+  se mantiene entre pasos. Los barridos con E/S bloqueante (escribir y hacer fsync en disco)
+  van con `Scheduler.sweep_in_thread`, en un hilo aparte, como el WAL.
+- `shutdown` deja de lanzar trabajos, pide a los barridos que paren en el siguiente tramo,
+  espera a los que están en curso y cancela los que no terminan a tiempo.
+
+Todos los métodos se llaman desde el event loop.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from services.metrics import MetricsRegistry, metrics_registry
+
+# Tiempo máximo que un barrido ocupa el event loop antes de ceder
+SLICE_SECONDS = 0.002
+# Pausa entre tramos: con el loop libre, lo que se despertó durante el tramo avanza sin esperar a otro
+SLICE_PAUSE = 0.001
+
+
+class Job:
+    """Trabajo programado: `func` es una corrutina sin argumentos que devuelve los elementos procesados (o None)"""
+
+    __slots__ = ("name", "func", "interval", "cancelled", "runs", "last_error")
+
+    def __init__(self, name: str, func: Callable[[], Awaitable[Optional[int]]], interval: Optional[float]):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.cancelled = False
+        self.runs = 0
+        self.last_error: Optional[str] = None
+
+
+class Scheduler:
+    """Planificador de trabajos con heap de pendientes y concurrencia limitada"""
+
+    def __init__(
+        self,
+        max_concurrency: int = 2,
+        slice_seconds: float = SLICE_SECONDS,
+        slice_pause: float = SLICE_PAUSE,
+        registry: MetricsRegistry = metrics_registry,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency debe ser al menos 1")
+        self.max_concurrency = max_concurrency
+        self.slice_seconds = slice_seconds
+        self.slice_pause = slice_pause
+        self.registry = registry
+        self.jobs: Dict[str, Job] = {}
+        # (instante en time.monotonic(), orden de llegada, trabajo)
+        self._heap: List[Tuple[float, int, Job]] = []
+        self._seq = itertools.count()
+        self._running: Set[asyncio.Task] = set()
+        self._dispatcher: Optional[asyncio.Task] = None
+        # Las primitivas de asyncio se crean en start(), dentro del loop que las usa
+        self._wakeup: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.stopping = False
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def pending(self) -> List[Tuple[str, float]]:
+        """(nombre, segundos hasta su ejecución) de los trabajos en espera, del más próximo al más lejano"""
+        now = time.monotonic()
+        return [(job.name, max(0.0, run_at - now)) for run_at, _, job in sorted(self._heap) if not job.cancelled]
+
+    def every(
+        self, name: str, interval: float, func: Callable[[], Awaitable[Optional[int]]], delay: Optional[float] = None
+    ) -> Job:
+        """Ejecutar `func` cada `interval` segundos (contados desde el final de la ejecución anterior)"""
+        if interval <= 0:
+            raise ValueError("interval debe ser positivo")
+        return self._add(Job(name, func, interval), interval if delay is None else delay)
+
+    def once(self, name: str, func: Callable[[], Awaitable[Optional[int]]], delay: float = 0.0) -> Job:
+        """Ejecutar `func` una vez dentro de `delay` segundos"""
+        return self._add(Job(name, func, None), delay)
+
+    def cancel(self, name: str) -> bool:
+        """Quitar un trabajo; si está en ejecución termina, pero no se vuelve a programar"""
+        job = self.jobs.pop(name, None)
+        if job is None:
+            return False
+        job.cancelled = True
+        return True
+
+    def _add(self, job: Job, delay: float) -> Job:
+        if job.name in self.jobs:
+            raise ValueError(f"ya hay un trabajo llamado {job.name}")
+        self.jobs[job.name] = job
+        self._push(job, time.monotonic() + delay)
+        return job
+
+    def _push(self, job: Job, run_at: float) -> None:
+        first = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (run_at, next(self._seq), job))
+        # Despertar al despachador solo si el nuevo trabajo va antes que el que está esperando
+        if self._wakeup is not None and (first is None or run_at < first):
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Empezar a despachar trabajos en el event loop actual"""
+        if self._dispatcher is not None:
+            raise RuntimeError("el planificador ya está en marcha")
+        self.stopping = False
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._dispatcher = asyncio.create_task(self._dispatch(), name="scheduler")
+
+    async def _dispatch(self) -> None:
+        while True:
+            delay = self._heap[0][0] - time.monotonic() if self._heap else None
+            if delay is None or delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            _, _, job = heapq.heappop(self._heap)
+            if job.cancelled:
+                continue
+            # Con todos los huecos ocupados, los trabajos vencidos esperan en el heap
+            await self._slots.acquire()
+            task = asyncio.create_task(self._execute(job), name=f"job:{job.name}")
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, job: Job) -> None:
+        registry = self.registry
+        registry.jobs_running.value += 1
+        outcome = "ok"
+        start = time.perf_counter()
+        try:
+            items = await job.func()
+            if items:
+                registry.job_items.inc(job.name, amount=items)
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception as exc:
+            # Un trabajo que falla no para el planificador: se cuenta y se reintenta en su siguiente turno
+            outcome = "error"
+            job.last_error = repr(exc)
+        finally:
+            job.runs += 1
+            registry.jobs_running.value -= 1
+            registry.job_runs.inc(job.name, outcome)
+            registry.job_duration.labels(job.name).observe(time.perf_counter() - start)
+            self._slots.release()
+            if job.interval is not None and not job.cancelled and not self.stopping:
+                self._push(job, time.monotonic() + job.interval)
+            elif self.jobs.get(job.name) is job and job.interval is None:
+                del self.jobs[job.name]
+
+    async def sweep(self, name: str, steps: Iterable[Optional[int]]) -> int:
+        """
+        Ejecutar un barrido por tramos: tantos pasos como quepan en `slice_seconds` y una pausa.
+        Cada paso devuelve los elementos que ha procesado. Al apagar se deja a medias; como
+        cada paso es un lote completo, el siguiente barrido continúa donde se quedó.
+        """
+        histogram = self.registry.job_slice.labels(name)
+        perf_counter = time.perf_counter
+        total = 0
+        start = perf_counter()
+        for count in steps:
+            total += count or 0
+            elapsed = perf_counter() - start
+            if elapsed >= self.slice_seconds:
+                histogram.observe(elapsed)
+                if self.stopping:
+                    break
+                await asyncio.sleep(self.slice_pause)
+                start = perf_counter()
+        else:
+            histogram.observe(perf_counter() - start)
+        return total
+
+    async def sweep_in_thread(self, name: str, steps: Iterable[Optional[int]]) -> int:
+        """
+        Como `sweep`, pero los pasos se ejecutan en un hilo aparte y no ocupan el event loop: para
+        barridos que escriben en disco. Al apagar se para tras el paso en curso.
+        """
+        def run() -> int:
+            total = 0
+            for count in steps:
+                total += count or 0
+                if self.stopping:
+                    break
+            return total
+
+        return await asyncio.to_thread(run)
+
+    async def shutdown(self, timeout: float = 10.0) -> None:
+        """Dejar de lanzar trabajos, esperar hasta `timeout` a los que están en curso y cancelar el resto"""
+        self.stopping = True
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        running = set(self._running)
+        if running:
+            _, late = await asyncio.wait(running, timeout=timeout)
+            for task in late:
+                task.cancel()
+            await asyncio.gather(*late, return_exceptions=True)
+        self._heap.clear()
+        self.jobs.clear()
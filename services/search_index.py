@@ -0,0 +1,287 @@
+"""
+Índice invertido en memoria para buscar tareas por título y descripción.
+
+Los textos se normalizan sin mayúsculas ni tildes ("Canción" -> "cancion") y se
+parten en palabras alfanuméricas, igual que el tokenizador unicode61 de SQLite FTS5.
+Cada palabra de la consulta se busca como prefijo y todas tienen que aparecer; el
+resultado se ordena por BM25, con las palabras del título pesando el doble.
+
+Cada posting es un entero de 64 bits en un array: id de la tarea, longitud del
+documento y frecuencia del término empaquetados (id << 12 | longitud << 4 | tf), así
+que un posting ocupa 8 bytes y las listas quedan ordenadas por id.
+
+La puntuación de un término en una tarea solo depende de esos 12 bits de (longitud,
+tf). Los términos muy frecuentes guardan además sus ids agrupados por esos 12 bits:
+una búsqueda de una sola palabra común toma los mejores grupos sin recorrer los
+cientos de miles de postings. Con varias palabras se parte de la más selectiva y el
+resto solo se consulta para esos candidatos.
+"""
+
+import math
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from functools import lru_cache
+from heapq import nlargest
+from typing import Dict, Iterable, List, Optional, Tuple
+from services.task_record import TaskRecord
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+TITLE_WEIGHT = 2
+# Parámetros de BM25
+K1 = 1.2
+B = 0.75
+# Peso de un término que solo coincide por prefijo respecto a una coincidencia exacta
+PREFIX_WEIGHT = 0.8
+# Términos como mucho por prefijo (los más frecuentes), para que "a" no recorra todo el vocabulario
+MAX_PREFIX_TERMS = 64
+# Postings a partir de los que un término mantiene también sus ids agrupados por (longitud, tf)
+IMPACT_THRESHOLD = 2048
+
+TF_BITS = 4
+LENGTH_BITS = 8
+MAX_TF = (1 << TF_BITS) - 1
+MAX_LENGTH = (1 << LENGTH_BITS) - 1
+ID_SHIFT = TF_BITS + LENGTH_BITS
+STATS_MASK = (1 << ID_SHIFT) - 1
+
+
+@lru_cache(maxsize=1 << 16)
+def fold(token: str) -> str:
+    """Palabra en minúsculas y sin tildes ni diacríticos (las palabras se repiten mucho: se cachea)"""
+    token = token.casefold()
+    if token.isascii():
+        return token
+    return "".join(c for c in unicodedata.normalize("NFKD", token) if not unicodedata.combining(c))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [fold(token) for token in TOKEN_RE.findall(text)] if text else []
+
+
+def term_frequencies(title: str, description: Optional[str]) -> Tuple[Dict[str, int], int]:
+    """Frecuencia ponderada de cada término de una tarea y longitud del documento"""
+    counts: Dict[str, int] = {}
+    for token in tokenize(title):
+        counts[token] = counts.get(token, 0) + TITLE_WEIGHT
+    for token in tokenize(description):
+        counts[token] = counts.get(token, 0) + 1
+    return counts, min(sum(counts.values()), MAX_LENGTH)
+
+
+def _insert_sorted(values: array, value: int) -> None:
+    if not values or values[-1] < value:
+        # Caso habitual: los ids son crecientes
+        values.append(value)
+    else:
+        values.insert(bisect_left(values, value), value)
+
+
+def _group_by_impact(postings: array) -> Dict[int, array]:
+    groups: Dict[int, array] = {}
+    for posting in postings:
+        stats = posting & STATS_MASK
+        group = groups.get(stats)
+        if group is None:
+            group = groups[stats] = array("q")
+        group.append(posting >> ID_SHIFT)
+    return groups
+
+
+class Saturation(dict):
+    """Parte de BM25 que depende de (longitud, tf), calculada una vez por combinación y búsqueda"""
+
+    def __init__(self, average_length: float):
+        super().__init__()
+        self.average_length = average_length
+
+    def __missing__(self, stats: int) -> float:
+        tf, length = stats & MAX_TF, stats >> TF_BITS
+        value = self[stats] = tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / self.average_length))
+        return value
+
+
+class UserSearchIndex:
+    """Índice invertido de las tareas de un usuario"""
+
+    __slots__ = ("postings", "impacts", "terms", "docs", "total_length")
+
+    def __init__(self):
+        self.postings: Dict[str, array] = {}
+        # término frecuente -> (longitud, tf) -> ids ordenados
+        self.impacts: Dict[str, Dict[int, array]] = {}
+        # Vocabulario ordenado, para buscar por prefijo con bisect
+        self.terms: List[str] = []
+        self.docs = 0
+        self.total_length = 0
+
+    @classmethod
+    def build(cls, tasks: Iterable[TaskRecord]) -> "UserSearchIndex":
+        """Construir el índice de golpe a partir de tareas en orden de id"""
+        index = cls()
+        postings: Dict[str, List[int]] = {}
+        for task in tasks:
+            counts, length = term_frequencies(task.title, task.description)
+            base = task.id << ID_SHIFT | length << TF_BITS
+            for term, tf in counts.items():
+                entries = postings.get(term)
+                if entries is None:
+                    entries = postings[term] = []
+                entries.append(base | min(tf, MAX_TF))
+            index.docs += 1
+            index.total_length += length
+        for term, entries in postings.items():
+            index.postings[term] = values = array("q", entries)
+            if len(values) >= IMPACT_THRESHOLD:
+                index.impacts[term] = _group_by_impact(values)
+        index.terms = sorted(postings)
+        return index
+
+    def add(self, task: TaskRecord) -> None:
+        counts, length = term_frequencies(task.title, task.description)
+        base = task.id << ID_SHIFT | length << TF_BITS
+        for term, tf in counts.items():
+            posting = base | min(tf, MAX_TF)
+            postings = self.postings.get(term)
+            if postings is None:
+                self.postings[term] = array("q", (posting,))
+                insort(self.terms, term)
+                continue
+            _insert_sorted(postings, posting)
+            groups = self.impacts.get(term)
+            if groups is not None:
+                group = groups.get(posting & STATS_MASK)
+                if group is None:
+                    group = groups[posting & STATS_MASK] = array("q")
+                _insert_sorted(group, task.id)
+            elif len(postings) >= IMPACT_THRESHOLD:
+                self.impacts[term] = _group_by_impact(postings)
+        self.docs += 1
+        self.total_length += length
+
+    def remove(self, task: TaskRecord) -> None:
+        """Quitar una tarea; `task` debe tener todavía el texto con el que se indexó"""
+        counts, length = term_frequencies(task.title, task.description)
+        start = task.id << ID_SHIFT
+        for term in counts:
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            i = bisect_left(postings, start)
+            if i == len(postings) or postings[i] >> ID_SHIFT != task.id:
+                continue
+            stats = postings[i] & STATS_MASK
+            del postings[i]
+            if not postings:
+                del self.postings[term]
+                del self.terms[bisect_left(self.terms, term)]
+            groups = self.impacts.get(term)
+            if groups is None:
+                continue
+            if len(postings) < IMPACT_THRESHOLD // 2:
+                del self.impacts[term]
+                continue
+            group = groups[stats]
+            del group[bisect_left(group, task.id)]
+            if not group:
+                del groups[stats]
+        self.docs -= 1
+        self.total_length -= length
+
+    def expand(self, prefix: str) -> List[str]:
+        """Términos del vocabulario que empiezan por `prefix`"""
+        terms = self.terms
+        i = bisect_left(terms, prefix)
+        matches = []
+        while i < len(terms) and terms[i].startswith(prefix):
+            matches.append(terms[i])
+            i += 1
+        if len(matches) > MAX_PREFIX_TERMS:
+            matches = nlargest(MAX_PREFIX_TERMS, matches, key=lambda term: (term == prefix, len(self.postings[term])))
+        return matches
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[float, int]]:
+        """(puntuación, id) de las tareas que contienen todas las palabras de `query`, de más a menos relevante"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or not self.docs:
+            return []
+        saturation = Saturation(self.total_length / self.docs or 1.0)
+
+        plans = []
+        for token in tokens:
+            terms = self.expand(token)
+            if not terms:
+                return []
+            plans.append((sum(len(self.postings[term]) for term in terms), token, terms))
+        plans.sort()
+
+        if len(plans) == 1:
+            return self._top_single(self._weights(plans[0][1], plans[0][2]), saturation, limit)
+
+        # Varias palabras: candidatos de la más selectiva, el resto solo se consulta para ellos
+        _, token, terms = plans[0]
+        result = self._scores(self._weights(token, terms), saturation)
+        for _, token, terms in plans[1:]:
+            scores = self._scores(self._weights(token, terms), saturation, result)
+            result = {task_id: score + scores[task_id] for task_id, score in result.items() if task_id in scores}
+            if not result:
+                return []
+        return nlargest(limit, ((score, task_id) for task_id, score in result.items()))
+
+    def _weights(self, token: str, terms: List[str]) -> List[Tuple[str, float]]:
+        """IDF de cada término en que se expande `token`, rebajado si solo coincide por prefijo"""
+        docs = self.docs
+        weights = []
+        for term in terms:
+            df = len(self.postings[term])
+            idf = math.log(1 + (docs - df + 0.5) / (df + 0.5))
+            weights.append((term, idf if term == token else idf * PREFIX_WEIGHT))
+        return weights
+
+    def _scores(
+        self, weights: List[Tuple[str, float]], saturation: Saturation, candidates: Optional[dict] = None
+    ) -> Dict[int, float]:
+        """Puntuación de una palabra por tarea (la mejor de sus términos), opcionalmente solo para `candidates`"""
+        scores: Dict[int, float] = {}
+        for term, weight in weights:
+            postings = self.postings[term]
+            if candidates is not None and len(candidates) * 20 < len(postings):
+                # Pocos candidatos: buscarlos con bisect sale más barato que recorrer el término
+                entries = []
+                for task_id in candidates:
+                    i = bisect_left(postings, task_id << ID_SHIFT)
+                    if i < len(postings) and postings[i] >> ID_SHIFT == task_id:
+                        entries.append(postings[i])
+            else:
+                entries = postings
+            for posting in entries:
+                task_id = posting >> ID_SHIFT
+                if candidates is not None and task_id not in candidates:
+                    continue
+                value = weight * saturation[posting & STATS_MASK]
+                if value > scores.get(task_id, 0.0):
+                    scores[task_id] = value
+        return scores
+
+    def _top_single(
+        self, weights: List[Tuple[str, float]], saturation: Saturation, limit: int
+    ) -> List[Tuple[float, int]]:
+        """Mejores tareas para una sola palabra, recorriendo los grupos (longitud, tf) de mayor a menor puntuación"""
+        groups = []
+        for term, weight in weights:
+            by_impact = self.impacts.get(term) or _group_by_impact(self.postings[term])
+            groups.extend((weight * saturation[stats], ids) for stats, ids in by_impact.items())
+        groups.sort(key=lambda group: group[0], reverse=True)
+
+        # La primera vez que aparece una tarea es con su mejor término, porque los grupos van en orden
+        found: Dict[int, float] = {}
+        for value, ids in groups:
+            if len(found) >= limit:
+                break
+            for task_id in reversed(ids):
+                if task_id not in found:
+                    found[task_id] = value
+                    if len(found) >= limit:
+                        break
+        return [(value, task_id) for task_id, value in found.items()]
@@ -0,0 +1,552 @@
+"""
+Backend SQLite (modo WAL) para TaskService y AuthService.
+
+Varios procesos de uvicorn pueden compartir el mismo fichero: los ids se
+reservan dentro de transacciones `BEGIN IMMEDIATE`, así que no se repiten
+entre workers.
+
+El driver sqlite3 es bloqueante y se llama desde el hilo del event loop, así que la
+espera por el lock de escritura de otro worker (busy_timeout) es corta: si se agota,
+se lanza StorageBusyError y la API responde 503 en lugar de congelar el loop.
+"""
+
+import os
+import queue
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+from models.task import Task, TaskFilter, TaskSort, TaskStatus
+from services.concurrency import UserLocks
+from services.search_index import TITLE_WEIGHT, tokenize
+from services.task_stats import UserTaskStats
+from services.user_directory import email_key
+
+POOL_SIZE = 4
+# Sentencias preparadas que sqlite3 mantiene en caché por conexión
+CACHED_STATEMENTS = 256
+# Parámetros por sentencia en consultas IN (...)
+MAX_PARAMS = 900
+# Milisegundos que una conexión espera el lock de escritura antes de StorageBusyError
+BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "100"))
+STARTUP_BUSY_TIMEOUT_MS = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_tasks_user_id ON tasks (user_id, id);
+CREATE INDEX IF NOT EXISTS ix_tasks_user_status ON tasks (user_id, status, id);
+CREATE INDEX IF NOT EXISTS ix_tasks_user_priority ON tasks (user_id, priority, id);
+CREATE INDEX IF NOT EXISTS ix_tasks_user_updated ON tasks (user_id, updated_at, id);
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    title, description, content='tasks', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks
+WHEN old.title IS NOT new.title OR old.description IS NOT new.description BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO tasks_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+CREATE TABLE IF NOT EXISTS task_counts (
+    user_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (user_id, status, priority)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS task_daily (
+    user_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    updated INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    PRIMARY KEY (user_id, day)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS task_stats_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO task_counts (user_id, status, priority, count) VALUES (new.user_id, new.status, new.priority, 1)
+        ON CONFLICT (user_id, status, priority) DO UPDATE SET count = count + 1;
+    INSERT INTO task_daily (user_id, day, updated, completed)
+        VALUES (new.user_id, substr(new.updated_at, 1, 10), 1, new.status = 'completed')
+        ON CONFLICT (user_id, day) DO UPDATE SET updated = updated + 1, completed = completed + excluded.completed;
+END;
+CREATE TRIGGER IF NOT EXISTS task_stats_delete AFTER DELETE ON tasks BEGIN
+    UPDATE task_counts SET count = count - 1
+        WHERE user_id = old.user_id AND status = old.status AND priority = old.priority;
+    UPDATE task_daily SET updated = updated - 1, completed = completed - (old.status = 'completed')
+        WHERE user_id = old.user_id AND day = substr(old.updated_at, 1, 10);
+END;
+CREATE TRIGGER IF NOT EXISTS task_stats_update AFTER UPDATE OF status, priority, updated_at ON tasks BEGIN
+    UPDATE task_counts SET count = count - 1
+        WHERE user_id = old.user_id AND status = old.status AND priority = old.priority;
+    UPDATE task_daily SET updated = updated - 1, completed = completed - (old.status = 'completed')
+        WHERE user_id = old.user_id AND day = substr(old.updated_at, 1, 10);
+    INSERT INTO task_counts (user_id, status, priority, count) VALUES (new.user_id, new.status, new.priority, 1)
+        ON CONFLICT (user_id, status, priority) DO UPDATE SET count = count + 1;
+    INSERT INTO task_daily (user_id, day, updated, completed)
+        VALUES (new.user_id, substr(new.updated_at, 1, 10), 1, new.status = 'completed')
+        ON CONFLICT (user_id, day) DO UPDATE SET updated = updated + 1, completed = completed + excluded.completed;
+END;
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    email TEXT NOT NULL,
+    email_key TEXT NOT NULL UNIQUE,
+    full_name TEXT,
+    hashed_password TEXT NOT NULL,
+    is_active INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+"""
+
+STATS_BACKFILL = """
+BEGIN IMMEDIATE;
+DELETE FROM task_counts;
+DELETE FROM task_daily;
+INSERT INTO task_counts (user_id, status, priority, count)
+    SELECT user_id, status, priority, COUNT(*) FROM tasks GROUP BY user_id, status, priority;
+INSERT INTO task_daily (user_id, day, updated, completed)
+    SELECT user_id, substr(updated_at, 1, 10), COUNT(*), SUM(status = 'completed')
+    FROM tasks GROUP BY user_id, substr(updated_at, 1, 10);
+COMMIT;
+"""
+
+TASK_COLUMNS = "id, user_id, title, description, status, priority, created_at, updated_at"
+# Columna de orden y dirección de cada TaskSort
+SORT_COLUMNS = {
+    TaskSort.ID: ("id", "ASC"),
+    TaskSort.ID_DESC: ("id", "DESC"),
+    TaskSort.PRIORITY: ("priority", "ASC"),
+    TaskSort.PRIORITY_DESC: ("priority", "DESC"),
+    TaskSort.UPDATED_AT: ("updated_at", "ASC"),
+    TaskSort.UPDATED_AT_DESC: ("updated_at", "DESC"),
+}
+USER_COLUMNS = "id, username, email, full_name, hashed_password, is_active, created_at"
+
+
+class StorageBusyError(Exception):
+    """Otro proceso tiene el lock de escritura más de busy_timeout; el cliente debe reintentar"""
+
+
+def _is_busy(exc: sqlite3.OperationalError) -> bool:
+    # SQLITE_BUSY / SQLITE_LOCKED (sqlite_errorcode solo existe desde Python 3.11)
+    return str(exc).startswith(("database is locked", "database table is locked"))
+
+
+class SQLitePool:
+    """Pool de conexiones SQLite en modo WAL compartible entre hilos"""
+
+    def __init__(self, path: str, size: int = POOL_SIZE, busy_timeout_ms: int = BUSY_TIMEOUT_MS):
+        self.path = path
+        self._connections: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(size):
+            self._connections.put(self._connect())
+        with self.connection() as conn:
+            existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+            conn.executescript(SCHEMA)
+            # Base de datos anterior al índice de búsqueda o a las estadísticas: se calculan con las tareas existentes
+            if "tasks_fts" not in existing:
+                conn.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+            if "task_counts" not in existing:
+                conn.executescript(STATS_BACKFILL)
+        # Creado el esquema, las peticiones esperan el lock de escritura solo busy_timeout_ms
+        for conn in self._connections.queue:
+            conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: las transacciones se abren explícitamente
+        conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None, cached_statements=CACHED_STATEMENTS
+        )
+        conn.row_factory = sqlite3.Row
+        # Al arrancar (varios workers creando el esquema a la vez) no hay peticiones esperando: se espera más
+        conn.execute(f"PRAGMA busy_timeout={STARTUP_BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connections.get()
+        try:
+            yield conn
+        except sqlite3.OperationalError as exc:
+            if _is_busy(exc):
+                raise StorageBusyError(str(exc)) from exc
+            raise
+        finally:
+            self._connections.put(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Transacción de escritura; toma el lock de escritura desde el inicio"""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def allocate_id(self, counter: str, table: str) -> int:
+        """Reservar el siguiente id de `table` de forma atómica entre procesos"""
+        return self.allocate_ids(counter, table, 1)[0]
+
+    def allocate_ids(self, counter: str, table: str, count: int) -> range:
+        """Reservar `count` ids consecutivos de `table` de forma atómica entre procesos"""
+        with self.transaction() as conn:
+            row = conn.execute(
+                "UPDATE counters SET value = value + ? WHERE name = ? RETURNING value", (count, counter)
+            ).fetchone()
+            if row is None:
+                # Primer uso: se parte del mayor id ya guardado
+                start = conn.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+                conn.execute("INSERT INTO counters (name, value) VALUES (?, ?)", (counter, start + count - 1))
+                return range(start, start + count)
+            return range(row[0] - count + 1, row[0] + 1)
+
+    def close(self) -> None:
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+
+def _local_iso(value: datetime) -> str:
+    """Las fechas de las tareas se guardan en hora local naive; se normaliza el filtro igual"""
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value.isoformat()
+
+
+def _task_from_row(row: sqlite3.Row) -> Task:
+    return Task(**dict(row))
+
+
+def _task_params(task: Task) -> tuple:
+    return (
+        task.id, task.user_id, task.title, task.description, task.status.value,
+        task.priority, task.created_at.isoformat(), task.updated_at.isoformat(),
+    )
+
+
+class SQLiteTaskStore:
+    """Almacén de tareas sobre SQLite con la misma interfaz que TaskStore"""
+
+    def __init__(self, pool: SQLitePool):
+        self.pool = pool
+        # Cada escritura es una transacción; el lock solo ordena las operaciones de TaskService en este proceso
+        self._users = UserLocks()
+
+    def user_lock(self, user_id: int) -> ContextManager:
+        return self._users.lock(user_id)
+
+    def __len__(self) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def allocate_id(self) -> int:
+        return self.pool.allocate_id("tasks", "tasks")
+
+    def allocate_ids(self, count: int) -> range:
+        return self.pool.allocate_ids("tasks", "tasks", count)
+
+    def add(self, task: Task) -> None:
+        self.add_many([task])
+
+    def add_many(self, tasks: List[Task]) -> None:
+        """Insertar un lote de tareas en una sola transacción"""
+        with self.pool.transaction() as conn:
+            conn.executemany(
+                f"INSERT INTO tasks ({TASK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [_task_params(t) for t in tasks]
+            )
+
+    def get_many(self, task_ids: List[int]) -> Dict[int, Task]:
+        """Obtener varias tareas por id; las que no existen no aparecen en el resultado"""
+        with self.pool.connection() as conn:
+            return self._select_many(conn, task_ids)
+
+    @staticmethod
+    def _select_many(conn: sqlite3.Connection, task_ids: List[int]) -> Dict[int, Task]:
+        result = {}
+        # SQLite limita el número de parámetros por sentencia
+        for i in range(0, len(task_ids), MAX_PARAMS):
+            chunk = task_ids[i:i + MAX_PARAMS]
+            rows = conn.execute(
+                f"SELECT {TASK_COLUMNS} FROM tasks WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            result.update((row["id"], _task_from_row(row)) for row in rows)
+        return result
+
+    def get(self, task_id: int) -> Optional[Task]:
+        with self.pool.connection() as conn:
+            row = conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return _task_from_row(row) if row is not None else None
+
+    def update(self, task: Task) -> None:
+        self.update_many([task])
+
+    def update_many(self, tasks: List[Task]) -> None:
+        """Guardar un lote de tareas modificadas en una sola transacción"""
+        with self.pool.transaction() as conn:
+            self._write_many(conn, tasks)
+
+    @staticmethod
+    def _write_many(conn: sqlite3.Connection, tasks: List[Task]) -> None:
+        conn.executemany(
+            "UPDATE tasks SET title = ?, description = ?, status = ?, priority = ?, updated_at = ? WHERE id = ?",
+            [(t.title, t.description, t.status.value, t.priority, t.updated_at.isoformat(), t.id) for t in tasks],
+        )
+
+    def update_fields(
+        self, task_id: int, changes: dict, check: Optional[Callable[[Task], None]] = None
+    ) -> Optional[Task]:
+        """Como TaskStore.update_fields; `check` se ejecuta dentro de la transacción, entre la lectura y la escritura"""
+        with self.pool.transaction() as conn:
+            current = self._select_many(conn, [task_id]).get(task_id)
+            if current is None:
+                return None
+            if check is not None:
+                check(current)
+            task = current.model_copy(update=changes)
+            self._write_many(conn, [task])
+        return task
+
+    def update_fields_many(self, changes: List[Tuple[int, dict]]) -> List[Task]:
+        """
+        Aplicar cambios de campos a un lote de tareas; las que no existen se ignoran.
+        Se leen y se escriben en la misma transacción: un cambio que otro worker confirme
+        entre medias no se pisa con la copia leída antes.
+        """
+        with self.pool.transaction() as conn:
+            current = self._select_many(conn, list(dict.fromkeys(task_id for task_id, _ in changes)))
+            for task_id, fields in changes:
+                if task_id in current:
+                    current[task_id] = current[task_id].model_copy(update=fields)
+            tasks = list(current.values())
+            self._write_many(conn, tasks)
+        return tasks
+
+    def remove_many(self, task_ids: List[int]) -> None:
+        """Eliminar un lote de tareas en una sola transacción"""
+        with self.pool.transaction() as conn:
+            conn.executemany("DELETE FROM tasks WHERE id = ?", [(task_id,) for task_id in task_ids])
+
+    def remove(self, task_id: int, check: Optional[Callable[[Task], None]] = None) -> Optional[Task]:
+        with self.pool.transaction() as conn:
+            if check is not None:
+                current = self._select_many(conn, [task_id]).get(task_id)
+                if current is None:
+                    return None
+                check(current)
+            row = conn.execute(f"DELETE FROM tasks WHERE id = ? RETURNING {TASK_COLUMNS}", (task_id,)).fetchone()
+        return _task_from_row(row) if row is not None else None
+
+    def list_by_user(self, user_id: int, skip: int = 0, limit: int = 100) -> List[Task]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f"SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = ? ORDER BY id LIMIT ? OFFSET ?",
+                (user_id, limit, skip),
+            ).fetchall()
+        return [_task_from_row(row) for row in rows]
+
+    def list_by_user_after(self, user_id: int, after_id: int, limit: int = 100) -> List[Task]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f"SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (user_id, after_id, limit),
+            ).fetchall()
+        return [_task_from_row(row) for row in rows]
+
+    def query(
+        self, user_id: int, task_filter: TaskFilter, after: Optional[tuple] = None, limit: int = 100
+    ) -> List[Task]:
+        """Listar tareas filtradas y ordenadas; `after` es la clave (valor, id) de la página anterior"""
+        f = task_filter
+        where, params = ["user_id = ?"], [user_id]
+        if f.status:
+            where.append(f"status IN ({', '.join('?' * len(f.status))})")
+            params.extend(status.value for status in f.status)
+        for column, op, value in (
+            ("priority", ">=", f.priority_min),
+            ("priority", "<=", f.priority_max),
+            ("created_at", ">=", f.created_from and _local_iso(f.created_from)),
+            ("created_at", "<=", f.created_to and _local_iso(f.created_to)),
+            ("updated_at", ">=", f.updated_from and _local_iso(f.updated_from)),
+            ("updated_at", "<=", f.updated_to and _local_iso(f.updated_to)),
+        ):
+            if value is not None:
+                where.append(f"{column} {op} ?")
+                params.append(value)
+
+        column, direction = SORT_COLUMNS[f.sort]
+        if after is not None:
+            op = ">" if direction == "ASC" else "<"
+            if column == "id":
+                where.append(f"id {op} ?")
+                params.append(after[1])
+            else:
+                where.append(f"({column}, id) {op} (?, ?)")
+                params.extend(after)
+
+        order = f"{column} {direction}" if column == "id" else f"{column} {direction}, id {direction}"
+        sql = f"SELECT {TASK_COLUMNS} FROM tasks WHERE {' AND '.join(where)} ORDER BY {order} LIMIT ?"
+        with self.pool.connection() as conn:
+            rows = conn.execute(sql, (*params, limit)).fetchall()
+        return [_task_from_row(row) for row in rows]
+
+    def search(self, user_id: int, query: str, limit: int = 20) -> List[Task]:
+        """Búsqueda con FTS5: todas las palabras como prefijo, ordenadas por BM25 (el título pesa más)"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        match = " ".join(f'"{token}"*' for token in tokens)
+        columns = ", ".join(f"t.{column}" for column in TASK_COLUMNS.split(", "))
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f"SELECT {columns} FROM tasks_fts JOIN tasks t ON t.id = tasks_fts.rowid "
+                f"WHERE tasks_fts MATCH ? AND t.user_id = ? ORDER BY bm25(tasks_fts, {TITLE_WEIGHT}.0, 1.0) LIMIT ?",
+                (match, user_id, limit),
+            ).fetchall()
+        return [_task_from_row(row) for row in rows]
+
+    def count_by_user(self, user_id: int) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM tasks WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+
+class SQLiteCollectionVersions:
+    """Versión de la colección de tareas de cada usuario en la tabla counters, compartida entre workers"""
+
+    def __init__(self, pool: SQLitePool):
+        self.pool = pool
+
+    def get(self, user_id: int) -> str:
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT value FROM counters WHERE name = ?", (f"tasks_version:{user_id}",)).fetchone()
+        return f"s.{row[0] if row is not None else 0}"
+
+    def bump(self, user_id: int) -> None:
+        with self.pool.transaction() as conn:
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, 1) ON CONFLICT (name) DO UPDATE SET value = value + 1",
+                (f"tasks_version:{user_id}",),
+            )
+
+
+class SQLiteTaskStats:
+    """Estadísticas de tareas por usuario en tablas que mantienen triggers de SQLite, compartidas entre workers"""
+
+    # Los triggers registran cada cambio en la misma transacción: TaskService no tiene que avisar
+    incremental = False
+
+    def __init__(self, pool: SQLitePool):
+        self.pool = pool
+
+    def tracks(self, user_id: int) -> bool:
+        return False
+
+    def get(self, user_id: int, since: Optional[date] = None) -> UserTaskStats:
+        stats = UserTaskStats()
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT status, priority, count FROM task_counts WHERE user_id = ? AND count > 0", (user_id,)
+            ).fetchall()
+            stats.counts = {(TaskStatus(row[0]), row[1]): row[2] for row in rows}
+            rows = conn.execute(
+                "SELECT day, updated, completed FROM task_daily WHERE user_id = ? AND day >= ? AND updated > 0",
+                (user_id, since.isoformat() if since else ""),
+            ).fetchall()
+            stats.daily = {date.fromisoformat(row[0]): [row[1], row[2]] for row in rows}
+        return stats
+
+
+def _user_from_row(row: sqlite3.Row) -> dict:
+    user = dict(row)
+    user["is_active"] = bool(user["is_active"])
+    user["created_at"] = datetime.fromisoformat(user["created_at"])
+    return user
+
+
+class SQLiteUserDirectory:
+    """Directorio de usuarios sobre SQLite con la misma interfaz que UserDirectory"""
+
+    def __init__(self, pool: SQLitePool):
+        self.pool = pool
+
+    def __len__(self) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def __iter__(self):
+        with self.pool.connection() as conn:
+            rows = conn.execute(f"SELECT {USER_COLUMNS} FROM users ORDER BY id").fetchall()
+        return iter([_user_from_row(row) for row in rows])
+
+    def allocate_id(self) -> int:
+        return self.pool.allocate_id("users", "users")
+
+    def add(self, user: dict) -> None:
+        """Registrar un usuario; lanza ValueError si el username o el email ya existen"""
+        try:
+            with self.pool.transaction() as conn:
+                conn.execute(
+                    f"INSERT INTO users ({USER_COLUMNS}, email_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        user["id"], user["username"], user["email"], user["full_name"], user["hashed_password"],
+                        int(user["is_active"]), user["created_at"].isoformat(), email_key(user["email"]),
+                    ),
+                )
+        except sqlite3.IntegrityError as exc:
+            raise ValueError(str(exc)) from exc
+
+    def _get_where(self, column: str, value) -> Optional[dict]:
+        with self.pool.connection() as conn:
+            row = conn.execute(f"SELECT {USER_COLUMNS} FROM users WHERE {column} = ?", (value,)).fetchone()
+        return _user_from_row(row) if row is not None else None
+
+    def get(self, user_id: int) -> Optional[dict]:
+        return self._get_where("id", user_id)
+
+    def get_by_username(self, username: str) -> Optional[dict]:
+        return self._get_where("username", username)
+
+    def get_by_email(self, email: str) -> Optional[dict]:
+        return self._get_where("email_key", email_key(email))
+
+    def update(self, user_id: int, changes: dict) -> Optional[dict]:
+        """Aplicar cambios a un usuario; lanza ValueError si choca con otro usuario"""
+        user = self.get(user_id)
+        if user is None:
+            return None
+        user.update(changes)
+        try:
+            with self.pool.transaction() as conn:
+                conn.execute(
+                    "UPDATE users SET username = ?, email = ?, email_key = ?, full_name = ?, is_active = ? WHERE id = ?",
+                    (
+                        user["username"], user["email"], email_key(user["email"]), user["full_name"],
+                        int(user["is_active"]), user_id,
+                    ),
+                )
+        except sqlite3.IntegrityError as exc:
+            raise ValueError(str(exc)) from exc
+        return user
+
+    def deactivate(self, user_id: int) -> Optional[dict]:
+        """Marcar un usuario como inactivo"""
+        return self.update(user_id, {"is_active": False})
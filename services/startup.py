@@ -0,0 +1,53 @@
+"""
+Arranque de la app: qué se carga al importarla y qué en el primer uso.
+
+python-jose (con el backend de cryptography) y passlib con bcrypt no se importan al
+importar main: se cargan con el primer token o la primera contraseña. Con
+STARTUP_MODE=eager se cargan en el lifespan, antes de atender peticiones (la
+primera petición no paga la carga); con STARTUP_MODE=lazy el proceso está listo
+antes y la paga el primer uso, que es lo que interesa cuando se arrancan muchos
+workers o contenedores en frío.
+
+El esquema OpenAPI lo genera FastAPI en la primera petición a /openapi.json o /docs.
+Con OPENAPI_SCHEMA_PATH se sirve el generado al construir la imagen
+(python build_openapi.py), sin recorrer las rutas ni los modelos.
+"""
+
+import json
+import os
+import time
+from typing import Dict
+from fastapi import FastAPI
+from services.auth_service import jose_jwt
+from services.password_hasher import password_context
+
+STARTUP_MODES = ("eager", "lazy")
+
+
+def warm_up(app: FastAPI) -> Dict[str, float]:
+    """Cargar ya lo que en modo lazy espera al primer uso; devuelve los segundos de cada paso"""
+    timings = {}
+    for name, step in (("jwt", jose_jwt), ("bcrypt", password_context), ("openapi", app.openapi)):
+        start = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def use_prebuilt_openapi(app: FastAPI, path: str) -> None:
+    """Servir el esquema OpenAPI desde `path` si existe, en lugar de generarlo en la primera petición"""
+    generate = app.openapi
+
+    def openapi() -> dict:
+        if app.openapi_schema is None and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                app.openapi_schema = json.load(f)
+        return generate()
+
+    app.openapi = openapi
+
+
+def write_openapi(app: FastAPI, path: str) -> None:
+    """Generar el esquema OpenAPI de `app` y guardarlo en `path`"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(app.openapi(), f, ensure_ascii=False, separators=(",", ":"))
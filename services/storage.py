@@ -0,0 +1,59 @@
+import os
+from typing import Optional, Union
+from services.archive import ARCHIVE_FILE, TaskArchive
+from services.auth_service import auth_service_instance
+from services.persistence import Persistence
+from services.sqlite_store import (
+    SQLiteCollectionVersions, SQLitePool, SQLiteTaskStats, SQLiteTaskStore, SQLiteUserDirectory
+)
+from services.task_service import task_service_instance
+from services.task_stats import TaskStats
+from services.task_store import TaskStore
+from services.task_versions import CollectionVersions
+from services.user_directory import UserDirectory
+
+# Con almacenamiento compartido, segundos que un token verificado se reutiliza sin releer el usuario
+SHARED_TOKEN_CACHE_TTL = 5.0
+
+
+def configure_storage(
+    backend: str = "memory", sqlite_path: str = "tasks.db", data_dir: Optional[str] = None, fsync: bool = True
+) -> Optional[Union[SQLitePool, Persistence]]:
+    """
+    Elegir el backend de TaskService y AuthService: "memory" o "sqlite".
+    Con "memory" y `data_dir`, los datos se recuperan de ese directorio y cada cambio se registra en su WAL.
+    El archivo de tareas completadas solo existe con "memory" (en SQLite las tareas ya están en disco).
+    Devuelve el recurso a cerrar al apagar (pool de SQLite o Persistence), o None.
+    """
+    # El archivo anterior (si se reconfigura el almacenamiento) se cierra: su fichero temporal se borra
+    if task_service_instance.archive is not None:
+        task_service_instance.archive.close()
+        task_service_instance.archive = None
+
+    if backend == "memory":
+        persistence = None
+        if data_dir:
+            persistence = Persistence(data_dir, fsync=fsync)
+            task_service_instance.store, auth_service_instance.users = persistence.open()
+        else:
+            task_service_instance.store = TaskStore()
+            auth_service_instance.users = UserDirectory()
+        task_service_instance.versions = CollectionVersions()
+        task_service_instance.stats = TaskStats()
+        # Sin data_dir el archivo va a un fichero temporal: los ids empiezan de nuevo en cada arranque
+        task_service_instance.archive = TaskArchive(os.path.join(data_dir, ARCHIVE_FILE) if data_dir else None, fsync)
+        auth_service_instance.token_cache.max_ttl = None
+        auth_service_instance.token_cache.clear()
+        return persistence
+
+    if backend == "sqlite":
+        pool = SQLitePool(sqlite_path)
+        task_service_instance.store = SQLiteTaskStore(pool)
+        auth_service_instance.users = SQLiteUserDirectory(pool)
+        task_service_instance.versions = SQLiteCollectionVersions(pool)
+        task_service_instance.stats = SQLiteTaskStats(pool)
+        auth_service_instance.token_cache.max_ttl = SHARED_TOKEN_CACHE_TTL
+        auth_service_instance.token_cache.clear()
+        return pool
+
+    raise ValueError(f"backend de almacenamiento desconocido: {backend}")
@@ -0,0 +1,44 @@
+import csv
+import io
+import json
+from enum import Enum
+from typing import AsyncIterator, Iterable, List
+from models.task import Task
+
+EXPORT_FIELDS = ("id", "user_id", "title", "description", "status", "priority", "created_at", "updated_at")
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+def task_row(task: Task) -> tuple:
+    """Valores de una tarea en el orden de EXPORT_FIELDS, sin pasar por el modelo de respuesta"""
+    return (
+        task.id, task.user_id, task.title, task.description, task.status.value,
+        task.priority, task.created_at.isoformat(), task.updated_at.isoformat(),
+    )
+
+
+async def ndjson_chunks(batches: Iterable[List[Task]]) -> AsyncIterator[bytes]:
+    """Un objeto JSON por línea; se emite un bloque por lote para no acumular la respuesta"""
+    dumps = json.dumps
+    for batch in batches:
+        yield "".join(
+            dumps(dict(zip(EXPORT_FIELDS, task_row(task))), ensure_ascii=False) + "\n" for task in batch
+        ).encode()
+
+
+async def csv_chunks(batches: Iterable[List[Task]]) -> AsyncIterator[bytes]:
+    """CSV con cabecera; se emite un bloque por lote"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for batch in batches:
+        writer.writerows(task_row(task) for task in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,123 @@
+import sys
+from datetime import datetime, timedelta
+from typing import Optional
+from models.task import Task, TaskStatus
+
+# Estado guardado como entero pequeño: índice en STATUSES
+STATUSES = tuple(TaskStatus)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def epoch_us(value: datetime) -> int:
+    """Microsegundos desde 1970 en hora local de pared (las fechas con zona se pasan a hora local)"""
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return (value - EPOCH) // ONE_MICROSECOND
+
+
+def from_epoch_us(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=value)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+class TaskRecord:
+    """
+    Representación compacta de una tarea guardada en memoria.
+
+    Usa __slots__, el estado como entero y las fechas como enteros; expone los mismos
+    atributos de lectura que Task (status, created_at, updated_at...), así que FastAPI
+    puede convertirla a Task en la respuesta (from_attributes) sin pasos intermedios.
+    """
+
+    __slots__ = ("id", "user_id", "title", "description", "status_code", "priority", "created_us", "updated_us")
+
+    def __init__(
+        self,
+        id: int,
+        user_id: int,
+        title: str,
+        description: Optional[str],
+        status: TaskStatus,
+        priority: int,
+        created_at: datetime,
+        updated_at: datetime,
+    ):
+        self.id = id
+        self.user_id = user_id
+        self.title = _intern(title)
+        self.description = _intern(description)
+        self.status_code = STATUS_CODES[status]
+        self.priority = priority
+        self.created_us = epoch_us(created_at)
+        self.updated_us = epoch_us(updated_at)
+
+    @classmethod
+    def from_task(cls, task) -> "TaskRecord":
+        if isinstance(task, cls):
+            return task
+        return cls(
+            task.id, task.user_id, task.title, task.description, task.status,
+            task.priority, task.created_at, task.updated_at,
+        )
+
+    @classmethod
+    def from_values(
+        cls, id: int, user_id: int, title: str, description: Optional[str],
+        status_code: int, priority: int, created_us: int, updated_us: int,
+    ) -> "TaskRecord":
+        """Crear un registro a partir de sus valores ya compactos (sin convertir fechas)"""
+        record = cls.__new__(cls)
+        record.id = id
+        record.user_id = user_id
+        record.title = _intern(title)
+        record.description = _intern(description)
+        record.status_code = status_code
+        record.priority = priority
+        record.created_us = created_us
+        record.updated_us = updated_us
+        return record
+
+    @property
+    def status(self) -> TaskStatus:
+        return STATUSES[self.status_code]
+
+    @property
+    def created_at(self) -> datetime:
+        return from_epoch_us(self.created_us)
+
+    @property
+    def updated_at(self) -> datetime:
+        return from_epoch_us(self.updated_us)
+
+    def copy(self) -> "TaskRecord":
+        record = TaskRecord.__new__(TaskRecord)
+        for field in TaskRecord.__slots__:
+            setattr(record, field, getattr(self, field))
+        return record
+
+    def apply(self, changes: dict) -> None:
+        """Modificar la tarea en su forma compacta con los campos de `changes`"""
+        for field, value in changes.items():
+            if field == "status":
+                self.status_code = STATUS_CODES[TaskStatus(value)]
+            elif field == "updated_at":
+                self.updated_us = epoch_us(value)
+            elif field in ("title", "description"):
+                setattr(self, field, _intern(value))
+            else:
+                setattr(self, field, value)
+
+    def to_task(self) -> Task:
+        return Task.model_construct(
+            id=self.id, user_id=self.user_id, title=self.title, description=self.description,
+            status=self.status, priority=self.priority, created_at=self.created_at, updated_at=self.updated_at,
+        )
+
+    def __repr__(self) -> str:
+        return f"TaskRecord(id={self.id}, user_id={self.user_id}, title={self.title!r}, status={self.status.value})"
@@ -1,54 +1,411 @@
-from typing import List, Optional
-from datetime import datetime
-from models.task import Task, TaskCreate, TaskUpdate
+from itertools import chain
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from models.task import Task, TaskBulkUpdate, TaskChangeType, TaskCreate, TaskFilter, TaskSort, TaskStatus, TaskUpdate
+from services.archive import TaskArchive
+from services.change_feed import ChangeFeed
+from services.metrics import metrics_registry
+from services.pagination import decode_cursor, encode_cursor
+from services.task_record import TaskRecord, epoch_us
+from services.task_stats import TaskStats, stats_key, summarize
+from services.task_store import TaskStore
+from services.task_versions import CollectionVersions
+
+# Resultados por elemento de las operaciones por lotes
+BULK_OK = "ok"
+BULK_NOT_FOUND = "not_found"
+BULK_FORBIDDEN = "forbidden"
+
+# Campos de TaskUpdate que no admiten null en la tarea guardada
+REQUIRED_FIELDS = ("title", "status", "priority")
+
+def update_changes(task_update: TaskUpdate, now: datetime) -> dict:
+    """Campos a modificar según lo enviado en `task_update`"""
+    changes = {
+        field: value
+        for field, value in task_update.model_dump(exclude_unset=True, exclude={"id"}).items()
+        if value is not None or field not in REQUIRED_FIELDS
+    }
+    changes["updated_at"] = now
+    return changes
+
+def sort_key(task: Task, sort: TaskSort):
+    """Valor de la clave de orden de una tarea, serializable en un cursor"""
+    if sort in (TaskSort.PRIORITY, TaskSort.PRIORITY_DESC):
+        return task.priority
+    if sort in (TaskSort.UPDATED_AT, TaskSort.UPDATED_AT_DESC):
+        return task.updated_at.isoformat()
+    return task.id
+
+def decode_sort_cursor(cursor: str, sort: TaskSort) -> tuple:
+    """Obtener la clave (valor, id) de un cursor; lanza ValueError si no corresponde al orden pedido"""
+    position = decode_cursor(cursor)
+    task_id = position.get("id")
+    key = position.get("k", task_id)
+    if position.get("s", TaskSort.ID.value) != sort.value or not isinstance(task_id, int):
+        raise ValueError("cursor inválido")
+    expected = str if sort in (TaskSort.UPDATED_AT, TaskSort.UPDATED_AT_DESC) else int
+    if not isinstance(key, expected):
+        raise ValueError("cursor inválido")
+    return key, task_id
 
 class TaskService:
     def __init__(self):
-        self.tasks = []
-        self.next_id = 1
+        self.store = TaskStore()
+        # Versión de la colección de cada usuario (ETag de los listados)
+        self.versions = CollectionVersions()
+        # Cambios recientes de cada usuario (GET /api/tasks/changes)
+        self.changes = ChangeFeed()
+        # Contadores por estado, prioridad y día (GET /api/tasks/stats); incluyen las tareas archivadas
+        self.stats = TaskStats()
+        # Tareas completadas antiguas, fuera del almacén (GET /api/tasks/archive); None = sin archivo
+        self.archive: Optional[TaskArchive] = None
+    
+    def _record_changes(self, user_id: int, change_type: TaskChangeType, tasks: Iterable[Task]) -> None:
+        """Nueva versión de la colección del usuario y publicación de los cambios en su feed"""
+        self.versions.bump(user_id)
+        self.changes.publish(user_id, ((change_type, task) for task in tasks))
     
+    def _stats_keys(self, tasks: Iterable[Task]) -> dict:
+        """Aportación actual a las estadísticas de las tareas cuyos contadores se mantienen en memoria"""
+        if not self.stats.incremental:
+            return {}
+        return {task.id: stats_key(task) for task in tasks if self.stats.tracks(task.user_id)}
+    
+    @metrics_registry.timed("task_service.create_task")
     def create_task(self, task_data: TaskCreate, user_id: int) -> Task:
         task_dict = task_data.model_dump()
         task_dict.update({
-            "id": self.next_id,
+            "id": self.store.allocate_id(),
             "user_id": user_id,
             "created_at": datetime.now(),
             "updated_at": datetime.now()
         })
         
         task = Task(**task_dict)
-        self.tasks.append(task)
-        self.next_id += 1
+        # Con el lock del usuario, almacén, estadísticas y feed ven los cambios en el mismo orden
+        with self.store.user_lock(user_id):
+            self.store.add(task)
+            if self.stats.tracks(user_id):
+                self.stats.add(user_id, stats_key(task))
+            self._record_changes(user_id, TaskChangeType.CREATED, [task])
         return task
     
+    @metrics_registry.timed("task_service.create_tasks")
+    def create_tasks(self, tasks_data: List[TaskCreate], user_id: int) -> List[Task]:
+        """Crear un lote de tareas en una sola pasada sobre el almacén"""
+        now = datetime.now()
+        ids = self.store.allocate_ids(len(tasks_data))
+        # TaskCreate ya está validado: se construye directamente la forma compacta
+        tasks = [
+            TaskRecord(task_id, user_id, data.title, data.description, data.status, data.priority, now, now)
+            for data, task_id in zip(tasks_data, ids)
+        ]
+        with self.store.user_lock(user_id):
+            self.store.add_many(tasks)
+            if tasks and self.stats.tracks(user_id):
+                for task in tasks:
+                    self.stats.add(user_id, stats_key(task))
+            if tasks:
+                self._record_changes(user_id, TaskChangeType.CREATED, tasks)
+        return tasks
+    
+    @metrics_registry.timed("task_service.get_task_by_id")
     def get_task_by_id(self, task_id: int) -> Optional[Task]:
-        for task in self.tasks:
-            if task.id == task_id:
-                return task
-        return None
+        return self.store.get(task_id)
     
+    def collection_version(self, user_id: int) -> str:
+        """Versión actual de la colección de tareas del usuario; cambia con cada alta, modificación o borrado"""
+        return self.versions.get(user_id)
+    
+    @metrics_registry.timed("task_service.get_user_tasks")
     def get_user_tasks(self, user_id: int, skip: int = 0, limit: int = 100) -> List[Task]:
-        user_tasks = [task for task in self.tasks if task.user_id == user_id]
-        return user_tasks[skip:skip + limit]
+        return self.store.list_by_user(user_id, skip, limit)
     
-    def update_task(self, task_id: int, task_update: TaskUpdate) -> Task:
-        task = self.get_task_by_id(task_id)
-        if task is None:
-            return None
+    @metrics_registry.timed("task_service.get_user_tasks_page")
+    def get_user_tasks_page(
+        self,
+        user_id: int,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        task_filter: Optional[TaskFilter] = None
+    ) -> Tuple[List[Task], Optional[str]]:
+        """
+        Obtener una página de tareas y el cursor de la siguiente (None si no hay más).
+        Con `cursor` se pagina por clave y `skip` se ignora; lanza ValueError si el cursor no es válido.
+        """
+        if task_filter is not None and task_filter != TaskFilter():
+            return self._query_page(user_id, task_filter, limit, cursor, skip)
         
-        update_data = task_update.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(task, field, value)
+        if cursor is not None:
+            _, after_id = decode_sort_cursor(cursor, TaskSort.ID)
+            tasks = self.store.list_by_user_after(user_id, after_id, limit + 1)
+        else:
+            tasks = self.store.list_by_user(user_id, skip, limit + 1)
         
-        task.updated_at = datetime.now()
+        if len(tasks) <= limit:
+            return tasks, None
+        tasks = tasks[:limit]
+        if not tasks:
+            return tasks, None
+        return tasks, encode_cursor({"id": tasks[-1].id})
+    
+    def iter_user_tasks(
+        self, user_id: int, task_filter: Optional[TaskFilter] = None, batch_size: int = 1000
+    ) -> Iterator[List[Task]]:
+        """Recorrer todas las tareas de un usuario en lotes, paginando por cursor"""
+        cursor = None
+        while True:
+            tasks, cursor = self.get_user_tasks_page(user_id, batch_size, cursor, task_filter=task_filter)
+            if tasks:
+                yield tasks
+            if cursor is None:
+                return
+    
+    def _query_page(
+        self, user_id: int, task_filter: TaskFilter, limit: int, cursor: Optional[str], skip: int
+    ) -> Tuple[List[Task], Optional[str]]:
+        sort = task_filter.sort
+        if cursor is not None:
+            after = decode_sort_cursor(cursor, sort)
+            tasks = self.store.query(user_id, task_filter, after, limit + 1)
+        else:
+            tasks = self.store.query(user_id, task_filter, None, skip + limit + 1)[skip:]
+        
+        if len(tasks) <= limit:
+            return tasks, None
+        tasks = tasks[:limit]
+        if not tasks:
+            return tasks, None
+        last = tasks[-1]
+        return tasks, encode_cursor({"s": sort.value, "k": sort_key(last, sort), "id": last.id})
+    
+    @metrics_registry.timed("task_service.search_tasks")
+    def search_tasks(self, user_id: int, query: str, limit: int = 20) -> List[Task]:
+        """Tareas del usuario que contienen todas las palabras de `query`, de más a menos relevante"""
+        return self.store.search(user_id, query, limit)
+    
+    @metrics_registry.timed("task_service.get_task_stats")
+    def get_task_stats(self, user_id: int, days: int = 30, today: Optional[date] = None) -> dict:
+        """Recuento por estado y prioridad y serie diaria de los últimos `days` días, sin recorrer las tareas"""
+        today = today or date.today()
+        stats = self.stats.get(user_id, today - timedelta(days=days - 1))
+        if stats is None:
+            # Sin escrituras del usuario mientras se cuentan sus tareas: ningún cambio se queda fuera
+            with self.store.user_lock(user_id):
+                tasks = (task for batch in self.iter_user_tasks(user_id) for task in batch)
+                if self.archive is not None:
+                    tasks = chain(tasks, self._archived_tasks(user_id))
+                stats = self.stats.get(user_id) or self.stats.build(user_id, tasks)
+        return summarize(stats, days, today)
+    
+    @metrics_registry.timed("task_service.update_task")
+    def update_task(
+        self, task_id: int, task_update: TaskUpdate, precondition: Optional[Callable[[Task], None]] = None
+    ) -> Optional[Task]:
+        """
+        Actualizar una tarea; None si no existe. `precondition` recibe la versión actual justo antes
+        de escribir (con el lock del usuario o dentro de la transacción) y lanza para no aplicar el cambio.
+        """
+        current = self.store.get(task_id)
+        if current is None:
+            return None
+        with self.store.user_lock(current.user_id):
+            # El almacén guarda una copia nueva: `current` sigue siendo la versión anterior
+            current = self.store.get(task_id)
+            if current is None:
+                return None
+            task = self.store.update_fields(task_id, update_changes(task_update, datetime.now()), precondition)
+            if task is not None:
+                for key in self._stats_keys([current]).values():
+                    self.stats.replace(task.user_id, key, stats_key(task))
+                self._record_changes(task.user_id, TaskChangeType.UPDATED, [task])
         return task
     
-    def delete_task(self, task_id: int) -> bool:
-        for i, task in enumerate(self.tasks):
-            if task.id == task_id:
-                self.tasks.pop(i)
-                return True
-        return False
+    @metrics_registry.timed("task_service.delete_task")
+    def delete_task(self, task_id: int, precondition: Optional[Callable[[Task], None]] = None) -> bool:
+        """Eliminar una tarea; False si no existe. `precondition` como en update_task"""
+        current = self.store.get(task_id)
+        if current is None:
+            return False
+        with self.store.user_lock(current.user_id):
+            task = self.store.remove(task_id, precondition)
+            if task is None:
+                return False
+            if self.stats.incremental:
+                self.stats.remove(task.user_id, stats_key(task))
+            self._record_changes(task.user_id, TaskChangeType.DELETED, [task])
+        return True
+    
+    @metrics_registry.timed("task_service.update_tasks")
+    def update_tasks(self, updates: List[TaskBulkUpdate], user_id: int) -> List[Tuple[int, str, Optional[Task]]]:
+        """
+        Actualizar un lote de tareas de un usuario.
+        Devuelve (id, resultado, tarea) por elemento, con resultado BULK_OK, BULK_NOT_FOUND o BULK_FORBIDDEN.
+        Si un id aparece varias veces los cambios se aplican en orden y todas sus entradas devuelven la versión final.
+        """
+        with self.store.user_lock(user_id):
+            return self._update_tasks(updates, user_id)
+    
+    def _update_tasks(self, updates: List[TaskBulkUpdate], user_id: int) -> List[Tuple[int, str, Optional[Task]]]:
+        now = datetime.now()
+        current = self.store.get_many([u.id for u in updates])
+        results, changed = [], {}
+        for task_update in updates:
+            task = current.get(task_update.id)
+            if task is None:
+                results.append((task_update.id, BULK_NOT_FOUND))
+            elif task.user_id != user_id:
+                results.append((task_update.id, BULK_FORBIDDEN))
+            else:
+                changed.setdefault(task.id, {}).update(update_changes(task_update, now))
+                results.append((task.id, BULK_OK))
+        
+        before = self._stats_keys(current[task_id] for task_id in changed)
+        updated = {task.id: task for task in self.store.update_fields_many(list(changed.items()))}
+        for task_id, key in before.items():
+            self.stats.replace(user_id, key, stats_key(updated[task_id]))
+        if updated:
+            self._record_changes(user_id, TaskChangeType.UPDATED, updated.values())
+        return [(task_id, result, updated.get(task_id)) for task_id, result in results]
+    
+    @metrics_registry.timed("task_service.delete_tasks")
+    def delete_tasks(self, task_ids: List[int], user_id: int) -> List[Tuple[int, str]]:
+        """Eliminar un lote de tareas de un usuario; devuelve (id, resultado) por elemento"""
+        with self.store.user_lock(user_id):
+            return self._delete_tasks(task_ids, user_id)
+    
+    def _delete_tasks(self, task_ids: List[int], user_id: int) -> List[Tuple[int, str]]:
+        current = self.store.get_many(task_ids)
+        results, to_remove = [], set()
+        for task_id in task_ids:
+            task = current.get(task_id)
+            if task is None or task_id in to_remove:
+                results.append((task_id, BULK_NOT_FOUND))
+            elif task.user_id != user_id:
+                results.append((task_id, BULK_FORBIDDEN))
+            else:
+                to_remove.add(task_id)
+                results.append((task_id, BULK_OK))
+        
+        self.store.remove_many(list(to_remove))
+        for key in self._stats_keys(current[task_id] for task_id in to_remove).values():
+            self.stats.remove(user_id, key)
+        if to_remove:
+            self._record_changes(user_id, TaskChangeType.DELETED, (current[task_id] for task_id in to_remove))
+        return results
+
+    def purge_user_tasks(self, user_id: int, limit: int = 500) -> int:
+        """Borrar hasta `limit` tareas de un usuario (las de menor id); devuelve cuántas se borraron"""
+        with self.store.user_lock(user_id):
+            task_ids = [task.id for task in self.store.list_by_user(user_id, 0, limit)]
+            if task_ids:
+                self._delete_tasks(task_ids, user_id)
+        return len(task_ids)
+    
+    def purge_user_archive(self, user_id: int) -> int:
+        """Borrar todas las tareas archivadas de un usuario; devuelve cuántas eran"""
+        if self.archive is None:
+            return 0
+        with self.store.user_lock(user_id):
+            dropped = self.archive.drop_user(user_id)
+            if dropped and self.stats.incremental:
+                self.stats.discard(user_id)
+        return dropped
+    
+    def _archived_tasks(self, user_id: int) -> Iterator[TaskRecord]:
+        """Tareas archivadas del usuario que no están también en el almacén (la copia del almacén manda)"""
+        for task in self.archive.iter_user(user_id):
+            if self.store.get(task.id) is None:
+                yield task
+    
+    def archive_completed(
+        self, user_id: int, before: datetime, after: Optional[tuple] = None, limit: int = 500
+    ) -> Tuple[int, Optional[tuple]]:
+        """
+        Pasar al archivo las tareas completadas del usuario sin cambios desde antes de `before`,
+        revisando como mucho `limit` tareas a partir de la posición `after`.
+        Devuelve cuántas se archivaron y la posición siguiente (None si no quedan por revisar).
+        Las estadísticas no cambian: siguen contando las tareas archivadas.
+
+        El archivo (con su fsync) se escribe sin el lock del usuario, para que sus escrituras
+        no esperen al disco; después, con el lock, solo salen del almacén las tareas que no han
+        cambiado entretanto, y las que sí cambiaron se vuelven a sacar del archivo.
+        """
+        with self.store.user_lock(user_id):
+            scanned, after = self.store.scan_updated_before(user_id, epoch_us(before), after, limit)
+            tasks = [task for task in scanned if task.status == TaskStatus.COMPLETED]
+        if not tasks:
+            return 0, after
+        # Primero el archivo: si el proceso cae entre medias la tarea sigue en el almacén
+        self.archive.append(user_id, tasks)
+        with self.store.user_lock(user_id):
+            current = self.store.get_many([task.id for task in tasks])
+            archived, stale = [], []
+            for task in tasks:
+                hot = current.get(task.id)
+                (archived if hot is not None and hot.updated_at == task.updated_at else stale).append(task)
+            self.store.remove_many([task.id for task in archived])
+            if archived:
+                self._record_changes(user_id, TaskChangeType.ARCHIVED, archived)
+        # Modificadas o borradas mientras se escribía el archivo: la copia archivada no vale
+        self.archive.remove(user_id, [task.id for task in stale])
+        return len(archived), after
+    
+    @metrics_registry.timed("task_service.get_archived_tasks_page")
+    def get_archived_tasks_page(
+        self, user_id: int, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[Task], Optional[str]]:
+        """
+        Una página de las tareas archivadas del usuario (en orden de archivo) y el cursor de la siguiente.
+        Lanza ValueError si el cursor no es válido.
+        """
+        if self.archive is None:
+            return [], None
+        position = (0, 0)
+        if cursor is not None:
+            value = decode_cursor(cursor)
+            position = value.get("b"), value.get("i")
+            if not all(isinstance(part, int) and part >= 0 for part in position):
+                raise ValueError("cursor inválido")
+        tasks, position = self.archive.page(user_id, position, limit)
+        hot = self.store.get_many([task.id for task in tasks])
+        tasks = [task for task in tasks if task.id not in hot]
+        if position is None:
+            return tasks, None
+        return tasks, encode_cursor({"b": position[0], "i": position[1]})
+    
+    @metrics_registry.timed("task_service.unarchive_tasks")
+    def unarchive_tasks(self, task_ids: List[int], user_id: int) -> List[Tuple[int, str, Optional[Task]]]:
+        """
+        Devolver tareas archivadas del usuario al almacén; su updated_at pasa a ser ahora, así que no
+        se vuelven a archivar hasta que pase otra vez el plazo. Devuelve (id, BULK_OK o BULK_NOT_FOUND, tarea).
+        """
+        if self.archive is None:
+            return [(task_id, BULK_NOT_FOUND, None) for task_id in task_ids]
+        now = datetime.now()
+        with self.store.user_lock(user_id):
+            found = self.archive.get_many(user_id, task_ids)
+            hot = self.store.get_many(list(found))
+            restored = {
+                task_id: TaskRecord(
+                    task.id, user_id, task.title, task.description, task.status, task.priority, task.created_at, now
+                )
+                for task_id, task in found.items() if task_id not in hot
+            }
+            # Primero el almacén: si el proceso cae entre medias la tarea sigue en el archivo
+            self.store.add_many(list(restored.values()))
+            for task_id, key in self._stats_keys(found[task_id] for task_id in restored).items():
+                self.stats.replace(user_id, key, stats_key(restored[task_id]))
+            self.archive.remove(user_id, list(found))
+            if restored:
+                self._record_changes(user_id, TaskChangeType.UNARCHIVED, restored.values())
+        results = []
+        for task_id in task_ids:
+            task = restored.get(task_id) or hot.get(task_id)
+            results.append((task_id, BULK_OK, task) if task is not None else (task_id, BULK_NOT_FOUND, None))
+        return results
 
         # Crear instancia global compartida
 task_service_instance = TaskService()
\ No newline at end of file
@@ -0,0 +1,121 @@
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from models.task import Task, TaskStatus
+
+MIN_PRIORITY = 1
+MAX_PRIORITY = 5
+
+# Lo que una tarea aporta a las estadísticas: (estado, prioridad, día de updated_at)
+StatsKey = Tuple[TaskStatus, int, date]
+
+
+def stats_key(task: Task) -> StatsKey:
+    return task.status, task.priority, task.updated_at.date()
+
+
+class UserTaskStats:
+    """Contadores de las tareas de un usuario por estado × prioridad y por día de updated_at"""
+
+    __slots__ = ("counts", "daily")
+
+    def __init__(self):
+        self.counts: Dict[Tuple[TaskStatus, int], int] = {}
+        # día -> [tareas actualizadas por última vez ese día, de ellas completadas]
+        self.daily: Dict[date, List[int]] = {}
+
+    def add(self, key: StatsKey, delta: int = 1) -> None:
+        status, priority, day = key
+        cell = (status, priority)
+        self.counts[cell] = self.counts.get(cell, 0) + delta
+        if not self.counts[cell]:
+            del self.counts[cell]
+        bucket = self.daily.get(day)
+        if bucket is None:
+            bucket = self.daily[day] = [0, 0]
+        bucket[0] += delta
+        if status == TaskStatus.COMPLETED:
+            bucket[1] += delta
+        if not bucket[0]:
+            del self.daily[day]
+
+
+class TaskStats:
+    """
+    Estadísticas de tareas por usuario, en memoria y mantenidas por TaskService.
+
+    Los contadores de un usuario se calculan recorriendo sus tareas la primera vez que
+    los pide y a partir de ahí se actualizan con cada alta, modificación o borrado; los
+    usuarios que nunca piden estadísticas no cuestan nada.
+    """
+
+    # TaskService tiene que avisar de cada cambio (en SQLite los mantienen triggers)
+    incremental = True
+
+    def __init__(self):
+        self._users: Dict[int, UserTaskStats] = {}
+
+    def tracks(self, user_id: int) -> bool:
+        return user_id in self._users
+
+    def get(self, user_id: int, since: Optional[date] = None) -> Optional[UserTaskStats]:
+        """Contadores del usuario, o None si todavía no se han calculado (`since` no acota nada en memoria)"""
+        return self._users.get(user_id)
+
+    def build(self, user_id: int, tasks: Iterable[Task]) -> UserTaskStats:
+        stats = UserTaskStats()
+        for task in tasks:
+            stats.add(stats_key(task))
+        self._users[user_id] = stats
+        return stats
+
+    def add(self, user_id: int, key: StatsKey) -> None:
+        stats = self._users.get(user_id)
+        if stats is not None:
+            stats.add(key)
+
+    def discard(self, user_id: int) -> None:
+        """Olvidar los contadores de un usuario; se recalculan la próxima vez que los pida"""
+        self._users.pop(user_id, None)
+
+    def remove(self, user_id: int, key: StatsKey) -> None:
+        stats = self._users.get(user_id)
+        if stats is not None:
+            stats.add(key, -1)
+
+    def replace(self, user_id: int, old: StatsKey, new: StatsKey) -> None:
+        if old != new:
+            self.remove(user_id, old)
+            self.add(user_id, new)
+
+
+def summarize(stats: UserTaskStats, days: int, today: date) -> dict:
+    """Resumen de los contadores: O(días + estados × prioridades), no depende del número de tareas"""
+    priorities = [str(p) for p in range(MIN_PRIORITY, MAX_PRIORITY + 1)]
+    by_status = {status.value: 0 for status in TaskStatus}
+    by_priority = {p: 0 for p in priorities}
+    by_status_priority = {status.value: {p: 0 for p in priorities} for status in TaskStatus}
+    for (status, priority), count in stats.counts.items():
+        by_status[status.value] += count
+        by_priority[str(priority)] += count
+        by_status_priority[status.value][str(priority)] += count
+    total = sum(by_status.values())
+
+    daily = []
+    for offset in range(days - 1, -1, -1):
+        day = today - timedelta(days=offset)
+        updated, completed = stats.daily.get(day, (0, 0))
+        daily.append({
+            "day": day,
+            "updated": updated,
+            "completed": completed,
+            "completion_rate": completed / updated if updated else 0.0,
+        })
+
+    return {
+        "total": total,
+        "by_status": by_status,
+        "by_priority": by_priority,
+        "by_status_priority": by_status_priority,
+        "completion_rate": by_status[TaskStatus.COMPLETED.value] / total if total else 0.0,
+        "daily": daily,
+    }
@@ -0,0 +1,373 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+from models.task import Task, TaskFilter, TaskSort, TaskStatus
+from services.concurrency import IdAllocator, UserLocks
+from services.search_index import UserSearchIndex
+from services.task_record import TaskRecord, epoch_us
+
+MIN_PRIORITY = 1
+MAX_PRIORITY = 5
+
+
+def task_matches(task: Task, task_filter: TaskFilter) -> bool:
+    """Comprobar si una tarea cumple todos los filtros"""
+    f = task_filter
+    if f.status and task.status not in f.status:
+        return False
+    if f.priority_min is not None and task.priority < f.priority_min:
+        return False
+    if f.priority_max is not None and task.priority > f.priority_max:
+        return False
+    if f.created_from is not None and epoch_us(task.created_at) < epoch_us(f.created_from):
+        return False
+    if f.created_to is not None and epoch_us(task.created_at) > epoch_us(f.created_to):
+        return False
+    if f.updated_from is not None and epoch_us(task.updated_at) < epoch_us(f.updated_from):
+        return False
+    if f.updated_to is not None and epoch_us(task.updated_at) > epoch_us(f.updated_to):
+        return False
+    return True
+
+
+def _remove_sorted(items: list, value) -> None:
+    i = bisect_left(items, value)
+    if i < len(items) and items[i] == value:
+        del items[i]
+
+
+def _ids_from(ids: List[int], after_id: Optional[int], desc: bool) -> Iterator[int]:
+    """Recorrer una lista ordenada de ids a partir de `after_id` (excluido)"""
+    if desc:
+        end = len(ids) if after_id is None else bisect_left(ids, after_id)
+        return (ids[i] for i in range(end - 1, -1, -1))
+    start = 0 if after_id is None else bisect_right(ids, after_id)
+    return (ids[i] for i in range(start, len(ids)))
+
+
+class TaskStore:
+    """
+    Almacén en memoria de tareas con índice primario por id y secundarios por usuario.
+    Las tareas se guardan como TaskRecord (forma compacta); la conversión a Task se hace en la API.
+
+    Concurrencia (ver services.concurrency): los TaskRecord guardados no se modifican, cada
+    cambio los sustituye por una copia; las escrituras toman el lock de su usuario y las
+    lecturas de los índices de un usuario se repiten si coinciden con una escritura.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[int, TaskRecord] = {}
+        # user_id -> ids de sus tareas ordenados de forma ascendente
+        self._user_index: Dict[int, List[int]] = {}
+        # user_id -> (status, priority) -> ids ordenados
+        self._facets: Dict[int, Dict[Tuple[TaskStatus, int], List[int]]] = {}
+        # user_id -> [(updated_at en microsegundos, id)] ordenado
+        self._updated: Dict[int, List[Tuple[int, int]]] = {}
+        # user_id -> índice de búsqueda; se construye en la primera búsqueda del usuario y luego se mantiene
+        self._search: Dict[int, UserSearchIndex] = {}
+        self._ids = IdAllocator()
+        self._users = UserLocks()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __iter__(self) -> Iterator[TaskRecord]:
+        return iter(self._tasks.values())
+
+    @property
+    def next_id(self) -> int:
+        return self._ids.next_id
+
+    def user_lock(self, user_id: int) -> ContextManager:
+        """Lock de escritura de un usuario, para que TaskService agrupe varias operaciones"""
+        return self._users.lock(user_id)
+
+    def load(self, records: Iterable[TaskRecord], next_id: int) -> None:
+        """Cargar de golpe las tareas de un almacén vacío, ordenando cada índice una sola vez"""
+        self._search.clear()
+        for task in records:
+            self._tasks[task.id] = task
+            self._user_index.setdefault(task.user_id, []).append(task.id)
+            facets = self._facets.setdefault(task.user_id, {})
+            facets.setdefault((task.status, task.priority), []).append(task.id)
+            self._updated.setdefault(task.user_id, []).append((task.updated_us, task.id))
+        for index in (self._user_index, self._updated):
+            for entries in index.values():
+                entries.sort()
+        for facets in self._facets.values():
+            for ids in facets.values():
+                ids.sort()
+        self._ids.advance(next_id)
+
+    def allocate_id(self) -> int:
+        """Reservar el siguiente id de tarea"""
+        return self._ids.allocate()
+
+    def allocate_ids(self, count: int) -> range:
+        """Reservar `count` ids consecutivos"""
+        return self._ids.allocate_many(count)
+
+    def add(self, task: Task) -> None:
+        """Guardar una tarea nueva (Task o TaskRecord)"""
+        task = TaskRecord.from_task(task)
+        with self._users.writing(task.user_id):
+            self._tasks[task.id] = task
+            ids = self._user_index.setdefault(task.user_id, [])
+            if not ids or ids[-1] < task.id:
+                # Caso habitual: los ids son crecientes, basta con añadir al final
+                ids.append(task.id)
+            else:
+                insort(ids, task.id)
+            self._index(task)
+
+    def add_many(self, tasks: List[Task]) -> None:
+        for task in tasks:
+            self.add(task)
+
+    def get(self, task_id: int) -> Optional[TaskRecord]:
+        """Obtener una tarea por id en O(1)"""
+        return self._tasks.get(task_id)
+
+    def get_many(self, task_ids: List[int]) -> Dict[int, TaskRecord]:
+        """Obtener varias tareas por id; las que no existen no aparecen en el resultado"""
+        tasks = self._tasks
+        return {task_id: tasks[task_id] for task_id in task_ids if task_id in tasks}
+
+    def update(self, task: Task) -> None:
+        """Reemplazar una tarea existente por su nueva versión"""
+        task = TaskRecord.from_task(task)
+        with self._users.writing(task.user_id):
+            old = self._tasks.get(task.id)
+            if old is None:
+                self.add(task)
+                return
+            self._unindex(old)
+            self._tasks[task.id] = task
+            self._index(task)
+
+    def update_many(self, tasks: List[Task]) -> None:
+        for task in tasks:
+            self.update(task)
+
+    def update_fields(
+        self, task_id: int, changes: dict, check: Optional[Callable[[TaskRecord], None]] = None
+    ) -> Optional[TaskRecord]:
+        """
+        Modificar campos de una tarea; devuelve la nueva versión, o None si no existe.
+        `check` recibe la versión actual con el lock tomado y puede lanzar para cancelar el cambio.
+        """
+        task = self._tasks.get(task_id)
+        if task is None:
+            return None
+        with self._users.writing(task.user_id):
+            old = self._tasks.get(task_id)
+            if old is None:
+                return None
+            if check is not None:
+                check(old)
+            # Copy-on-write: quien ya tenía la tarea sigue viendo la versión anterior completa
+            task = old.copy()
+            task.apply(changes)
+            # El índice de búsqueda solo cambia si cambia el texto
+            text = "title" in changes or "description" in changes
+            self._unindex(old, text)
+            self._tasks[task_id] = task
+            self._index(task, text)
+        return task
+
+    def update_fields_many(self, changes: List[Tuple[int, dict]]) -> List[TaskRecord]:
+        updated = (self.update_fields(task_id, fields) for task_id, fields in changes)
+        return [task for task in updated if task is not None]
+
+    def remove_many(self, task_ids: List[int]) -> None:
+        for task_id in task_ids:
+            self.remove(task_id)
+
+    def remove(self, task_id: int, check: Optional[Callable[[TaskRecord], None]] = None) -> Optional[TaskRecord]:
+        """Eliminar una tarea y devolverla, o None si no existe; `check` como en update_fields"""
+        task = self._tasks.get(task_id)
+        if task is None:
+            return None
+        with self._users.writing(task.user_id):
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            if check is not None:
+                check(task)
+            del self._tasks[task_id]
+            ids = self._user_index.get(task.user_id)
+            if ids:
+                _remove_sorted(ids, task_id)
+                if not ids:
+                    del self._user_index[task.user_id]
+            self._unindex(task)
+        return task
+
+    def list_by_user(self, user_id: int, skip: int = 0, limit: int = 100) -> List[TaskRecord]:
+        """Listar las tareas de un usuario sin recorrer las de otros usuarios"""
+        tasks = self._tasks
+
+        def read():
+            ids = self._user_index.get(user_id)
+            return [tasks[task_id] for task_id in ids[skip:skip + limit]] if ids else []
+
+        return self._users.read(user_id, read)
+
+    def list_by_user_after(self, user_id: int, after_id: int, limit: int = 100) -> List[TaskRecord]:
+        """Listar las tareas de un usuario con id mayor que `after_id` (paginación por cursor)"""
+        tasks = self._tasks
+
+        def read():
+            ids = self._user_index.get(user_id)
+            if not ids:
+                return []
+            start = bisect_right(ids, after_id)
+            return [tasks[task_id] for task_id in ids[start:start + limit]]
+
+        return self._users.read(user_id, read)
+
+    def query(
+        self, user_id: int, task_filter: TaskFilter, after: Optional[tuple] = None, limit: int = 100
+    ) -> List[TaskRecord]:
+        """
+        Listar tareas filtradas y ordenadas usando los índices secundarios.
+        `after` es la clave de orden (valor, id) de la última fila de la página anterior.
+        """
+        return self._users.read(user_id, lambda: self._query(user_id, task_filter, after, limit))
+
+    def _query(self, user_id: int, task_filter: TaskFilter, after: Optional[tuple], limit: int) -> List[TaskRecord]:
+        facets = self._facets.get(user_id)
+        if not facets or limit <= 0:
+            return []
+
+        sort = task_filter.sort
+        if sort in (TaskSort.ID, TaskSort.ID_DESC):
+            ids = self._scan_by_id(facets, task_filter, after, sort == TaskSort.ID_DESC)
+        elif sort in (TaskSort.PRIORITY, TaskSort.PRIORITY_DESC):
+            ids = self._scan_by_priority(facets, task_filter, after, sort == TaskSort.PRIORITY_DESC)
+        else:
+            ids = self._scan_by_updated(user_id, task_filter, after, sort == TaskSort.UPDATED_AT_DESC)
+
+        result = []
+        tasks = self._tasks
+        for task_id in ids:
+            task = tasks[task_id]
+            if task_matches(task, task_filter):
+                result.append(task)
+                if len(result) >= limit:
+                    break
+        return result
+
+    def search(self, user_id: int, query: str, limit: int = 20) -> List[TaskRecord]:
+        """Tareas del usuario que contienen todas las palabras de `query` (como prefijo), por relevancia"""
+        index = self._search.get(user_id)
+        tasks = self._tasks
+        if index is None:
+            # Construirlo con las escrituras del usuario en espera, para no perder ningún cambio
+            with self._users.lock(user_id):
+                index = self._search.get(user_id)
+                if index is None:
+                    ids = self._user_index.get(user_id, ())
+                    index = self._search[user_id] = UserSearchIndex.build(tasks[task_id] for task_id in ids)
+        return self._users.read(user_id, lambda: [tasks[task_id] for _, task_id in index.search(query, limit)])
+
+    def count_by_user(self, user_id: int) -> int:
+        """Número de tareas de un usuario"""
+        return len(self._user_index.get(user_id, ()))
+
+    def user_ids(self) -> List[int]:
+        """Usuarios con alguna tarea"""
+        return list(self._user_index)
+
+    def scan_updated_before(
+        self, user_id: int, before_us: int, after: Optional[Tuple[int, int]] = None, limit: int = 500
+    ) -> Tuple[List[TaskRecord], Optional[Tuple[int, int]]]:
+        """
+        Las siguientes `limit` entradas del índice por updated_at del usuario anteriores a `before_us`,
+        a partir de la clave (updated_us, id) `after`. Devuelve las tareas y la clave de la última
+        entrada revisada, o None si no quedan: recorrer el índice por tramos no bloquea a nadie.
+        """
+        tasks = self._tasks
+
+        def read():
+            entries = self._updated.get(user_id, [])
+            start = bisect_right(entries, after) if after is not None else 0
+            end = min(start + limit, bisect_left(entries, (before_us, float("-inf"))))
+            scanned = entries[start:end]
+            more = end < len(entries) and entries[end][0] < before_us
+            return [tasks[task_id] for _, task_id in scanned], scanned[-1] if more else None
+
+        return self._users.read(user_id, read)
+
+    def _priorities(self, task_filter: TaskFilter) -> range:
+        low = task_filter.priority_min or MIN_PRIORITY
+        high = task_filter.priority_max or MAX_PRIORITY
+        return range(low, high + 1)
+
+    def _buckets(self, facets: dict, task_filter: TaskFilter, priorities: Iterable[int]) -> List[List[int]]:
+        statuses = task_filter.status or list(TaskStatus)
+        return [facets[(s, p)] for p in priorities for s in statuses if (s, p) in facets]
+
+    def _scan_by_id(self, facets: dict, task_filter: TaskFilter, after: Optional[tuple], desc: bool) -> Iterator[int]:
+        after_id = after[1] if after else None
+        buckets = self._buckets(facets, task_filter, self._priorities(task_filter))
+        return heapq.merge(*(_ids_from(ids, after_id, desc) for ids in buckets), reverse=desc)
+
+    def _scan_by_priority(
+        self, facets: dict, task_filter: TaskFilter, after: Optional[tuple], desc: bool
+    ) -> Iterator[int]:
+        priorities = self._priorities(task_filter)
+        for p in (reversed(priorities) if desc else priorities):
+            after_id = None
+            if after is not None:
+                if (p > after[0]) if desc else (p < after[0]):
+                    continue
+                if p == after[0]:
+                    after_id = after[1]
+            buckets = self._buckets(facets, task_filter, (p,))
+            yield from heapq.merge(*(_ids_from(ids, after_id, desc) for ids in buckets), reverse=desc)
+
+    def _scan_by_updated(
+        self, user_id: int, task_filter: TaskFilter, after: Optional[tuple], desc: bool
+    ) -> Iterator[int]:
+        entries = self._updated.get(user_id, [])
+        start, end = 0, len(entries)
+        if task_filter.updated_from is not None:
+            start = bisect_left(entries, (epoch_us(task_filter.updated_from), float("-inf")))
+        if task_filter.updated_to is not None:
+            end = bisect_right(entries, (epoch_us(task_filter.updated_to), float("inf")))
+        if after is not None:
+            key = (epoch_us(datetime.fromisoformat(after[0])), after[1])
+            if desc:
+                end = min(end, bisect_left(entries, key))
+            else:
+                start = max(start, bisect_right(entries, key))
+        positions = range(end - 1, start - 1, -1) if desc else range(start, end)
+        return (entries[i][1] for i in positions)
+
+    def _index(self, task: TaskRecord, text: bool = True) -> None:
+        search = self._search.get(task.user_id) if text else None
+        if search is not None:
+            search.add(task)
+        facets = self._facets.setdefault(task.user_id, {})
+        insort(facets.setdefault((task.status, task.priority), []), task.id)
+        insort(self._updated.setdefault(task.user_id, []), (task.updated_us, task.id))
+
+    def _unindex(self, task: TaskRecord, text: bool = True) -> None:
+        search = self._search.get(task.user_id) if text else None
+        if search is not None:
+            search.remove(task)
+        facets = self._facets.get(task.user_id, {})
+        bucket = facets.get((task.status, task.priority))
+        if bucket is not None:
+            _remove_sorted(bucket, task.id)
+            if not bucket:
+                del facets[(task.status, task.priority)]
+        if not facets:
+            self._facets.pop(task.user_id, None)
+        updated = self._updated.get(task.user_id)
+        if updated is not None:
+            _remove_sorted(updated, (task.updated_us, task.id))
+            if not updated:
+                del self._updated[task.user_id]
@@ -0,0 +1,25 @@
+import secrets
+import threading
+from typing import Dict
+
+
+class CollectionVersions:
+    """
+    Versión de la colección de tareas de cada usuario, en memoria del proceso.
+
+    Cambia con cada alta, modificación o borrado de sus tareas. Los contadores se
+    pierden al reiniciar, así que la versión lleva una época aleatoria del proceso:
+    una versión de antes del reinicio nunca coincide con una nueva.
+    """
+
+    def __init__(self):
+        self.epoch = secrets.token_hex(4)
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> str:
+        return f"{self.epoch}.{self._versions.get(user_id, 0)}"
+
+    def bump(self, user_id: int) -> None:
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
@@ -0,0 +1,90 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+from models.user import User
+
+
+def token_digest(token: str) -> bytes:
+    """Clave de caché de un token (no se guarda el token en claro)"""
+    return hashlib.sha256(token.encode()).digest()
+
+
+class TokenCache:
+    """Caché LRU de tokens ya verificados; cada entrada vive hasta el `exp` del token"""
+
+    def __init__(self, max_size: int = 10000, max_ttl: Optional[float] = None):
+        self.max_size = max_size
+        # Si los usuarios se comparten entre procesos, otro worker puede desactivar
+        # un usuario sin avisar a esta caché: max_ttl acota cuánto se reutiliza
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._by_user: Dict[int, Set[bytes]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> Optional[User]:
+        """Obtener el usuario validado de un token, o None si no está o expiró"""
+        key = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            user, expires_at = entry
+            if expires_at <= time.time():
+                self._discard(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user
+
+    def put(self, token: str, user: User, expires_at: float) -> None:
+        """Guardar el usuario validado de un token hasta `expires_at` (epoch en segundos)"""
+        key = token_digest(token)
+        if self.max_ttl is not None:
+            expires_at = min(expires_at, time.time() + self.max_ttl)
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (user, expires_at)
+            self._by_user.setdefault(user.id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Olvidar todos los tokens de un usuario (cambio de datos o desactivación)"""
+        with self._lock:
+            for key in self._by_user.pop(user_id, ()):
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> dict:
+        """Contadores de aciertos, fallos y expulsiones"""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _discard(self, key: bytes) -> None:
+        user, _ = self._entries.pop(key)
+        keys = self._by_user.get(user.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user.id]
@@ -0,0 +1,87 @@
+from typing import Dict, Iterable, Optional
+from services.concurrency import IdAllocator
+
+
+def email_key(email: str) -> str:
+    """Clave normalizada de un email para el índice (sin distinguir mayúsculas)"""
+    return email.casefold()
+
+
+class UserDirectory:
+    """Directorio de usuarios en memoria con índices únicos por username y email"""
+
+    def __init__(self):
+        self._by_id: Dict[int, dict] = {}
+        self._by_username: Dict[str, dict] = {}
+        self._by_email: Dict[str, dict] = {}
+        self._ids = IdAllocator()
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    @property
+    def next_id(self) -> int:
+        return self._ids.next_id
+
+    def load(self, users: Iterable[dict], next_id: int) -> None:
+        """Cargar usuarios ya validados (p. ej. al recuperar un snapshot)"""
+        for user in users:
+            self.add(user)
+        self._ids.advance(next_id)
+
+    def allocate_id(self) -> int:
+        """Reservar el siguiente id de usuario"""
+        return self._ids.allocate()
+
+    def add(self, user: dict) -> None:
+        """Registrar un usuario; lanza ValueError si el username o el email ya existen"""
+        self._check_add(user)
+        self._by_id[user["id"]] = user
+        self._by_username[user["username"]] = user
+        self._by_email[email_key(user["email"])] = user
+
+    def get(self, user_id: int) -> Optional[dict]:
+        return self._by_id.get(user_id)
+
+    def get_by_username(self, username: str) -> Optional[dict]:
+        return self._by_username.get(username)
+
+    def get_by_email(self, email: str) -> Optional[dict]:
+        return self._by_email.get(email_key(email))
+
+    def update(self, user_id: int, changes: dict) -> Optional[dict]:
+        """Aplicar cambios a un usuario manteniendo los índices al día"""
+        user = self._by_id.get(user_id)
+        if user is None:
+            return None
+        self._check_update(user, changes)
+
+        del self._by_username[user["username"]]
+        del self._by_email[email_key(user["email"])]
+        user.update(changes)
+        self._by_username[user["username"]] = user
+        self._by_email[email_key(user["email"])] = user
+        return user
+
+    def deactivate(self, user_id: int) -> Optional[dict]:
+        """Marcar un usuario como inactivo"""
+        return self.update(user_id, {"is_active": False})
+
+    def _check_add(self, user: dict) -> None:
+        if user["username"] in self._by_username:
+            raise ValueError(f"username duplicado: {user['username']}")
+        if email_key(user["email"]) in self._by_email:
+            raise ValueError(f"email duplicado: {user['email']}")
+
+    def _check_update(self, user: dict, changes: dict) -> None:
+        new_username = changes.get("username", user["username"])
+        new_email = changes.get("email", user["email"])
+        owner = self._by_username.get(new_username)
+        if owner is not None and owner is not user:
+            raise ValueError(f"username duplicado: {new_username}")
+        owner = self._by_email.get(email_key(new_email))
+        if owner is not None and owner is not user:
+            raise ValueError(f"email duplicado: {new_email}")
@@ -0,0 +1,231 @@
+"""
+Write-ahead log en segmentos con fsync por lotes (group commit).
+
+Cada registro lleva un número de secuencia (lsn) creciente. `append` no espera al
+disco: un hilo escritor junta todo lo pendiente, lo escribe y hace un único fsync
+por lote. `flush` espera a que lo añadido hasta ese momento sea durable. Si una
+escritura o un fsync fallan, el hilo escritor para y `append`, `flush` y `close`
+lanzan WALWriteError: un cambio no se confirma si ya no puede llegar al disco.
+
+Los segmentos se llaman wal-<primer lsn>.log; al hacer un snapshot se rota a un
+segmento nuevo y los anteriores se pueden borrar.
+"""
+
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+# longitud del payload, lsn, operación
+RECORD_HEADER = struct.Struct("<IQB")
+RECORD_CRC = struct.Struct("<I")
+SEGMENT_PREFIX = "wal-"
+SEGMENT_SUFFIX = ".log"
+
+
+def segment_name(first_lsn: int) -> str:
+    return f"{SEGMENT_PREFIX}{first_lsn:020d}{SEGMENT_SUFFIX}"
+
+
+def list_segments(directory: str) -> List[Tuple[int, str]]:
+    """Segmentos del directorio como (primer lsn, ruta), ordenados"""
+    segments = []
+    for name in os.listdir(directory):
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+            first_lsn = int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            segments.append((first_lsn, os.path.join(directory, name)))
+    return sorted(segments)
+
+
+def encode_record(lsn: int, op: int, payload: bytes) -> bytes:
+    header = RECORD_HEADER.pack(len(payload), lsn, op)
+    return header + payload + RECORD_CRC.pack(zlib.crc32(payload, zlib.crc32(header)))
+
+
+def read_segment(path: str) -> Iterator[Tuple[int, int, bytes]]:
+    """
+    Leer los registros (lsn, op, payload) de un segmento.
+    Si el final está incompleto o corrupto (escritura cortada) se trunca el fichero ahí.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    offset, end = 0, len(data)
+    while offset + RECORD_HEADER.size <= end:
+        length, lsn, op = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        stop = start + length
+        if stop + RECORD_CRC.size > end:
+            break
+        payload = data[start:stop]
+        (crc,) = RECORD_CRC.unpack_from(data, stop)
+        if crc != zlib.crc32(payload, zlib.crc32(data[offset:start])):
+            break
+        yield lsn, op, payload
+        offset = stop + RECORD_CRC.size
+    if offset < end:
+        with open(path, "r+b") as f:
+            f.truncate(offset)
+
+
+def fsync_directory(directory: str) -> None:
+    """Hacer durables las altas, bajas y renombrados de ficheros del directorio"""
+    if not hasattr(os, "O_DIRECTORY"):  # Windows no permite abrir directorios
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class WALWriteError(Exception):
+    """El hilo escritor no pudo escribir o hacer fsync: el WAL ya no guarda nada"""
+
+
+class WriteAheadLog:
+    """WAL append-only con un hilo escritor que hace fsync por lotes"""
+
+    def __init__(self, directory: str, next_lsn: int = 1, commit_interval: float = 0.005, fsync: bool = True):
+        self.directory = directory
+        # Tiempo mínimo entre dos fsync: mientras tanto se acumulan registros en el lote
+        self.commit_interval = commit_interval
+        self.fsync = fsync
+        self._cond = threading.Condition()
+        self._pending: List[bytes] = []
+        self._retired = []
+        self._next_lsn = next_lsn
+        self._durable_lsn = next_lsn - 1
+        self._segment_lsn = next_lsn
+        self._file = self._open_segment(next_lsn)
+        self._closed = False
+        # Error de E/S que paró el hilo escritor
+        self._error: Optional[OSError] = None
+        self.commits = 0
+        self._writer = threading.Thread(target=self._run, name="wal-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def last_lsn(self) -> int:
+        """Último lsn asignado"""
+        return self._next_lsn - 1
+
+    def append(self, op: int, payload: bytes) -> int:
+        """Añadir un registro y devolver su lsn; no espera al fsync"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WAL cerrado")
+            self._raise_if_failed()
+            lsn = self._next_lsn
+            self._next_lsn += 1
+            self._pending.append(encode_record(lsn, op, payload))
+            self._cond.notify_all()
+            return lsn
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Esperar a que todo lo añadido hasta ahora esté en disco; False si se agota `timeout`"""
+        with self._cond:
+            target = self._next_lsn - 1
+            self._cond.notify_all()
+            done = self._cond.wait_for(lambda: self._durable_lsn >= target or self._error is not None, timeout)
+            self._raise_if_failed()
+            return done
+
+    def rotate(self) -> int:
+        """
+        Empezar un segmento nuevo y devolver el último lsn de los anteriores.
+        Los segmentos anteriores se pueden borrar cuando un snapshot cubre ese lsn.
+        """
+        with self._cond:
+            self._raise_if_failed()
+            boundary = self._next_lsn - 1
+            if self._segment_lsn == self._next_lsn:
+                return boundary  # el segmento actual sigue vacío
+            if self._pending:
+                self._file.write(b"".join(self._pending))
+                self._pending = []
+            self._file.flush()
+            # El hilo escritor hace el fsync y cierra el segmento anterior
+            self._retired.append(self._file)
+            self._segment_lsn = self._next_lsn
+            self._file = self._open_segment(self._next_lsn)
+            self._cond.notify_all()
+            return boundary
+
+    def remove_segments_until(self, lsn: int) -> int:
+        """Borrar los segmentos cuyos registros tienen todos lsn <= `lsn`; devuelve cuántos"""
+        segments = list_segments(self.directory)
+        removed = 0
+        for (first, path), (next_first, _) in zip(segments, segments[1:]):
+            if next_first - 1 <= lsn and first < self._segment_lsn:
+                os.remove(path)
+                removed += 1
+        if removed:
+            fsync_directory(self.directory)
+        return removed
+
+    def close(self) -> None:
+        """Escribir lo pendiente y parar el hilo escritor"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        try:
+            self._file.close()
+        except OSError:
+            # Al cerrar se vuelve a intentar vaciar el buffer del lote que ya falló
+            if self._error is None:
+                raise
+        self._raise_if_failed()
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise WALWriteError(f"el WAL dejó de escribir: {self._error!r}") from self._error
+
+    def _open_segment(self, first_lsn: int):
+        f = open(os.path.join(self.directory, segment_name(first_lsn)), "ab")
+        fsync_directory(self.directory)
+        return f
+
+    def _run(self) -> None:
+        try:
+            self._write_batches()
+        except OSError as exc:
+            # Sin hilo escritor nada más llegaría al disco: desde ahora append y flush lanzan el error
+            with self._cond:
+                self._error = exc
+                self._cond.notify_all()
+
+    def _write_batches(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._retired or self._closed)
+                if self._closed and not self._pending and not self._retired:
+                    self._sync(self._file)
+                    return
+                batch, self._pending = self._pending, []
+                retired, self._retired = self._retired, []
+                target = self._next_lsn - 1
+                current = self._file
+                if batch:
+                    current.write(b"".join(batch))
+                current.flush()
+            # El fsync (lo lento) se hace fuera del lock para no bloquear append
+            for f in retired:
+                self._sync(f)
+                f.close()
+            self._sync(current)
+            with self._cond:
+                self._durable_lsn = max(self._durable_lsn, target)
+                self.commits += 1
+                self._cond.notify_all()
+            if self.commit_interval:
+                time.sleep(self.commit_interval)
+
+    def _sync(self, f) -> None:
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
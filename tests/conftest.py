@@ -1,4 +1,6 @@
+import os
 import warnings
+import pytest
 
 # Silenciar DeprecationWarning específico de python-jose que usa datetime.utcnow()
 warnings.filterwarnings(
@@ -13,3 +15,29 @@ warnings.filterwarnings(
     category=DeprecationWarning,
     module=r"jose\.jwt",
 )
+
+# Los tests comparten cliente, IP y usuario: el rate limiting solo se activa en los tests que lo prueban
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+
+# Usuario de prueba compartido con tests/test_tasks.py
+TEST_USER = {
+    "username": "taskuser",
+    "email": "task@example.com",
+    "password": "taskpass123"
+}
+
+
+@pytest.fixture
+def auth_headers():
+    """Registra el usuario de prueba si hace falta y devuelve su cabecera de autenticación"""
+    from fastapi.testclient import TestClient
+    from main import app
+
+    client = TestClient(app)
+    client.post("/api/auth/register", json=TEST_USER)
+    login_response = client.post(
+        "/api/auth/login",
+        data={"username": TEST_USER["username"], "password": TEST_USER["password"]}
+    )
+    return {"Authorization": f"Bearer {login_response.json()['access_token']}"}
@@ -0,0 +1,216 @@
+"""
+Tests del archivo de tareas completadas
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def test_task_archive_segment(tmp_path):
+    """Test el segmento del archivo: páginas entre bloques, salidas, re-archivo, purga, reapertura y cola corrupta"""
+    from datetime import datetime
+    from models.task import TaskStatus
+    from services.archive import TaskArchive
+    from services.task_record import TaskRecord
+
+    now = datetime(2024, 1, 1, 12, 0, 0, 123456)
+
+    def records(user_id, ids):
+        return [
+            TaskRecord(i, user_id, f"Tarea {i}", None if i % 2 else "descripción", TaskStatus.COMPLETED, 1 + i % 5, now, now)
+            for i in ids
+        ]
+
+    path = str(tmp_path / "archive.seg")
+    archive = TaskArchive(path)
+    archive.append(1, records(1, range(1, 6)))
+    archive.append(2, records(2, range(6, 9)))
+    archive.append(1, records(1, range(9, 12)))
+    assert archive.count(1) == 8 and archive.count(2) == 3 and len(archive) == 11
+
+    pages, position = [], (0, 0)
+    while position is not None:
+        tasks, position = archive.page(1, position, 3)
+        pages.append([task.id for task in tasks])
+    assert pages == [[1, 2, 3], [4, 5, 9], [10, 11]]
+    first = archive.get_many(1, [2, 7])[2]
+    assert list(archive.get_many(1, [2, 7])) == [2]
+    assert (first.title, first.description, first.updated_at, first.priority) == ("Tarea 2", "descripción", now, 3)
+
+    archive.remove(1, [2, 10])
+    assert [task.id for task in archive.iter_user(1)] == [1, 3, 4, 5, 9, 11] and archive.count(1) == 6
+    archive.append(1, records(1, [2]))  # vuelve a archivarse después de salir
+    assert [task.id for task in archive.iter_user(1)] == [1, 3, 4, 5, 9, 11, 2] and archive.count(1) == 7
+    assert archive.drop_user(2) == 3 and archive.count(2) == 0
+    size = archive.size
+    archive.close()
+
+    # Una escritura interrumpida deja una cola incompleta que se descarta al abrir
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02\x03")
+    archive = TaskArchive(path)
+    assert archive.size == size
+    assert [task.id for task in archive.iter_user(1)] == [1, 3, 4, 5, 9, 11, 2]
+    assert archive.count(1) == 7 and archive.count(2) == 0
+    archive.close()
+
+    assert TaskArchive().page(1) == ([], None)
+
+
+def test_archive_completed_sweep_and_unarchive(tmp_path):
+    """Test el barrido archiva solo las completadas antiguas, las estadísticas no cambian y unarchive las devuelve"""
+    import asyncio
+    from datetime import datetime, timedelta
+    from models.task import TaskChangeType, TaskStatus
+    from services.archive import TaskArchive
+    from services.maintenance import archive_completed
+    from services.metrics import MetricsRegistry
+    from services.scheduler import Scheduler
+    from services.task_record import TaskRecord
+    from services.task_service import BULK_NOT_FOUND, BULK_OK, TaskService
+
+    service = TaskService()
+    service.archive = TaskArchive(str(tmp_path / "archive.seg"))
+    now = datetime.now()
+    statuses = list(TaskStatus)
+    records = []
+    for i in range(1, 301):
+        age = timedelta(days=60 if i % 3 else 1)
+        updated = now - age - timedelta(seconds=i)
+        records.append(TaskRecord(i, 1 + i % 2, f"Tarea {i}", None, statuses[i % len(statuses)], 1 + i % 5, now - age, updated))
+    service.store.load(records, 301)
+    old_completed = {t.id for t in records if t.status == TaskStatus.COMPLETED and t.updated_at < now - timedelta(days=30)}
+    stats_before = {user_id: service.get_task_stats(user_id, days=90) for user_id in (1, 2)}
+    since = service.changes.read(1, None).next_since
+
+    async def sweep():
+        scheduler = Scheduler(registry=MetricsRegistry())
+        return await scheduler.sweep_in_thread(
+            "archive", archive_completed(service, now - timedelta(days=30), batch_size=7)
+        )
+
+    assert asyncio.run(sweep()) == len(old_completed) > 0
+    hot = {task.id for task in service.store}
+    assert hot == {t.id for t in records} - old_completed
+    assert service.archive.count(1) + service.archive.count(2) == len(old_completed)
+    for user_id in (1, 2):
+        assert service.get_task_stats(user_id, days=90) == stats_before[user_id]
+        # Con las estadísticas recalculadas desde cero también se cuentan las archivadas
+        service.stats.discard(user_id)
+        assert service.get_task_stats(user_id, days=90) == stats_before[user_id]
+    changes = service.changes.read(1, since, limit=1000).changes
+    archived_events = [change for change in changes if change.type == TaskChangeType.ARCHIVED]
+    assert {change.task_id for change in archived_events} == {i for i in old_completed if i % 2 == 0}
+    assert all(change.task is None for change in archived_events)
+    assert asyncio.run(sweep()) == 0
+
+    pages, cursor = [], None
+    while True:
+        tasks, cursor = service.get_archived_tasks_page(1, 10, cursor)
+        pages.extend(task.id for task in tasks)
+        if cursor is None:
+            break
+    assert sorted(pages) == sorted(i for i in old_completed if i % 2 == 0)
+    with pytest.raises(ValueError):
+        service.get_archived_tasks_page(1, 10, "no-es-un-cursor")
+
+    restore = sorted(old_completed)[:2]
+    other_user = next(i for i in old_completed if i % 2 == 1)
+    results = service.unarchive_tasks(restore + [other_user, 10_000], 1 + restore[0] % 2)
+    expected_ok = [i for i in restore if i % 2 == restore[0] % 2]
+    assert [task_id for task_id, result, _ in results if result == BULK_OK] == expected_ok
+    assert all(result == BULK_NOT_FOUND for task_id, result, _ in results if task_id not in expected_ok)
+    for task_id in expected_ok:
+        task = service.get_task_by_id(task_id)
+        assert task.status == TaskStatus.COMPLETED and task.updated_at >= now
+    assert service.archive.count(1) + service.archive.count(2) == len(old_completed) - len(expected_ok)
+    service.stats.discard(1)
+    service.stats.discard(2)
+    assert sum(service.get_task_stats(user_id)["total"] for user_id in (1, 2)) == 300
+    # Recién recuperadas: el siguiente barrido no las vuelve a archivar
+    asyncio.run(sweep())
+    assert all(service.get_task_by_id(task_id) is not None for task_id in expected_ok)
+    service.archive.close()
+
+
+def test_archive_endpoints(auth_headers):
+    """Test GET /api/tasks/archive pagina las tareas archivadas y POST /api/tasks/archive/unarchive las devuelve"""
+    from datetime import datetime, timedelta
+    from services.task_service import task_service_instance
+
+    user = {"username": "archiveuser", "email": "archive@example.com", "password": "archivepass123"}
+    client.post("/api/auth/register", json=user)
+    token = client.post("/api/auth/login", data={"username": user["username"], "password": user["password"]}).json()
+    headers = {"Authorization": f"Bearer {token['access_token']}"}
+    user_id = client.get("/api/auth/me", headers=headers).json()["id"]
+
+    ids = [client.post("/api/tasks/", json={"title": f"Archivar {i}"}, headers=headers).json()["id"] for i in range(5)]
+    active = client.post("/api/tasks/", json={"title": "Pendiente"}, headers=headers).json()["id"]
+    for task_id in ids:
+        client.put(f"/api/tasks/{task_id}", json={"status": "completed"}, headers=headers)
+    archived, _ = task_service_instance.archive_completed(user_id, datetime.now() + timedelta(seconds=1))
+    assert archived == 5
+
+    listed = [task["id"] for task in client.get("/api/tasks/?limit=1000", headers=headers).json()]
+    assert active in listed and not set(ids) & set(listed)
+    assert client.get(f"/api/tasks/{ids[0]}", headers=headers).status_code == 404
+
+    response = client.get("/api/tasks/archive?limit=3", headers=headers)
+    assert response.status_code == 200
+    first = response.json()
+    assert [task["id"] for task in first] == ids[:3] and first[0]["status"] == "completed"
+    second = client.get(f"/api/tasks/archive?limit=3&cursor={response.headers['X-Next-Cursor']}", headers=headers)
+    assert [task["id"] for task in second.json()] == ids[3:] and "X-Next-Cursor" not in second.headers
+    assert client.get("/api/tasks/archive?cursor=basura", headers=headers).status_code == 400
+    others = client.get("/api/tasks/archive?limit=1000", headers=auth_headers).json()
+    assert not {task["id"] for task in others} & set(ids)
+
+    response = client.post("/api/tasks/archive/unarchive", json={"ids": [ids[0], active]}, headers=headers)
+    assert response.status_code == 200
+    results = response.json()
+    assert results[0]["status_code"] == 200 and results[0]["task"]["id"] == ids[0]
+    assert results[1]["status_code"] == 404
+    assert client.get(f"/api/tasks/{ids[0]}", headers=headers).status_code == 200
+    assert [task["id"] for task in client.get("/api/tasks/archive", headers=headers).json()] == ids[1:]
+
+
+def test_archive_append_runs_without_user_lock(tmp_path):
+    """Test el archivo se escribe sin el lock del usuario y las tareas que cambian entretanto se quedan en el almacén"""
+    import threading
+    from datetime import datetime, timedelta
+    from models.task import TaskStatus, TaskUpdate
+    from services.archive import TaskArchive
+    from services.task_record import TaskRecord
+    from services.task_service import TaskService
+
+    service = TaskService()
+    service.archive = TaskArchive(str(tmp_path / "archive.seg"))
+    old = datetime.now() - timedelta(days=90)
+    service.store.add_many([TaskRecord(i, 1, f"Vieja {i}", None, TaskStatus.COMPLETED, 1, old, old) for i in (1, 2, 3)])
+
+    append = service.archive.append
+    lock_free = []
+
+    def append_while_user_writes(user_id, tasks):
+        # Otro hilo escribe en el usuario mientras se hace el fsync: no debe quedarse esperando
+        def write():
+            lock_free.append(service.store.user_lock(1).acquire(timeout=1))
+            service.store.user_lock(1).release()
+            service.update_task(2, TaskUpdate(title="Reabierta", status=TaskStatus.PENDING))
+            service.delete_task(3)
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        writer.join()
+        append(user_id, tasks)
+
+    service.archive.append = append_while_user_writes
+    archived, _ = service.archive_completed(1, datetime.now() - timedelta(days=30))
+
+    assert lock_free == [True] and archived == 1
+    assert service.get_task_by_id(1) is None and service.get_task_by_id(2).title == "Reabierta"
+    assert [task.id for task in service.archive.iter_user(1)] == [1]
+    service.archive.close()
@@ -1,3 +1,87 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from services.user_directory import UserDirectory
+
+client = TestClient(app)
+
+
+def test_register_duplicate_email_case_insensitive():
+    """Test el email se compara sin distinguir mayúsculas al registrar"""
+    user = {"username": "caseuser", "email": "Case@Example.com", "password": "casepass123"}
+    assert client.post("/api/auth/register", json=user).status_code == 201
+
+    duplicate = {"username": "caseuser2", "email": "case@example.com", "password": "casepass123"}
+    response = client.post("/api/auth/register", json=duplicate)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "El email ya está registrado"
+
+
+def test_user_directory_indexes():
+    """Test los índices del directorio se mantienen al actualizar y desactivar"""
+    directory = UserDirectory()
+    directory.add({"id": 1, "username": "ana", "email": "Ana@example.com", "is_active": True})
+    directory.add({"id": 2, "username": "luis", "email": "luis@example.com", "is_active": True})
+
+    assert directory.get_by_email("ana@EXAMPLE.com")["id"] == 1
+    with pytest.raises(ValueError):
+        directory.add({"id": 3, "username": "ana", "email": "otra@example.com", "is_active": True})
+
+    directory.update(1, {"username": "ana.maria", "email": "ana.maria@example.com"})
+    assert directory.get_by_username("ana") is None
+    assert directory.get_by_email("ana@example.com") is None
+    assert directory.get_by_username("ana.maria")["id"] == 1
+
+    with pytest.raises(ValueError):
+        directory.update(2, {"email": "ANA.MARIA@example.com"})
+    assert directory.get_by_username("luis")["email"] == "luis@example.com"
+
+    directory.deactivate(2)
+    assert directory.get_by_username("luis")["is_active"] is False
+
+
+def test_token_cache_hits_and_invalidation():
+    """Test la caché de tokens se reutiliza y se invalida al desactivar el usuario"""
+    from services.auth_service import auth_service_instance
+
+    user = {"username": "cacheuser", "email": "cache@example.com", "password": "cachepass123"}
+    client.post("/api/auth/register", json=user)
+    token = client.post(
+        "/api/auth/login", data={"username": user["username"], "password": user["password"]}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    hits_before = auth_service_instance.token_cache.hits
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+    assert auth_service_instance.token_cache.hits > hits_before
+
+    user_id = auth_service_instance.get_user_by_username("cacheuser")["id"]
+    assert auth_service_instance.deactivate_user(user_id)
+    response = client.get("/api/auth/me", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Usuario inactivo"
+
+
+def test_login_returns_503_when_hasher_saturated():
+    """Test el login responde 503 con Retry-After si la cola de bcrypt está llena"""
+    from services.auth_service import auth_service_instance
+    from services.password_hasher import PasswordHasher
+
+    client.post("/api/auth/register", json={
+        "username": "busyuser", "email": "busy@example.com", "password": "busypass123"
+    })
+    original = auth_service_instance.hasher
+    auth_service_instance.hasher = PasswordHasher(workers=1, max_pending=0)
+    try:
+        response = client.post("/api/auth/login", data={"username": "busyuser", "password": "busypass123"})
+    finally:
+        auth_service_instance.hasher = original
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -100,4 +184,4 @@ class AuthService:
             return None
 
 # Instancia global compartida
-auth_service_instance = AuthService()
\ No newline at end of file
+auth_service_instance = AuthService()
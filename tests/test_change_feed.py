@@ -0,0 +1,73 @@
+"""
+Tests del feed de cambios por usuario
+"""
+
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def test_change_feed_long_poll_and_resync(auth_headers):
+    """Test feed de cambios: long-poll, miles de suscriptores en espera y resync de clientes lentos"""
+    import asyncio
+    import httpx
+    from models.task import TaskChangeType, TaskStatus
+    from services.change_feed import ChangeBatch, ChangeFeed
+    from services.task_record import TaskRecord
+    from datetime import datetime
+
+    position = client.get("/api/tasks/changes", headers=auth_headers).json()
+    assert position["changes"] == [] and not position["resync"]
+    since = position["next_since"]
+
+    task_id = client.post("/api/tasks/", json={"title": "Publicada"}, headers=auth_headers).json()["id"]
+    client.put(f"/api/tasks/{task_id}", json={"status": "completed"}, headers=auth_headers)
+    client.delete(f"/api/tasks/{task_id}", headers=auth_headers)
+    batch = client.get(f"/api/tasks/changes?since={since}", headers=auth_headers).json()
+    assert [(c["type"], c["task_id"]) for c in batch["changes"]] == [
+        ("created", task_id), ("updated", task_id), ("deleted", task_id)
+    ]
+    assert batch["changes"][1]["task"]["status"] == "completed" and batch["changes"][2]["task"] is None
+    assert [c["seq"] for c in batch["changes"]] == [since + 1, since + 2, since + 3]
+    since = batch["next_since"]
+
+    async def long_poll():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+            waiting = asyncio.create_task(
+                c.get(f"/api/tasks/changes?since={since}&timeout=5", headers=auth_headers)
+            )
+            await asyncio.sleep(0.05)
+            assert not waiting.done()
+            await c.post("/api/tasks/", json={"title": "Despierta"}, headers=auth_headers)
+            return await asyncio.wait_for(waiting, 1)
+
+    response = asyncio.run(long_poll())
+    assert [c["task"]["title"] for c in response.json()["changes"]] == ["Despierta"]
+
+    # Un since de antes del reinicio (o ya fuera del buffer) pide resync, también por SSE
+    stale = client.get("/api/tasks/changes?since=1", headers=auth_headers).json()
+    assert stale["resync"] and stale["next_since"] > since
+    response = client.get("/api/tasks/changes/stream", headers={**auth_headers, "Last-Event-ID": "1"})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith("event: resync\n")
+
+    feed = ChangeFeed(size=3)
+    now = datetime.now()
+    tasks = [TaskRecord(i, 7, f"T{i}", None, TaskStatus.PENDING, 1, now, now) for i in range(1, 6)]
+    start = feed.read(7, None).next_since
+
+    async def subscribers(count):
+        waiting = [asyncio.create_task(feed.wait(7, start, timeout=5)) for _ in range(count)]
+        await asyncio.sleep(0.01)
+        assert feed.subscribers() == count
+        feed.publish(7, [(TaskChangeType.CREATED, tasks[0])])
+        return await asyncio.gather(*waiting)
+
+    results = asyncio.run(subscribers(2000))
+    assert all(r.changes[0].task_id == 1 for r in results) and feed.subscribers() == 0
+
+    feed.publish(7, [(TaskChangeType.UPDATED, task) for task in tasks[1:]])
+    assert feed.read(7, start).resync  # el primer cambio ya salió del buffer de 3
+    assert [c.task_id for c in feed.read(7, start + 2).changes] == [3, 4, 5]
+    assert feed.read(7, start + 5) == ChangeBatch([], start + 5)
@@ -0,0 +1,74 @@
+"""
+Tests de la compresión de respuestas
+"""
+
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def test_response_compression(auth_headers):
+    """Test gzip según Accept-Encoding, umbral de tamaño, tipos permitidos, presupuesto de CPU y caché"""
+    from middleware.compression import CompressionMiddleware, negotiate
+
+    headers = auth_headers
+    client.post("/api/tasks/bulk", json=[{"title": f"Tarea comprimible {i}", "description": "x" * 80} for i in range(30)],
+                headers=headers)
+    plain = client.get("/api/tasks/?limit=100", headers={**headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    gzipped = client.get("/api/tasks/?limit=100", headers={**headers, "Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in gzipped.headers["vary"].lower()
+    assert gzipped.json() == plain.json()
+    assert gzipped.num_bytes_downloaded < plain.num_bytes_downloaded / 3
+    assert gzipped.headers["etag"] == plain.headers["etag"]
+    # Respuestas pequeñas y streams
+    assert "content-encoding" not in client.get("/health", headers={"Accept-Encoding": "gzip"}).headers
+    export = client.get("/api/tasks/export?format=csv", headers={**headers, "Accept-Encoding": "gzip"})
+    assert export.headers["content-encoding"] == "gzip"
+    assert export.text.count("Tarea comprimible") >= 30
+
+    assert negotiate("gzip;q=0.5, br", ("br", "gzip")) == "br"
+    assert negotiate("br;q=0, gzip;q=0.1", ("br", "gzip")) == "gzip"
+    assert negotiate("*;q=0", ("gzip",)) is None
+    assert negotiate("deflate, identity", ("gzip",)) is None
+
+    # Middlewares propios sobre el router, sin la compresión configurada de la app
+    # Caché: el mismo listado sin cambios no se vuelve a comprimir
+    compressed = CompressionMiddleware(app.router, encodings=("gzip",))
+    cached_client = TestClient(compressed)
+    for _ in range(3):
+        response = cached_client.get("/api/tasks/?limit=100", headers={**headers, "Accept-Encoding": "gzip"})
+        assert response.json() == plain.json()
+    assert compressed.cache.misses == 1 and compressed.cache.hits == 2
+    assert compressed.stats()["bytes_out"] < compressed.stats()["bytes_in"]
+
+    # Sin presupuesto de CPU suficiente ni para el nivel rápido se envía sin comprimir
+    starved = CompressionMiddleware(app.router, encodings=("gzip",), cpu_budget=1e-9, cache_bytes=0)
+    response = TestClient(starved).get("/api/tasks/?limit=100", headers={**headers, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers and response.json() == plain.json()
+    assert starved.over_budget == 1
+
+    # Tipos fuera de la lista
+    json_only = CompressionMiddleware(app.router, encodings=("gzip",), content_types=("text/csv",), minimum_size=0)
+    response = TestClient(json_only).get("/api/tasks/?limit=100", headers={**headers, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_compressed_task_keeps_etag_for_if_match(auth_headers):
+    """Test el ETag de una tarea leída comprimida sirve para un PUT con If-Match"""
+    task = client.post("/api/tasks/", json={"title": "Grande", "description": "任务" * 250}, headers=auth_headers).json()
+    path = f"/api/tasks/{task['id']}"
+
+    response = client.get(path, headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    etag = response.headers["ETag"]
+    assert not etag.startswith("W/")
+    assert etag == client.get(path, headers={**auth_headers, "Accept-Encoding": "identity"}).headers["ETag"]
+
+    conditional = {**auth_headers, "If-Match": etag, "Accept-Encoding": "gzip"}
+    response = client.put(path, json={"status": "completed"}, headers=conditional)
+    assert response.status_code == 200 and response.json()["status"] == "completed"
+    assert client.put(path, json={"status": "pending"}, headers=conditional).status_code == 412
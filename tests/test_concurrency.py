@@ -0,0 +1,107 @@
+"""
+Tests de TaskService con operaciones concurrentes desde hilos
+"""
+
+
+def test_concurrent_mixed_operations_keep_invariants():
+    """Test miles de operaciones concurrentes desde hilos: ids únicos, índices, estadísticas y lecturas consistentes"""
+    import random
+    import sys
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from datetime import date
+    from models.task import TaskBulkUpdate, TaskCreate, TaskFilter, TaskSort, TaskStatus, TaskUpdate
+    from services.search_index import UserSearchIndex
+    from services.task_service import TaskService
+
+    # Cambios de hilo mucho más frecuentes para que las operaciones se intercalen
+    previous_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    service = TaskService()
+    users = list(range(1, 7))
+    statuses = list(TaskStatus)
+    for user_id in users:
+        service.create_tasks([TaskCreate(title="v0", description="v0") for _ in range(30)], user_id)
+        # Estadísticas e índice de búsqueda ya construidos: a partir de aquí se mantienen con cada cambio
+        service.get_task_stats(user_id)
+        service.search_tasks(user_id, "v0")
+
+    created_ids, errors = [], []
+    lock = threading.Lock()
+
+    def operation(seed: int):
+        rng = random.Random(seed)
+        user_id = rng.choice(users)
+        kind = rng.randrange(9)
+        try:
+            if kind == 0:
+                task = service.create_task(TaskCreate(title=f"v{seed}", description=f"v{seed}"), user_id)
+                with lock:
+                    created_ids.append(task.id)
+            elif kind == 1:
+                tasks = service.create_tasks([TaskCreate(title=f"v{seed}", description=f"v{seed}")] * 3, user_id)
+                with lock:
+                    created_ids.extend(task.id for task in tasks)
+            elif kind in (2, 3):
+                tasks = service.store.list_by_user(user_id, 0, 1000)
+                if tasks:
+                    service.update_task(rng.choice(tasks).id, TaskUpdate(
+                        title=f"v{seed}", description=f"v{seed}", status=rng.choice(statuses), priority=rng.randint(1, 5)
+                    ))
+            elif kind == 4:
+                tasks = service.store.list_by_user(user_id, 0, 1000)
+                service.update_tasks([
+                    TaskBulkUpdate(id=task.id, title=f"v{seed}", description=f"v{seed}", status=rng.choice(statuses))
+                    for task in rng.sample(tasks, min(3, len(tasks)))
+                ], user_id)
+            elif kind == 5:
+                tasks = service.store.list_by_user(user_id, 0, 1000)
+                if tasks:
+                    service.delete_task(rng.choice(tasks).id)
+            elif kind == 6:
+                tasks = service.store.list_by_user(user_id, 0, 1000)
+                service.delete_tasks([task.id for task in rng.sample(tasks, min(2, len(tasks)))], user_id)
+            else:
+                # Lecturas: nunca se ve una tarea a medio modificar ni una que no cumpla el filtro
+                status = rng.choice(statuses)
+                for task in service.store.query(user_id, TaskFilter(status=[status], sort=TaskSort.PRIORITY)):
+                    assert task.status == status and task.user_id == user_id
+                    assert task.title == task.description
+                for task in service.store.list_by_user(user_id, 0, 1000):
+                    assert task.user_id == user_id and task.title == task.description
+                service.search_tasks(user_id, "v")
+        except Exception as exc:  # noqa: BLE001 - se comprueban todos al final
+            errors.append(exc)
+
+    try:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(operation, range(3000)))
+    finally:
+        sys.setswitchinterval(previous_interval)
+
+    assert errors == []
+    # Ids únicos aunque se reservaran a la vez
+    initial = 30 * len(users)
+    assert len(set(created_ids)) == len(created_ids)
+    assert service.store.next_id == initial + len(created_ids) + 1
+
+    all_tasks = list(service.store)
+    for user_id in users:
+        expected = sorted((t for t in all_tasks if t.user_id == user_id), key=lambda t: t.id)
+        assert service.store.list_by_user(user_id, 0, 10000) == expected
+        for status in statuses:
+            assert service.store.query(user_id, TaskFilter(status=[status]), limit=10000) == [
+                t for t in expected if t.status == status
+            ]
+        by_updated = service.store.query(user_id, TaskFilter(sort=TaskSort.UPDATED_AT), limit=10000)
+        assert [t.id for t in by_updated] == [t.id for t in sorted(expected, key=lambda t: (t.updated_us, t.id))]
+
+        stats = service.get_task_stats(user_id, 1, date.today())
+        assert stats["total"] == len(expected)
+        assert stats["by_status"] == {s.value: sum(t.status == s for t in expected) for s in statuses}
+        assert stats["by_priority"] == {str(p): sum(t.priority == p for t in expected) for p in range(1, 6)}
+
+        rebuilt = UserSearchIndex.build(expected)
+        for query in ("v", "v1", "v25"):
+            assert sorted(service.store._search[user_id].search(query, 10000)) == sorted(rebuilt.search(query, 10000))
@@ -0,0 +1,121 @@
+"""
+Tests de las peticiones condicionales (ETag, Last-Modified, If-Match)
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def test_conditional_requests_etag_and_if_match(tmp_path, auth_headers):
+    """Test ETag/If-None-Match, Last-Modified y If-Match en tareas y listados"""
+    from services.sqlite_store import SQLiteCollectionVersions, SQLitePool
+
+    task = client.post("/api/tasks/", json={"title": "Condicional"}, headers=auth_headers).json()
+    path = f"/api/tasks/{task['id']}"
+
+    response = client.get(path, headers=auth_headers)
+    etag = response.headers["ETag"]
+    assert response.status_code == 200 and not etag.startswith("W/")
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    response = client.get(path, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304 and response.content == b""
+    assert response.headers["ETag"] == etag
+    response = client.get(
+        path, headers={**auth_headers, "If-Modified-Since": response.headers["Last-Modified"]}
+    )
+    assert response.status_code == 304
+
+    listing = client.get("/api/tasks/?limit=5", headers=auth_headers)
+    list_etag = listing.headers["ETag"]
+    assert list_etag.startswith("W/")
+    conditional = {**auth_headers, "If-None-Match": list_etag}
+    assert client.get("/api/tasks/?limit=5", headers=conditional).status_code == 304
+    assert client.get("/api/tasks/?limit=6", headers=conditional).status_code == 200
+
+    # If-Match: solo se modifica la versión leída
+    stale = {**auth_headers, "If-Match": '"0-0"'}
+    response = client.put(path, json={"status": "completed"}, headers=stale)
+    assert response.status_code == 412 and response.headers["ETag"] == etag
+    response = client.put(path, json={"status": "completed"}, headers={**auth_headers, "If-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    new_etag = response.headers["ETag"]
+
+    assert client.get(path, headers={**auth_headers, "If-None-Match": etag}).status_code == 200
+    assert client.get("/api/tasks/?limit=5", headers=conditional).status_code == 200
+    assert client.delete(path, headers={**auth_headers, "If-Match": etag}).status_code == 412
+    assert client.delete(path, headers={**auth_headers, "If-Match": new_etag}).status_code == 204
+
+    # Con SQLite la versión se comparte entre workers a través de la tabla counters
+    pool = SQLitePool(str(tmp_path / "versions.db"))
+    try:
+        first, second = SQLiteCollectionVersions(pool), SQLiteCollectionVersions(pool)
+        before = second.get(1)
+        first.bump(1)
+        assert second.get(1) != before and second.get(2) == first.get(2)
+    finally:
+        pool.close()
+
+
+def test_if_match_checked_with_the_write(monkeypatch, tmp_path, auth_headers):
+    """Test If-Match se compara con la versión que se escribe, no con la leída antes"""
+    from fastapi import HTTPException
+    from models.task import TaskCreate, TaskUpdate
+    from services.sqlite_store import SQLitePool, SQLiteTaskStore
+    from services.task_service import TaskService, task_service_instance
+
+    task = client.post("/api/tasks/", json={"title": "Carrera"}, headers=auth_headers).json()
+    path = f"/api/tasks/{task['id']}"
+    etag = client.get(path, headers=auth_headers).headers["ETag"]
+
+    # Otro cambio llega entre la lectura del endpoint y la escritura
+    get_task_by_id = task_service_instance.get_task_by_id
+
+    def read_then_race(task_id):
+        current = get_task_by_id(task_id)
+        task_service_instance.update_task(task_id, TaskUpdate(priority=5))
+        return current
+
+    monkeypatch.setattr(task_service_instance, "get_task_by_id", read_then_race)
+    response = client.put(path, json={"status": "completed"}, headers={**auth_headers, "If-Match": etag})
+    assert response.status_code == 412
+    assert client.delete(path, headers={**auth_headers, "If-Match": etag}).status_code == 412
+
+    # Borrada entre la lectura y la escritura: 404, no un error interno
+    def read_then_delete(task_id):
+        current = get_task_by_id(task_id)
+        task_service_instance.delete_task(task_id)
+        return current
+
+    monkeypatch.setattr(task_service_instance, "get_task_by_id", read_then_delete)
+    assert client.put(path, json={"title": "Tarde"}, headers=auth_headers).status_code == 404
+    monkeypatch.undo()
+
+    # Con SQLite la comparación va dentro de la transacción de escritura
+    def reject(current):
+        raise HTTPException(status_code=412)
+
+    service = TaskService()
+    service.store = SQLiteTaskStore(SQLitePool(str(tmp_path / "if_match.db")))
+    try:
+        created = service.create_task(TaskCreate(title="SQLite"), 1)
+        with pytest.raises(HTTPException):
+            service.update_task(created.id, TaskUpdate(title="Cambiada"), reject)
+        with pytest.raises(HTTPException):
+            service.delete_task(created.id, reject)
+        assert service.get_task_by_id(created.id).title == "SQLite"
+    finally:
+        service.store.pool.close()
+
+
+def test_collection_etag_differs_between_users():
+    """Test dos usuarios con la misma versión y la misma query no comparten ETag del listado"""
+    from starlette.requests import Request
+    from middleware.conditional import collection_etag
+
+    request = Request({"type": "http", "method": "GET", "path": "/api/tasks/", "query_string": b"limit=5", "headers": []})
+    assert collection_etag(1, "7", request) != collection_etag(2, "7", request)
+    assert collection_etag(1, "7", request) == collection_etag(1, "7", request)
@@ -0,0 +1,103 @@
+"""
+Tests de las métricas de latencia y el endpoint /metrics
+"""
+
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def test_metrics_endpoint(auth_headers):
+    """Test /metrics expone latencia por ruta, códigos de estado y fases internas"""
+    from datetime import timedelta
+    from services.auth_service import auth_service_instance
+
+    def samples():
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        values = {}
+        for line in response.text.splitlines():
+            if line and not line.startswith("#"):
+                name, value = line.rsplit(" ", 1)
+                values[name] = float(value)
+        return values
+
+    route = 'method="GET",route="/api/tasks/{task_id}"'
+    before = samples()
+    task_id = client.post("/api/tasks/", json={"title": "Medida"}, headers=auth_headers).json()["id"]
+    client.get(f"/api/tasks/{task_id}", headers=auth_headers)
+    client.get("/api/tasks/99999", headers=auth_headers)
+    # Un token que no está en la caché: se decodifica y se busca el usuario
+    username = auth_service_instance.decode_token(auth_headers["Authorization"].split()[1])
+    fresh = auth_service_instance.create_access_token({"sub": username}, timedelta(minutes=5))
+    client.get(f"/api/tasks/{task_id}", headers={"Authorization": f"Bearer {fresh}"})
+    after = samples()
+
+    def delta(name):
+        return after.get(name, 0) - before.get(name, 0)
+
+    assert delta(f"http_request_duration_seconds_count{{{route}}}") == 3
+    assert delta(f'http_request_duration_seconds_bucket{{{route},le="+Inf"}}') == 3
+    assert delta(f'http_requests_total{{{route},status="200"}}') == 2
+    assert delta(f'http_requests_total{{{route},status="404"}}') == 1
+    assert after["http_requests_in_flight"] == 1  # la propia petición a /metrics
+    phases = ("get_current_user", "jwt_decode", "user_lookup", "task_service.create_task", "task_service.get_task_by_id")
+    for phase in phases:
+        assert f'app_phase_duration_seconds_count{{phase="{phase}"}}' in after
+    assert delta('app_phase_duration_seconds_count{phase="task_service.get_task_by_id"}') == 3
+    assert delta('app_phase_duration_seconds_count{phase="user_lookup"}') >= 1
+
+
+def test_metrics_do_not_lose_observations_across_threads():
+    """Test observaciones y contadores desde varios hilos no se pierden"""
+    import threading
+    from services.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    histogram = registry.phase_duration.labels("hilos")
+
+    def work():
+        for _ in range(20000):
+            histogram.observe(0.001)
+            registry.job_items.inc("hilos")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    cumulative, _, count = histogram.snapshot()
+    assert count == cumulative[-1] == 80000
+    assert registry.job_items.values[("hilos",)] == 80000
+    assert 'app_phase_duration_seconds_count{phase="hilos"} 80000' in registry.render()
+
+
+def test_bcrypt_verify_excludes_queue_wait():
+    """Test bcrypt_verify mide solo el bcrypt del worker, no la espera en la cola del pool"""
+    import asyncio
+    import time
+    import bcrypt
+    from services.password_hasher import BCRYPT_VERIFY, PasswordHasher
+
+    hashed = bcrypt.hashpw(b"secreto123", bcrypt.gensalt(4)).decode()
+    hasher = PasswordHasher(workers=1)
+
+    async def verify_behind_busy_worker():
+        loop = asyncio.get_running_loop()
+        # Ocupar el único worker para que la verificación espere en la cola
+        blocker = loop.run_in_executor(hasher._get_executor(), time.sleep, 0.5)
+        valid = await hasher.verify("secreto123", hashed)
+        await blocker
+        return valid
+
+    _, sum_before, count_before = BCRYPT_VERIFY.snapshot()
+    try:
+        assert asyncio.run(verify_behind_busy_worker()) is True
+    finally:
+        hasher.shutdown()
+    _, sum_after, count_after = BCRYPT_VERIFY.snapshot()
+    assert count_after == count_before + 1
+    assert sum_after - sum_before < 0.4
@@ -0,0 +1,113 @@
+"""
+Tests del snapshot y el write-ahead log del backend en memoria
+"""
+
+import pytest
+
+
+def test_persistence_snapshot_and_wal_recovery(tmp_path):
+    """Test recuperación del backend en memoria desde snapshot + cola del WAL"""
+    from datetime import datetime, timezone
+    from models.task import Task, TaskFilter, TaskStatus
+    from services.persistence import Persistence
+    from services.wal import list_segments
+
+    def state(tasks, users):
+        return (
+            [(t.id, t.title, t.description, t.status, t.priority, t.created_at, t.updated_at) for t in tasks],
+            [dict(u) for u in users],
+            tasks.next_id,
+            users.next_id,
+        )
+
+    persistence = Persistence(str(tmp_path), commit_interval=0, fsync=False)
+    tasks, users = persistence.open()
+    now = datetime.now()
+    users.add({
+        "id": users.allocate_id(), "username": "persistente", "email": "p@example.com", "full_name": None,
+        "hashed_password": "hash", "is_active": True, "created_at": datetime.now(timezone.utc),
+    })
+    for _ in range(5):
+        tasks.add(Task(id=tasks.allocate_id(), user_id=1, title="Antes", created_at=now, updated_at=now))
+    snapshot_lsn = persistence.snapshot()
+
+    # Cambios posteriores al snapshot: solo estos se reaplican
+    tasks.update_fields(2, {"status": TaskStatus.COMPLETED, "description": "ñandú", "updated_at": datetime.now()})
+    tasks.remove(3)
+    last_id = tasks.allocate_id()
+    tasks.add(Task(id=last_id, user_id=1, title="Después", created_at=now, updated_at=now))
+    tasks.remove(last_id)
+    users.deactivate(1)
+    expected = state(tasks, users)
+    persistence.flush()
+    persistence.close()
+
+    # Escritura cortada al final del último segmento
+    segments = list_segments(str(tmp_path))
+    assert segments[0][0] == snapshot_lsn + 1
+    with open(segments[-1][1], "ab") as f:
+        f.write(b"\x10\x00\x00")
+
+    recovered = Persistence(str(tmp_path), commit_interval=0, fsync=False)
+    tasks, users = recovered.open()
+    try:
+        assert state(tasks, users) == expected
+        assert tasks.allocate_id() == last_id + 1
+        assert tasks.query(1, TaskFilter(status=[TaskStatus.COMPLETED]))[0].id == 2
+        tasks.add(Task(id=last_id + 1, user_id=1, title="Tras reiniciar", created_at=now, updated_at=now))
+        recovered.flush()
+    finally:
+        recovered.close()
+
+    reopened = Persistence(str(tmp_path), commit_interval=0, fsync=False)
+    tasks, _ = reopened.open()
+    reopened.close()
+    assert tasks.get(last_id + 1).title == "Tras reiniciar"
+
+
+def test_wal_write_error_is_raised_instead_of_lost(tmp_path, monkeypatch):
+    """Test un fallo de fsync para el hilo escritor: append, flush y close lanzan el error en lugar de colgarse"""
+    import errno
+    from services import wal as wal_module
+    from datetime import datetime
+    from models.task import Task
+    from services.persistence import JournaledTaskStore, JournaledUserDirectory
+    from services.wal import WALWriteError, WriteAheadLog
+
+    log = WriteAheadLog(str(tmp_path), commit_interval=0)
+    log.append(1, b"antes")
+    assert log.flush(timeout=5)
+
+    def failing_fsync(fd):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(wal_module.os, "fsync", failing_fsync)
+    log.append(1, b"perdido")
+    with pytest.raises(WALWriteError) as excinfo:
+        log.flush(timeout=5)
+    assert isinstance(excinfo.value.__cause__, OSError)
+    with pytest.raises(WALWriteError):
+        log.append(1, b"despues")
+
+    # Con el WAL parado los almacenes no aplican cambios que no se podrían recuperar
+    now = datetime.now()
+    store = JournaledTaskStore()
+    store.add(Task(id=1, user_id=1, title="Guardada", created_at=now, updated_at=now))
+    store.wal = log
+    with pytest.raises(WALWriteError):
+        store.add(Task(id=2, user_id=1, title="Sin WAL", created_at=now, updated_at=now))
+    with pytest.raises(WALWriteError):
+        store.update_fields(1, {"title": "Sin WAL"})
+    with pytest.raises(WALWriteError):
+        store.remove(1)
+    assert store.get(2) is None and store.get(1).title == "Guardada" and store.list_by_user(1) == [store.get(1)]
+    users = JournaledUserDirectory(log)
+    with pytest.raises(WALWriteError):
+        users.add({
+            "id": 1, "username": "sinwal", "email": "sinwal@example.com", "full_name": None,
+            "hashed_password": "x", "is_active": True, "created_at": now,
+        })
+    assert users.get_by_username("sinwal") is None
+
+    with pytest.raises(WALWriteError):
+        log.close()
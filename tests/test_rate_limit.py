@@ -0,0 +1,123 @@
+"""
+Tests del rate limiting y el control de admisión
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def test_rate_limiter_buckets_and_admission_control():
+    """Test token bucket con memoria acotada y rechazo 503 por encima del máximo de peticiones en curso"""
+    import asyncio
+    import math
+    import httpx
+    from middleware.admission import AdmissionControlMiddleware
+    from services.rate_limiter import RateLimit, RateLimiter, parse_limits
+
+    assert parse_limits("auth=5:20, tasks=50") == {"auth": RateLimit(5, 20), "tasks": RateLimit(50, 50)}
+
+    now = [0.0]
+    limiter = RateLimiter({"tasks": RateLimit(10, 5)}, max_keys=3, clock=lambda: now[0])
+    assert [limiter.acquire("tasks", "a") for _ in range(5)] == [0] * 5
+    assert limiter.acquire("tasks", "a") == pytest.approx(0.1)
+    # Más cara que la ráfaga: se rechaza siempre sin gastar fichas
+    assert limiter.acquire("tasks", "b", cost=50) == math.inf
+    assert limiter.acquire("tasks", "b", cost=5) == 0
+    assert limiter.acquire("otra", "a") == 0  # rutas sin límite configurado
+    now[0] = 0.2
+    assert limiter.acquire("tasks", "a", cost=2) == 0
+
+    # Sin buckets inactivos se descarta el menos usado; después, los que ya se han rellenado
+    limiter.acquire("tasks", "c")
+    limiter.acquire("tasks", "d")
+    assert len(limiter) == 3 and limiter.evictions == 1
+    now[0] = 10.0
+    limiter.acquire("tasks", "e")
+    assert len(limiter) == 1 and limiter.evictions == 4
+
+    release = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def scenario():
+        middleware = AdmissionControlMiddleware(slow_app, max_in_flight=1)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url="http://test") as c:
+            first = asyncio.create_task(c.get("/api/tasks/"))
+            await asyncio.sleep(0.01)
+            rejected = await c.get("/api/tasks/")
+            health = asyncio.create_task(c.get("/health"))
+            release.set()
+            return rejected, await first, await health, middleware
+
+    rejected, first, health, middleware = asyncio.run(scenario())
+    assert rejected.status_code == 503 and rejected.headers["Retry-After"] == "1"
+    assert first.status_code == 200 and health.status_code == 200
+    assert middleware.rejected == 1 and middleware.in_flight == 0
+
+
+def test_rate_limit_isolates_abusive_client(monkeypatch, auth_headers):
+    """Test un cliente abusivo recibe 429 sin afectar a los demás usuarios y los listados más caros que la ráfaga se rechazan"""
+    from models.user import UserCreate
+    from services.auth_service import auth_service_instance
+    from services.rate_limiter import RateLimit, rate_limiter_instance
+
+    if auth_service_instance.get_user_by_username("abuser") is None:
+        auth_service_instance.create_user(UserCreate(username="abuser", email="abuser@example.com", password="abuser123"))
+    abuser_headers = {"Authorization": f"Bearer {auth_service_instance.create_access_token({'sub': 'abuser'})}"}
+    task_id = client.post("/api/tasks/", json={"title": "Consultada"}, headers=auth_headers).json()["id"]
+
+    # Reloj falso: cada paso rellena exactamente una ficha por usuario
+    now = [0.0]
+    monkeypatch.setattr(rate_limiter_instance, "enabled", True)
+    monkeypatch.setattr(rate_limiter_instance, "clock", lambda: now[0])
+    monkeypatch.setitem(rate_limiter_instance.limits, "tasks", RateLimit(1, 20))
+    rate_limiter_instance.clear()
+    try:
+        statuses = {"abuser": [], "normal": []}
+        for step in range(20):
+            now[0] = float(step)
+            # Un listado de 1000 tareas cuesta 11 fichas
+            response = client.get("/api/tasks/?limit=1000", headers=abuser_headers)
+            statuses["abuser"].append(response.status_code)
+            if response.status_code == 429:
+                assert int(response.headers["Retry-After"]) >= 1
+            statuses["normal"].append(client.get(f"/api/tasks/{task_id}", headers=auth_headers).status_code)
+
+        # 20 fichas, -11 (9), +1 (10, no basta), +1 -11 (0), y once pasos hasta volver a 11
+        assert [i for i, code in enumerate(statuses["abuser"]) if code == 200] == [0, 2, 13]
+        assert set(statuses["abuser"]) == {200, 429}
+        assert set(statuses["normal"]) == {200}
+
+        # Con una ráfaga menor que el coste el listado no pasa nunca, ni con el bucket lleno
+        monkeypatch.setitem(rate_limiter_instance.limits, "tasks", RateLimit(10, 5))
+        rate_limiter_instance.clear()
+        response = client.get("/api/tasks/?limit=1000", headers=abuser_headers)
+        assert response.status_code == 429 and "Retry-After" not in response.headers
+        assert client.get("/api/tasks/?limit=100", headers=abuser_headers).status_code == 200
+    finally:
+        rate_limiter_instance.clear()
+
+
+def test_admission_503_carries_cors_headers():
+    """Test los 503 del control de admisión llevan cabeceras CORS para que el navegador los pueda leer"""
+    from middleware.admission import AdmissionControlMiddleware
+
+    client.get("/health")  # construye la pila de middlewares
+    layer = app.middleware_stack
+    while not isinstance(layer, AdmissionControlMiddleware):
+        layer = layer.app
+    original, layer.max_in_flight = layer.max_in_flight, 0
+    try:
+        response = client.get("/api/tasks/", headers={"Origin": "https://app.example.com"})
+    finally:
+        layer.max_in_flight = original
+
+    assert response.status_code == 503 and response.headers["Retry-After"]
+    assert response.headers["access-control-allow-origin"]
+    assert "retry-after" in response.headers["access-control-expose-headers"].lower()
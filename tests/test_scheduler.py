@@ -0,0 +1,165 @@
+"""
+Tests del planificador de trabajos en segundo plano
+"""
+
+import pytest
+
+
+def test_scheduler_orders_jobs_and_bounds_concurrency():
+    """Test los trabajos se ejecutan por instante programado, nunca más de max_concurrency a la vez y un fallo no para el resto"""
+    import asyncio
+    from services.metrics import MetricsRegistry
+    from services.scheduler import Scheduler
+
+    registry = MetricsRegistry()
+    order, active, peak = [], [0], [0]
+
+    def recorder(name):
+        async def job():
+            order.append(name)
+            return 1
+        return job
+
+    async def slow():
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.02)
+        active[0] -= 1
+
+    async def failing():
+        raise RuntimeError("fallo")
+
+    async def scenario():
+        scheduler = Scheduler(max_concurrency=2, registry=registry)
+        scheduler.once("c", recorder("c"), delay=0.03)
+        scheduler.once("a", recorder("a"), delay=0.01)
+        scheduler.start()
+        scheduler.once("b", recorder("b"), delay=0.02)  # programado con el despachador ya esperando
+        for i in range(5):
+            scheduler.once(f"slow{i}", slow)
+        periodic = scheduler.every("tick", 0.01, recorder("tick"), delay=0)
+        broken = scheduler.every("broken", 0.01, failing, delay=0)
+        await asyncio.sleep(0.12)
+        pending = dict(scheduler.pending())
+        await scheduler.shutdown(timeout=1)
+        return periodic, broken, pending, scheduler
+
+    periodic, broken, pending, scheduler = asyncio.run(scenario())
+    assert [name for name in order if name != "tick"] == ["a", "b", "c"]
+    assert peak[0] == 2
+    assert periodic.runs >= 3 and broken.runs >= 3 and "RuntimeError" in broken.last_error
+    assert set(pending) == {"tick", "broken"} and "a" not in scheduler.jobs
+    assert registry.job_runs.values[("broken", "error")] == broken.runs
+    assert registry.job_items.values[("tick",)] == periodic.runs
+    assert registry.jobs_running.value == 0 and not scheduler.jobs and scheduler.running == 0
+    assert "app_job_duration_seconds_count{job=\"slow0\"} 1" in registry.render()
+
+
+def test_scheduler_sweep_yields_event_loop_and_stops_on_shutdown():
+    """Test un barrido largo cede el event loop en cada tramo y el apagado lo para en el tramo siguiente"""
+    import asyncio
+    import time
+    from services.metrics import MetricsRegistry
+    from services.scheduler import Scheduler
+
+    registry = MetricsRegistry()
+    done = [0]
+
+    def steps():
+        while True:
+            deadline = time.perf_counter() + 0.0005
+            while time.perf_counter() < deadline:
+                pass
+            done[0] += 1
+            yield 1
+
+    async def scenario():
+        scheduler = Scheduler(max_concurrency=1, slice_seconds=0.002, registry=registry)
+        scheduler.once("sweep", lambda: scheduler.sweep("sweep", steps()))
+        scheduler.start()
+        # Mientras el barrido avanza, el loop atiende otros callbacks con poca espera
+        gaps, last = [], time.perf_counter()
+        for _ in range(50):
+            await asyncio.sleep(0)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+        start = time.perf_counter()
+        await scheduler.shutdown(timeout=5)
+        return max(gaps), time.perf_counter() - start
+
+    max_gap, shutdown_time = asyncio.run(scenario())
+    assert done[0] > 0
+    assert max_gap < 0.05 and shutdown_time < 0.05
+    assert registry.job_runs.values[("sweep", "ok")] == 1
+    assert registry.job_items.values[("sweep",)] == done[0]
+    slices = registry.job_slice.labels("sweep")
+    assert slices.count > 1 and slices.sum / slices.count < 0.01
+
+
+def test_scheduler_sweep_in_thread_runs_off_loop_and_stops_on_shutdown():
+    """Test un barrido en hilo no ejecuta pasos en el hilo del event loop y se para al apagar"""
+    import asyncio
+    import threading
+    import time
+    from services.metrics import MetricsRegistry
+    from services.scheduler import Scheduler
+
+    threads = set()
+
+    def steps():
+        while True:
+            threads.add(threading.get_ident())
+            time.sleep(0.001)
+            yield 1
+
+    async def scenario():
+        scheduler = Scheduler(registry=MetricsRegistry())
+        scheduler.once("sweep", lambda: scheduler.sweep_in_thread("sweep", steps()))
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        await scheduler.shutdown(timeout=5)
+        return threading.get_ident(), time.perf_counter() - start, scheduler
+
+    loop_thread, shutdown_time, scheduler = asyncio.run(scenario())
+    assert threads and loop_thread not in threads
+    assert shutdown_time < 0.5
+    assert scheduler.registry.job_runs.values[("sweep", "ok")] == 1
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_purge_inactive_users_sweep(backend, tmp_path):
+    """Test el barrido borra por lotes todas las tareas de los usuarios desactivados y mantiene estadísticas y feed"""
+    import asyncio
+    from models.task import TaskChangeType, TaskCreate
+    from services.maintenance import purge_inactive_users
+    from services.metrics import MetricsRegistry
+    from services.scheduler import Scheduler
+    from services.sqlite_store import SQLitePool, SQLiteTaskStats, SQLiteTaskStore
+    from services.task_service import TaskService
+
+    service = TaskService()
+    if backend == "sqlite":
+        pool = SQLitePool(str(tmp_path / "purge.db"))
+        service.store = SQLiteTaskStore(pool)
+        service.stats = SQLiteTaskStats(pool)
+    for user_id in (1, 2, 3):
+        service.create_tasks([TaskCreate(title=f"Tarea {i}") for i in range(25)], user_id)
+    service.get_task_stats(2)
+    since = service.changes.read(2, None).next_since
+    users = [
+        {"id": 1, "is_active": True}, {"id": 2, "is_active": False}, {"id": 3, "is_active": False},
+        {"id": 4, "is_active": False},
+    ]
+
+    async def scenario():
+        scheduler = Scheduler(registry=MetricsRegistry())
+        return await scheduler.sweep("purge", purge_inactive_users(service, users, batch_size=7))
+
+    assert asyncio.run(scenario()) == 50
+    assert service.store.count_by_user(1) == 25
+    assert service.store.count_by_user(2) == 0 and service.store.count_by_user(3) == 0
+    assert service.get_task_stats(2)["total"] == 0
+    changes = service.changes.read(2, since, limit=100).changes
+    assert sum(1 for change in changes if change.type == TaskChangeType.DELETED) == 25
@@ -0,0 +1,73 @@
+"""
+Tests de la búsqueda de tareas
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_search_matches_brute_force(backend, tmp_path, monkeypatch):
+    """Test la búsqueda (tildes, prefijos, todas las palabras) coincide con fuerza bruta y se mantiene al modificar"""
+    import random
+    from services import search_index
+    from models.task import TaskCreate, TaskUpdate
+    from services.search_index import tokenize
+    from services.sqlite_store import SQLitePool, SQLiteTaskStore
+    from services.task_service import TaskService
+
+    # Umbral bajo para que los términos frecuentes mantengan también sus grupos por (longitud, tf)
+    monkeypatch.setattr(search_index, "IMPACT_THRESHOLD", 8)
+    service = TaskService()
+    if backend == "sqlite":
+        service.store = SQLiteTaskStore(SQLitePool(str(tmp_path / "search.db")))
+
+    words = ["revisión", "informe", "canción", "Reunión", "equipo", "cliente", "facturación", "año", "diseño", "API"]
+    rng = random.Random(3)
+
+    def text(count):
+        return " ".join(rng.choice(words) for _ in range(count))
+
+    for user_id in (1, 2):
+        service.create_tasks(
+            [TaskCreate(title=text(3), description=rng.choice([None, text(8)])) for _ in range(120)], user_id
+        )
+    # La primera búsqueda construye el índice; los cambios posteriores lo actualizan sin reconstruirlo
+    assert service.search_tasks(1, "informe")
+    for task in rng.sample(service.store.list_by_user(1, 0, 1000), 40):
+        service.update_task(task.id, TaskUpdate(title=text(2), description=text(4)))
+    for task in rng.sample(service.store.list_by_user(1, 0, 1000), 20):
+        service.delete_task(task.id)
+    created = service.create_task(TaskCreate(title="Preparar la canción del año"), 1)
+
+    def brute_force(query):
+        tokens = tokenize(query)
+        return {
+            t.id for t in service.store.list_by_user(1, 0, 1000)
+            if all(any(w.startswith(q) for w in tokenize(f"{t.title} {t.description or ''}")) for q in tokens)
+        }
+
+    for query in ("cancion", "CANCIÓN año", "reun", "factur equipo", "ano diseño api", "preparar", "inexistente", "a"):
+        found = service.search_tasks(1, query, 1000)
+        assert {t.id for t in found} == brute_force(query), query
+        assert all(t.user_id == 1 for t in found)
+
+    assert service.search_tasks(1, "preparar canción")[0].id == created.id
+    assert service.search_tasks(1, "¿?") == []
+
+
+def test_search_endpoint_ranks_title_matches_first(auth_headers):
+    """Test GET /api/tasks/search ordena por relevancia y no distingue tildes"""
+    headers = auth_headers
+    client.post("/api/tasks/", json={"title": "Otra cosa", "description": "mencionar la migración al final"}, headers=headers)
+    title_id = client.post("/api/tasks/", json={"title": "Migración de la base de datos"}, headers=headers).json()["id"]
+
+    response = client.get("/api/tasks/search?q=migracion", headers=headers)
+    assert response.status_code == 200
+    results = response.json()
+    assert results[0]["id"] == title_id and len(results) >= 2
+    assert client.get("/api/tasks/search?q=migr&limit=1", headers=headers).json()[0]["id"] == title_id
+    assert client.get("/api/tasks/search", headers=headers).status_code == 422
@@ -0,0 +1,32 @@
+"""
+Tests de la serialización rápida de respuestas
+"""
+
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def test_fast_serialization_matches_default(monkeypatch, auth_headers):
+    """Test la serialización rápida produce el mismo JSON que el response_model"""
+    from models import serializers
+
+    task_id = client.post(
+        "/api/tasks/", json={"title": "Serializada", "description": "ñandú"}, headers=auth_headers
+    ).json()["id"]
+    # Más de una página para que el listado devuelva X-Next-Cursor
+    client.post("/api/tasks/bulk", json=[{"title": f"Relleno {i}"} for i in range(3)], headers=auth_headers)
+    paths = [f"/api/tasks/{task_id}", "/api/tasks/?limit=3", "/api/auth/me"]
+    default = [client.get(path, headers=auth_headers) for path in paths]
+
+    monkeypatch.setattr(serializers, "FAST_SERIALIZATION", True)
+    fast = [client.get(path, headers=auth_headers) for path in paths]
+    for expected, response in zip(default, fast):
+        assert response.status_code == expected.status_code
+        assert response.json() == expected.json()
+    assert fast[1].headers["X-Next-Cursor"] == default[1].headers["X-Next-Cursor"]
+
+    response = client.post("/api/tasks/", json={"title": "Rápida"}, headers=auth_headers)
+    assert response.status_code == 201
+    assert response.json()["title"] == "Rápida"
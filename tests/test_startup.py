@@ -0,0 +1,41 @@
+"""
+Tests del arranque en frío
+"""
+
+from fastapi.testclient import TestClient
+
+
+def test_startup_defers_crypto_and_fits_import_budget(tmp_path):
+    """Test importar main no carga jose ni passlib y cabe en el presupuesto de arranque; el esquema pregenerado se sirve"""
+    import json
+    import os
+    import subprocess
+    import sys
+    from fastapi import FastAPI
+    from services.startup import use_prebuilt_openapi, write_openapi
+
+    # Generoso para CI lenta; STARTUP_IMPORT_BUDGET lo ajusta
+    budget = float(os.getenv("STARTUP_IMPORT_BUDGET", "3.0"))
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import main\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(json.dumps({'elapsed': elapsed, 'loaded': sorted({m.split('.')[0] for m in sys.modules} & {'jose', 'passlib'})}))\n"
+    )
+    env = {**os.environ, "STARTUP_MODE": "lazy"}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    startup = json.loads(result.stdout.strip().splitlines()[-1])
+    assert startup["loaded"] == []
+    assert startup["elapsed"] < budget, f"importar main tardó {startup['elapsed']:.2f} s (presupuesto {budget} s)"
+
+    # Esquema OpenAPI generado en el build y servido sin regenerarlo
+    built = FastAPI(title="Esquema")
+    built.get("/ping")(lambda: "pong")
+    path = str(tmp_path / "openapi.json")
+    write_openapi(built, path)
+    served = FastAPI(title="Otra")
+    use_prebuilt_openapi(served, path)
+    assert served.openapi() == built.openapi()
+    assert TestClient(served).get("/openapi.json").json()["info"]["title"] == "Esquema"
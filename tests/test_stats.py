@@ -0,0 +1,112 @@
+"""
+Tests de las estadísticas de tareas
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_stats_match_brute_force(backend, tmp_path):
+    """Test las estadísticas mantenidas con cada cambio coinciden con recontar las tareas tras operaciones aleatorias"""
+    import random
+    from datetime import date, datetime, timedelta
+    from models.task import Task, TaskBulkUpdate, TaskCreate, TaskStatus, TaskUpdate
+    from services.sqlite_store import SQLitePool, SQLiteTaskStats, SQLiteTaskStore
+    from services.task_service import TaskService
+
+    service = TaskService()
+    if backend == "sqlite":
+        pool = SQLitePool(str(tmp_path / "stats.db"))
+        service.store = SQLiteTaskStore(pool)
+        service.stats = SQLiteTaskStats(pool)
+
+    rng = random.Random(7)
+    today = date.today()
+    now = datetime.now()
+    statuses = list(TaskStatus)
+    # Tareas de partida con updated_at repartido en los últimos 12 días
+    seeded = []
+    for task_id in service.store.allocate_ids(150):
+        updated = now - timedelta(days=rng.randint(0, 11), hours=rng.random())
+        seeded.append(Task(
+            id=task_id, user_id=1 + task_id % 2, title=f"Tarea {task_id}", status=rng.choice(statuses),
+            priority=rng.randint(1, 5), created_at=updated, updated_at=updated,
+        ))
+    service.store.add_many(seeded)
+
+    def brute_force(user_id, days):
+        tasks = service.store.list_by_user(user_id, 0, 10000)
+        daily = []
+        for offset in range(days - 1, -1, -1):
+            day = today - timedelta(days=offset)
+            on_day = [t for t in tasks if t.updated_at.date() == day]
+            completed = sum(t.status == TaskStatus.COMPLETED for t in on_day)
+            daily.append((day, len(on_day), completed))
+        return {
+            "total": len(tasks),
+            "by_status": {s.value: sum(t.status == s for t in tasks) for s in statuses},
+            "by_priority": {str(p): sum(t.priority == p for t in tasks) for p in range(1, 6)},
+            "by_status_priority": {
+                s.value: {str(p): sum(t.status == s and t.priority == p for t in tasks) for p in range(1, 6)}
+                for s in statuses
+            },
+            "daily": daily,
+        }
+
+    def check():
+        for user_id, days in ((1, 14), (2, 5)):
+            stats = service.get_task_stats(user_id, days, today)
+            expected = brute_force(user_id, days)
+            assert {key: stats[key] for key in ("total", "by_status", "by_priority", "by_status_priority")} == {
+                key: expected[key] for key in ("total", "by_status", "by_priority", "by_status_priority")
+            }
+            assert [(d["day"], d["updated"], d["completed"]) for d in stats["daily"]] == expected["daily"]
+            completed = expected["by_status"]["completed"]
+            assert stats["completion_rate"] == pytest.approx(completed / expected["total"] if expected["total"] else 0)
+
+    # La primera consulta calcula los contadores; después se mantienen con cada operación
+    check()
+    for _ in range(30):
+        tasks = service.store.list_by_user(1, 0, 10000)
+        operation = rng.randrange(6)
+        if operation == 0:
+            service.create_task(TaskCreate(title="Nueva", status=rng.choice(statuses), priority=rng.randint(1, 5)), 1)
+        elif operation == 1:
+            service.create_tasks([TaskCreate(title="Lote", status=rng.choice(statuses)) for _ in range(3)], 1)
+        elif operation == 2 and tasks:
+            service.update_task(rng.choice(tasks).id, TaskUpdate(status=rng.choice(statuses), priority=rng.randint(1, 5)))
+        elif operation == 3 and tasks:
+            updates = [TaskBulkUpdate(id=t.id, status=rng.choice(statuses)) for t in rng.sample(tasks, min(4, len(tasks)))]
+            service.update_tasks(updates, 1)
+        elif operation == 4 and tasks:
+            service.delete_task(rng.choice(tasks).id)
+        elif operation == 5 and tasks:
+            service.delete_tasks([t.id for t in rng.sample(tasks, min(3, len(tasks)))], 1)
+        check()
+
+
+def test_stats_endpoint(auth_headers):
+    """Test GET /api/tasks/stats cuenta por estado y prioridad y valida `days`"""
+    headers = auth_headers
+    before = client.get("/api/tasks/stats?days=7", headers=headers).json()
+    client.post("/api/tasks/", json={"title": "A", "priority": 3}, headers=headers)
+    task_id = client.post("/api/tasks/", json={"title": "B", "priority": 3}, headers=headers).json()["id"]
+    client.put(f"/api/tasks/{task_id}", json={"status": "completed"}, headers=headers)
+
+    response = client.get("/api/tasks/stats?days=7", headers=headers)
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["total"] == before["total"] + 2
+    assert stats["by_priority"]["3"] == before["by_priority"]["3"] + 2
+    assert stats["by_status"]["completed"] == before["by_status"]["completed"] + 1
+    assert stats["by_status_priority"]["pending"]["3"] == before["by_status_priority"]["pending"]["3"] + 1
+    assert stats["completion_rate"] == stats["by_status"]["completed"] / stats["total"]
+    today = stats["daily"][-1]
+    assert len(stats["daily"]) == 7 and today["day"] == before["daily"][-1]["day"]
+    assert today["updated"] == before["daily"][-1]["updated"] + 2
+    assert today["completed"] == before["daily"][-1]["completed"] + 1
+    assert client.get("/api/tasks/stats?days=0", headers=headers).status_code == 422
@@ -171,4 +171,365 @@ def test_task_validation():
         json={"title": "Tarea", "priority": 10},
         headers=get_auth_header()
     )
-    assert response.status_code == 422
\ No newline at end of file
+    assert response.status_code == 422
+
+def test_task_store_user_index():
+    """Test el índice por usuario del almacén de tareas"""
+    from datetime import datetime
+    from models.task import Task
+    from services.task_store import TaskStore
+
+    store = TaskStore()
+    now = datetime.now()
+    for task_id in range(1, 11):
+        store.add(Task(id=task_id, user_id=task_id % 2, title=f"T{task_id}", created_at=now, updated_at=now))
+
+    assert [t.id for t in store.list_by_user(1, 0, 100)] == [1, 3, 5, 7, 9]
+    assert [t.id for t in store.list_by_user(0, 1, 2)] == [4, 6]
+
+    assert store.remove(5).id == 5
+    assert store.remove(5) is None
+    assert store.get(5) is None
+    assert [t.id for t in store.list_by_user(1, 0, 100)] == [1, 3, 7, 9]
+    assert store.count_by_user(1) == 4
+
+
+def test_task_record_compact_storage():
+    """Test las tareas se guardan como TaskRecord y cada modificación guarda una copia nueva"""
+    from datetime import datetime, timedelta
+    from models.task import Task, TaskFilter, TaskSort, TaskStatus
+    from services.task_record import TaskRecord
+    from services.task_store import TaskStore
+
+    store = TaskStore()
+    now = datetime.now()
+    task = Task(id=1, user_id=7, title="Compacta", description="d", priority=2, created_at=now, updated_at=now)
+    store.add(task)
+
+    record = store.get(1)
+    assert isinstance(record, TaskRecord)
+    assert not hasattr(record, "__dict__")
+    assert record.to_task() == task
+    assert Task.model_validate(record, from_attributes=True) == task
+
+    later = now + timedelta(seconds=5)
+    updated = store.update_fields(1, {"status": TaskStatus.COMPLETED, "title": "Hecha", "updated_at": later})
+    assert updated is not record and store.get(1) is updated
+    assert (updated.status, updated.title, updated.updated_at) == (TaskStatus.COMPLETED, "Hecha", later)
+    # Quien ya tenía la versión anterior la sigue viendo entera
+    assert (record.status, record.title, record.updated_at) == (TaskStatus.PENDING, "Compacta", now)
+    assert store.update_fields(99, {"title": "x"}) is None
+
+    assert store.query(7, TaskFilter(status=[TaskStatus.PENDING])) == []
+    assert store.query(7, TaskFilter(status=[TaskStatus.COMPLETED])) == [updated]
+    assert store.query(7, TaskFilter(updated_from=later, sort=TaskSort.UPDATED_AT)) == [updated]
+
+
+def test_sqlite_backend_shared_between_workers(tmp_path):
+    """Test el backend SQLite comparte tareas e ids entre instancias (workers)"""
+    from services.sqlite_store import SQLitePool, SQLiteTaskStore, SQLiteUserDirectory
+    from services.storage import configure_storage
+
+    db_path = str(tmp_path / "tasks.db")
+    configure_storage("sqlite", db_path)
+    try:
+        client.post("/api/auth/register", json=test_user)
+        token = client.post(
+            "/api/auth/login",
+            data={"username": test_user["username"], "password": test_user["password"]}
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        task_id = client.post("/api/tasks/", json={"title": "Persistente"}, headers=headers).json()["id"]
+        client.put(f"/api/tasks/{task_id}", json={"status": "completed"}, headers=headers)
+
+        # Otro "worker" con su propio pool sobre el mismo fichero
+        other_pool = SQLitePool(db_path)
+        other_store = SQLiteTaskStore(other_pool)
+        task = other_store.get(task_id)
+        assert task.title == "Persistente"
+        assert task.status == "completed"
+        assert other_store.allocate_id() == task_id + 1
+        assert SQLiteUserDirectory(other_pool).get_by_email(test_user["email"].upper())["username"] == test_user["username"]
+
+        assert other_store.remove(task_id).id == task_id
+        assert client.get(f"/api/tasks/{task_id}", headers=headers).status_code == 404
+        other_pool.close()
+    finally:
+        configure_storage("memory")
+
+
+def test_sqlite_bulk_update_does_not_overwrite_concurrent_change(tmp_path):
+    """Test un cambio de otro worker durante una actualización por lotes no se pierde"""
+    import threading
+    import time
+    from datetime import datetime
+    from models.task import Task, TaskStatus
+    from services.sqlite_store import SQLitePool, SQLiteTaskStore
+
+    db_path = str(tmp_path / "race.db")
+    store, other = SQLiteTaskStore(SQLitePool(db_path)), SQLiteTaskStore(SQLitePool(db_path, busy_timeout_ms=5000))
+    now = datetime.now()
+    store.add(Task(id=1, user_id=1, title="Original", created_at=now, updated_at=now))
+
+    # El otro worker completa la tarea justo después de que el lote la haya leído
+    select_many = store._select_many
+    writer = threading.Thread(target=other.update_fields, args=(1, {"status": TaskStatus.COMPLETED}))
+
+    def select_then_race(conn, task_ids):
+        current = select_many(conn, task_ids)
+        writer.start()
+        time.sleep(0.2)
+        return current
+
+    store._select_many = select_then_race
+    store.update_fields_many([(1, {"title": "Renombrada"})])
+    writer.join()
+
+    task = other.get(1)
+    assert task.title == "Renombrada" and task.status == TaskStatus.COMPLETED
+    store.pool.close()
+    other.pool.close()
+
+
+def test_sqlite_busy_returns_503(tmp_path):
+    """Test con el lock de escritura tomado por otro proceso se responde 503 tras un busy_timeout corto"""
+    import sqlite3
+    import time
+    from services.sqlite_store import SQLitePool, StorageBusyError
+    from services.storage import configure_storage
+
+    db_path = str(tmp_path / "busy.db")
+    pool = SQLitePool(db_path, busy_timeout_ms=50)
+    # Otro "worker" con una transacción de escritura abierta
+    holder = sqlite3.connect(db_path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        start = time.perf_counter()
+        with pytest.raises(StorageBusyError):
+            pool.allocate_id("tasks", "tasks")
+        assert time.perf_counter() - start < 1
+    finally:
+        holder.execute("ROLLBACK")
+    assert pool.allocate_id("tasks", "tasks") == 1
+    pool.close()
+
+    configure_storage("sqlite", db_path)
+    try:
+        client.post("/api/auth/register", json=test_user)
+        token = client.post(
+            "/api/auth/login",
+            data={"username": test_user["username"], "password": test_user["password"]}
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        holder.execute("BEGIN IMMEDIATE")
+        try:
+            response = client.post("/api/tasks/", json={"title": "Bloqueada"}, headers=headers)
+        finally:
+            holder.execute("ROLLBACK")
+        assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+        assert client.post("/api/tasks/", json={"title": "Desbloqueada"}, headers=headers).status_code == 201
+    finally:
+        holder.close()
+        configure_storage("memory")
+
+
+def test_serve_requires_shared_storage_for_workers():
+    """Test serve.py no permite varios workers con el backend en memoria"""
+    from serve import resolve_settings
+
+    assert resolve_settings({}) == {"workers": 1, "backend": "memory", "host": "0.0.0.0", "port": 8000}
+    assert resolve_settings({"WORKERS": "1"})["backend"] == "memory"
+    assert resolve_settings({"WORKERS": "4"})["backend"] == "sqlite"
+    assert resolve_settings({"WORKERS": "4", "STORAGE_BACKEND": "sqlite", "PORT": "9000"})["port"] == 9000
+    with pytest.raises(ValueError):
+        resolve_settings({"WORKERS": "4", "STORAGE_BACKEND": "memory"})
+
+
+def test_cursor_pagination():
+    """Test paginación por cursor estable ante borrados entre páginas"""
+    created = []
+    for i in range(5):
+        response = client.post("/api/tasks/", json={"title": f"Paginada {i}"}, headers=get_auth_header())
+        created.append(response.json()["id"])
+
+    all_ids = [t["id"] for t in client.get("/api/tasks/?limit=1000", headers=get_auth_header()).json()]
+    start = all_ids.index(created[0])
+    skip = start
+
+    # Primera página por offset; siguientes por cursor
+    response = client.get(f"/api/tasks/?skip={skip}&limit=2", headers=get_auth_header())
+    assert [t["id"] for t in response.json()] == created[:2]
+    cursor = response.headers["X-Next-Cursor"]
+
+    # Un borrado anterior al cursor no desplaza la página siguiente
+    client.delete(f"/api/tasks/{created[0]}", headers=get_auth_header())
+    response = client.get(f"/api/tasks/?cursor={cursor}&limit=2", headers=get_auth_header())
+    assert [t["id"] for t in response.json()] == created[2:4]
+
+    response = client.get(
+        f"/api/tasks/?cursor={response.headers['X-Next-Cursor']}&limit=2", headers=get_auth_header()
+    )
+    assert [t["id"] for t in response.json()] == created[4:]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get("/api/tasks/?cursor=no-es-un-cursor", headers=get_auth_header())
+    assert response.status_code == 400
+    for limit in (0, -1, 1001):
+        assert client.get(f"/api/tasks/?limit={limit}", headers=get_auth_header()).status_code == 422
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_filtered_queries_match_brute_force(backend, tmp_path):
+    """Test los listados filtrados y ordenados coinciden con un filtrado por fuerza bruta"""
+    import random
+    from datetime import datetime, timedelta
+    from models.task import Task, TaskFilter, TaskSort, TaskStatus, TaskUpdate
+    from services.sqlite_store import SQLitePool, SQLiteTaskStore
+    from services.task_service import TaskService
+    from services.task_store import task_matches
+
+    service = TaskService()
+    if backend == "sqlite":
+        service.store = SQLiteTaskStore(SQLitePool(str(tmp_path / "filters.db")))
+
+    rng = random.Random(7)
+    base = datetime(2024, 1, 1)
+    for i in range(150):
+        stamp = base + timedelta(hours=rng.randint(0, 500))
+        service.store.add(Task(
+            id=service.store.allocate_id(), user_id=rng.choice([1, 1, 1, 2]), title=f"F{i}",
+            status=rng.choice(list(TaskStatus)), priority=rng.randint(1, 5),
+            created_at=stamp, updated_at=stamp + timedelta(hours=rng.randint(0, 48)),
+        ))
+    for task_id in rng.sample(range(1, 151), 30):
+        service.update_task(task_id, TaskUpdate(status=rng.choice(list(TaskStatus)), priority=rng.randint(1, 5)))
+    for task_id in rng.sample(range(1, 151), 20):
+        service.delete_task(task_id)
+
+    everything = [t for t in service.store.list_by_user(1, 0, 10000)]
+    filters = [
+        TaskFilter(status=[TaskStatus.COMPLETED]),
+        TaskFilter(status=[TaskStatus.PENDING, TaskStatus.IN_PROGRESS], sort=TaskSort.ID_DESC),
+        TaskFilter(priority_min=2, priority_max=4, sort=TaskSort.PRIORITY),
+        TaskFilter(status=[TaskStatus.PENDING], sort=TaskSort.PRIORITY_DESC),
+        TaskFilter(
+            updated_from=base + timedelta(hours=100), updated_to=base + timedelta(hours=300), sort=TaskSort.UPDATED_AT
+        ),
+        TaskFilter(created_from=base + timedelta(hours=50), priority_max=3, sort=TaskSort.UPDATED_AT_DESC),
+    ]
+    for task_filter in filters:
+        sort = task_filter.sort
+        field = sort.value.lstrip("-")
+        expected = sorted(
+            (t for t in everything if task_matches(t, task_filter)),
+            key=lambda t: (getattr(t, field), t.id),
+            reverse=sort.value.startswith("-"),
+        )
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = service.get_user_tasks_page(1, 7, cursor, task_filter=task_filter)
+            seen.extend(t.id for t in page)
+            if cursor is None:
+                break
+        assert seen == [t.id for t in expected], task_filter
+
+    # Una página vacía no tiene cursor siguiente
+    assert service.get_user_tasks_page(1, 0) == ([], None)
+    assert service.get_user_tasks_page(1, 0, task_filter=filters[0]) == ([], None)
+
+
+def test_filter_tasks_by_status_endpoint():
+    """Test filtrar por estado y ordenar por prioridad desde la API"""
+    for priority, task_status in ((2, "completed"), (5, "completed"), (4, "pending")):
+        client.post(
+            "/api/tasks/",
+            json={"title": "Filtrable", "status": task_status, "priority": priority},
+            headers=get_auth_header()
+        )
+
+    response = client.get("/api/tasks/?status=completed&sort=-priority&limit=1000", headers=get_auth_header())
+    assert response.status_code == 200
+    data = response.json()
+    assert data and all(t["status"] == "completed" for t in data)
+    assert [t["priority"] for t in data] == sorted((t["priority"] for t in data), reverse=True)
+
+    response = client.get("/api/tasks/?priority_min=6", headers=get_auth_header())
+    assert response.status_code == 422
+
+
+def test_bulk_create_update_delete():
+    """Test endpoints por lotes con resultados por elemento"""
+    response = client.post(
+        "/api/tasks/bulk",
+        json=[{"title": f"Lote {i}", "priority": 1 + i % 5} for i in range(5)],
+        headers=get_auth_header()
+    )
+    assert response.status_code == 201
+    created = response.json()
+    assert [r["status_code"] for r in created] == [201] * 5
+    ids = [r["id"] for r in created]
+    assert client.get(f"/api/tasks/{ids[0]}", headers=get_auth_header()).json()["title"] == "Lote 0"
+
+    # Tarea de otro usuario
+    client.post(
+        "/api/auth/register",
+        json={"username": "bulkother", "email": "bulkother@example.com", "password": "otherpass123"}
+    )
+    other_token = client.post(
+        "/api/auth/login", data={"username": "bulkother", "password": "otherpass123"}
+    ).json()["access_token"]
+    other_id = client.post(
+        "/api/tasks/", json={"title": "Ajena"}, headers={"Authorization": f"Bearer {other_token}"}
+    ).json()["id"]
+
+    response = client.patch(
+        "/api/tasks/bulk",
+        json=[{"id": ids[0], "status": "completed"}, {"id": 999999, "title": "X"}, {"id": other_id, "title": "X"}],
+        headers=get_auth_header()
+    )
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["status_code"] for r in results] == [200, 404, 403]
+    assert results[0]["task"]["status"] == "completed"
+    assert client.get(f"/api/tasks/{ids[0]}", headers=get_auth_header()).json()["status"] == "completed"
+
+    response = client.request(
+        "DELETE", "/api/tasks/bulk", json={"ids": ids[:2] + [other_id]}, headers=get_auth_header()
+    )
+    assert [r["status_code"] for r in response.json()] == [204, 204, 403]
+    assert client.get(f"/api/tasks/{ids[1]}", headers=get_auth_header()).status_code == 404
+    assert client.get(f"/api/tasks/{ids[2]}", headers=get_auth_header()).status_code == 200
+
+
+def test_export_ndjson_and_csv():
+    """Test exportación en streaming en NDJSON y CSV con filtros"""
+    import csv
+    import io
+    import json
+
+    client.post(
+        "/api/tasks/bulk",
+        json=[{"title": "Exportada, con coma", "status": "completed"}, {"title": "Exportada pendiente"}],
+        headers=get_auth_header()
+    )
+    listed, cursor = [], None
+    while True:
+        params = f"?limit=1000&cursor={cursor}" if cursor else "?limit=1000"
+        response = client.get(f"/api/tasks/{params}", headers=get_auth_header())
+        listed.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    response = client.get("/api/tasks/export", headers=get_auth_header())
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows == listed
+
+    response = client.get("/api/tasks/export?format=csv&status=completed", headers=get_auth_header())
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert rows and all(row["status"] == "completed" for row in rows)
+    assert "Exportada, con coma" in [row["title"] for row in rows]